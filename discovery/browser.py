@@ -1,56 +1,277 @@
 from __future__ import annotations
 
 import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Optional, Sequence, Union
 
 from playwright.sync_api import TimeoutError as PWTimeoutError
 
-LOGIN_CHECKS = [
+# pyahocorasick is optional; without it snippets are matched with plain `in` scans.
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+# Page-state probes, split into CSS selectors and visible-text snippets so every
+# check for a helper runs in the browser within a single evaluate round trip.
+LOGIN_CHECKS_CSS = [
     "input[name='email']",
     "input[name='pass']",
     "form[action*='login']",
-    "text=Log in",
-    "text=Create new account",
+]
+LOGIN_CHECKS_TEXT = [
+    "Log in",
+    "Create new account",
 ]
 
-ERROR_CHECKS = [
-    "text=This content isn't available right now",
-    "text=Something went wrong",
-    "text=Sorry, something went wrong",
-    "text=Page isn't available",
+ERROR_CHECKS_TEXT = [
+    "This content isn't available right now",
+    "Something went wrong",
+    "Sorry, something went wrong",
+    "Page isn't available",
 ]
 
+END_OF_RESULTS_TEXT = [
+    "End of results",
+    "No results",
+    "No more results",
+]
+
+# CSS checks are unioned into one selector (one querySelector); text snippets match
+# case-insensitively against a single body.innerText read, like Playwright's text= engine.
+_PROBE_ANY_JS = """([cssUnion, texts]) => {
+    try {
+        if (cssUnion && document.querySelector(cssUnion)) return true;
+    } catch (e) {}
+    if (!texts.length || !document.body) return false;
+    const body = (document.body.innerText || '').toLowerCase();
+    return texts.some(t => body.includes(t));
+}"""
+
+
+def _page_has_any(page, css: Sequence[str], texts: Sequence[str] = ()) -> bool:
+    """
+    One CDP round trip: True if any CSS selector matches or any text snippet is visible.
+    """
+    try:
+        return bool(page.evaluate(_PROBE_ANY_JS, [", ".join(css), [t.lower() for t in texts]]))
+    except Exception:
+        return False
+
+
+@dataclass(frozen=True)
+class PageState:
+    logged_out: bool
+    fb_error: bool
+    end_of_results: bool
+
+
+_TEXT_KINDS = (
+    [("logged_out", t.lower()) for t in LOGIN_CHECKS_TEXT]
+    + [("fb_error", t.lower()) for t in ERROR_CHECKS_TEXT]
+    + [("end_of_results", t.lower()) for t in END_OF_RESULTS_TEXT]
+)
+
+if HAS_AHOCORASICK:
+    _TEXT_AUTOMATON = ahocorasick.Automaton()
+    for _kind, _snippet in _TEXT_KINDS:
+        _TEXT_AUTOMATON.add_word(_snippet, _kind)
+    _TEXT_AUTOMATON.make_automaton()
+
+_STATE_JS = """(cssUnion) => {
+    let css = false;
+    try { css = !!document.querySelector(cssUnion); } catch (e) {}
+    const text = document.body ? (document.body.innerText || '') : '';
+    return [css, text];
+}"""
+
+
+def probe_page_state(page) -> PageState:
+    """
+    All page-state predicates from one round trip: login CSS check + one innerText read,
+    then every snippet matched in a single pass over the text.
+    """
+    try:
+        css_hit, text = page.evaluate(_STATE_JS, ", ".join(LOGIN_CHECKS_CSS))
+    except Exception:
+        return PageState(False, False, False)
+
+    text = (text or "").lower()
+    flags = {"logged_out": bool(css_hit), "fb_error": False, "end_of_results": False}
+    if HAS_AHOCORASICK:
+        for _, kind in _TEXT_AUTOMATON.iter(text):
+            flags[kind] = True
+    else:
+        for kind, snippet in _TEXT_KINDS:
+            if not flags[kind] and snippet in text:
+                flags[kind] = True
+    return PageState(**flags)
+
+
+# Scripts (and optionally anchor hrefs) containing any of the needles, in document order.
+# Comet embeds post links and actorID in JSON script blobs, so this returns a small
+# fraction of what page.content() would marshal over CDP.
+_RELEVANT_FRAGMENTS_JS = """([needles, withHrefs]) => {
+    const out = [];
+    const sel = withHrefs ? 'script, a[href]' : 'script';
+    for (const el of document.querySelectorAll(sel)) {
+        const t = el.tagName === 'SCRIPT' ? el.textContent : el.getAttribute('href');
+        if (t && needles.some(n => t.includes(n))) out.push(t);
+    }
+    return out;
+}"""
+
+
+def collect_relevant_scripts(page, needle: Union[str, Sequence[str]], *, with_hrefs: bool = False) -> List[str]:
+    """
+    Return script texts (and anchor hrefs if with_hrefs) that contain needle
+    (or any of several needles). Raises on page errors; callers decide how to degrade.
+    """
+    needles = [needle] if isinstance(needle, str) else list(needle)
+    frags = page.evaluate(_RELEVANT_FRAGMENTS_JS, [needles, with_hrefs])
+    return [f for f in frags if isinstance(f, str)]
+
+
+# Resource types verify pages never need: author evidence lives in HTML, scripts and the DOM.
+HEAVY_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+
+def _abort_heavy(route) -> None:
+    if route.request.resource_type in HEAVY_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
 
-def page_dump(page, out_html: Path, out_png: Path) -> None:
+
+def block_heavy_resources(page) -> None:
+    """Abort image/media/font/stylesheet requests on page. Not for surface pages (layout may need CSS)."""
+    page.route("**/*", _abort_heavy)
+
+
+def page_dump_html(page, out_html: Path) -> None:
+    """HTML only; enough for triage and far cheaper than a full-page screenshot."""
     out_html.write_text(page.content(), encoding="utf-8", errors="ignore")
+
+
+def page_dump(page, out_html: Path, out_png: Path, *, full_page: bool = False) -> None:
+    """HTML plus a screenshot; viewport-only unless full_page (reserve that for forensic dumps)."""
+    page_dump_html(page, out_html)
     try:
-        page.screenshot(path=str(out_png), full_page=True)
+        page.screenshot(path=str(out_png), full_page=full_page)
     except Exception:
         pass
 
 
 def looks_logged_out(page) -> bool:
-    for sel in LOGIN_CHECKS:
+    return _page_has_any(page, LOGIN_CHECKS_CSS, LOGIN_CHECKS_TEXT)
+
+
+def looks_fb_error(page) -> bool:
+    return _page_has_any(page, (), ERROR_CHECKS_TEXT)
+
+
+def safe_goto(page, url: str, *, timeout_ms: int = 60000) -> None:
+    page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+
+
+def start_navigations(pages: Sequence, urls: Sequence[str]) -> List[str]:
+    """
+    Kick off one navigation per page without waiting on any of them.
+    Returns each page's prior URL, which wait_navigations uses to detect the switch.
+    """
+    befores: List[str] = []
+    for page, url in zip(pages, urls):
         try:
-            if page.locator(sel).first.count() > 0:
-                return True
+            before = page.url
         except Exception:
+            before = ""
+        befores.append(before)
+        try:
+            page.evaluate("u => { window.location.href = u; }", url)
+        except Exception:
+            # The context may already be torn down by the navigation we just started.
             pass
-    return False
+    return befores
 
 
-def looks_fb_error(page) -> bool:
-    for sel in ERROR_CHECKS:
+def wait_navigations(pages: Sequence, befores: Sequence[str], *, timeout_ms: int = 60000) -> List[bool]:
+    """Per-page success: left the prior URL and reached domcontentloaded within one shared deadline."""
+    deadline = time.monotonic() + timeout_ms / 1000.0
+    ok: List[bool] = []
+    for page, before in zip(pages, befores):
+        remaining = max(1, int((deadline - time.monotonic()) * 1000))
         try:
-            if page.locator(sel).first.count() > 0:
-                return True
+            page.wait_for_url(lambda u, b=before: u != b, wait_until="domcontentloaded", timeout=remaining)
+            ok.append(True)
         except Exception:
-            pass
-    return False
+            ok.append(False)
+    return ok
 
 
-def safe_goto(page, url: str, *, timeout_ms: int = 60000) -> None:
-    page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
+def goto_many(pages: Sequence, urls: Sequence[str], *, timeout_ms: int = 60000) -> List[bool]:
+    """
+    Navigate several pages from one thread with overlapping loads: every navigation
+    is started before any is awaited, so a batch costs roughly one page load.
+    Sync Playwright pages are bound to their creating thread, hence no worker threads.
+    """
+    return wait_navigations(pages, start_navigations(pages, urls), timeout_ms=timeout_ms)
+
+
+# Same-origin fetches from a logged-in facebook.com tab: cookies ride along and only the
+# HTML crosses CDP; no renderer, layout or subresources for the fetched posts.
+# Split in two: start parks the promise on window, collect awaits it.
+_START_FETCHES_JS = """([urls, timeoutMs]) => {
+    window.__fbxFetches = Promise.all(urls.map(u =>
+        fetch(u, {credentials: 'include', signal: AbortSignal.timeout(timeoutMs)})
+            .then(r => r.ok ? r.text() : null)
+            .catch(() => null)));
+}"""
+_COLLECT_FETCHES_JS = "() => window.__fbxFetches || null"
+
+# Markup-level login wall checks for fetched HTML (mirrors LOGIN_CHECKS_CSS).
+_HTML_LOGIN_MARKERS = ('name="email"', 'name="pass"', 'action="/login')
+
+
+def start_fetches(page, urls: Sequence[str], *, timeout_ms: int = 45000) -> bool:
+    """Start fetching every url in page without waiting; pair with collect_fetches."""
+    try:
+        page.evaluate(_START_FETCHES_JS, [list(urls), timeout_ms])
+        return True
+    except Exception:
+        return False
+
+
+def collect_fetches(page, n: int) -> List[Optional[str]]:
+    """Results of the last start_fetches, one per url (None where the fetch failed)."""
+    try:
+        out = page.evaluate(_COLLECT_FETCHES_JS)
+    except Exception:
+        out = None
+    if not isinstance(out, list) or len(out) != n:
+        return [None] * n
+    return [h if isinstance(h, str) else None for h in out]
+
+
+def html_looks_logged_out(html: str) -> bool:
+    return any(m in html for m in _HTML_LOGIN_MARKERS)
+
+
+# Post author links as Comet renders them; any one attached means the header is in the DOM.
+AUTHOR_DOM_SELECTOR = "a[href*='profile.php?id='], a[href*='/user/'], h2 a"
+
+
+def wait_for_author_dom(page, *, timeout_ms: int = 1500) -> bool:
+    """
+    Wait until an author-ish anchor is attached instead of sleeping a fixed interval.
+    A timeout is not a failure: verifiers still run (script/actorID evidence may be present).
+    """
+    try:
+        page.wait_for_selector(AUTHOR_DOM_SELECTOR, state="attached", timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
 
 
 def goto_with_retries(page, url: str, dbg_dir: Path, prefix: str, *, tries: int = 3) -> bool:
@@ -59,13 +280,13 @@ def goto_with_retries(page, url: str, dbg_dir: Path, prefix: str, *, tries: int
             safe_goto(page, url, timeout_ms=60000)
             time.sleep(1.0)
             if looks_fb_error(page):
-                page_dump(page, dbg_dir / f"{prefix}_fb_error_try{i}.html", dbg_dir / f"{prefix}_fb_error_try{i}.png")
+                page_dump_html(page, dbg_dir / f"{prefix}_fb_error_try{i}.html")
                 continue
             return True
         except PWTimeoutError:
-            page_dump(page, dbg_dir / f"{prefix}_timeout_try{i}.html", dbg_dir / f"{prefix}_timeout_try{i}.png")
+            page_dump_html(page, dbg_dir / f"{prefix}_timeout_try{i}.html")
         except Exception:
-            page_dump(page, dbg_dir / f"{prefix}_exc_try{i}.html", dbg_dir / f"{prefix}_exc_try{i}.png")
+            page_dump_html(page, dbg_dir / f"{prefix}_exc_try{i}.html")
     return False
 
 
@@ -75,15 +296,4 @@ def scroll_page(page, pause_s: float) -> None:
 
 
 def page_has_end_of_results(page) -> bool:
-    checks = [
-        "text=End of results",
-        "text=No results",
-        "text=No more results",
-    ]
-    for sel in checks:
-        try:
-            if page.locator(sel).first.count() > 0:
-                return True
-        except Exception:
-            pass
-    return False
+    return _page_has_any(page, (), END_OF_RESULTS_TEXT)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import queue
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Iterator, List, Optional
+
+
+class PagePool:
+    """
+    Warm pages on one browser context, checked out per navigation and returned
+    afterwards instead of opening a fresh tab each time.
+
+    Discovery runs on a persistent (logged-in) profile context, and Chromium allows
+    only one persistent context per user-data-dir, so the pool holds pages, not contexts.
+    Sync Playwright objects are bound to the thread that created them: use from one thread.
+    """
+
+    def __init__(self, ctx, size: int = 1, *, on_new_page: Optional[Callable] = None) -> None:
+        self._ctx = ctx
+        self._on_new_page = on_new_page
+        self._pages: List = [self._new_page() for _ in range(max(1, size))]
+        self._free: "queue.Queue" = queue.Queue()
+        for p in self._pages:
+            self._free.put(p)
+
+    def _new_page(self):
+        page = self._ctx.new_page()
+        if self._on_new_page is not None:
+            self._on_new_page(page)
+        return page
+
+    @contextmanager
+    def acquire(self) -> Iterator:
+        page = self._free.get()
+        try:
+            yield page
+        finally:
+            # A crashed/closed tab is replaced so the pool never shrinks.
+            try:
+                closed = page.is_closed()
+            except Exception:
+                closed = True
+            if closed:
+                self._pages.remove(page)
+                page = self._new_page()
+                self._pages.append(page)
+            self._free.put(page)
+
+    @property
+    def size(self) -> int:
+        return len(self._pages)
+
+    @contextmanager
+    def acquire_many(self, n: int) -> Iterator[List]:
+        """Check out up to n pages at once (for batched, overlapping navigations)."""
+        with ExitStack() as stack:
+            yield [stack.enter_context(self.acquire()) for _ in range(max(1, min(n, self.size)))]
+
+    def close(self) -> None:
+        for p in self._pages:
+            try:
+                p.close()
+            except Exception:
+                pass
+        self._pages.clear()
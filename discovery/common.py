@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+import atexit
 import json
+import queue
 import re
+import sys
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Set
 from urllib.parse import parse_qs, quote_plus, urlparse, urlunparse
 
+# orjson is optional; stdlib json keeps the package runnable without it.
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
 GROUP_ID_RE = re.compile(r"/groups/(\d+)", re.IGNORECASE)
 POST_RE = re.compile(r"/groups/(\d+)/posts/(\d+)", re.IGNORECASE)
 PROFILE_ID_RE = re.compile(r"profile\.php\?id=(\d+)", re.IGNORECASE)
@@ -33,6 +45,43 @@ class VerificationResult:
     author_uid_found: Optional[str] = None
 
 
+# Adaptive scroll pause: shrink after a productive scroll, back off after a barren one.
+PAUSE_FLOOR_S = 0.4
+PAUSE_CEIL_S = 2.5
+PAUSE_FAST_NEW = 5
+
+
+def next_scroll_pause(pause_s: float, new_count: int, *, base_s: float) -> float:
+    """
+    Pause before the next scroll given how many new pids the last one produced.
+    The bounds widen to include base_s so an explicit --pause-s is never clamped away.
+    """
+    if new_count >= PAUSE_FAST_NEW:
+        return max(min(PAUSE_FLOOR_S, base_s), pause_s * 0.75)
+    return min(max(PAUSE_CEIL_S, base_s), pause_s * 1.4)
+
+
+def record_pause(history: Optional[Dict[str, int]], pause_s: float) -> None:
+    """Histogram of pauses used (0.1s buckets) for stats.json."""
+    if history is not None:
+        key = f"{pause_s:.1f}"
+        history[key] = history.get(key, 0) + 1
+
+
+def json_dumps_bytes(obj: Any, *, indent: bool = False) -> bytes:
+    """UTF-8 JSON bytes (non-ASCII kept as-is), no trailing newline."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def json_loads(raw: Any) -> Any:
+    """Parse JSON from str or bytes."""
+    if HAS_ORJSON:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
@@ -41,6 +90,7 @@ def run_id() -> str:
     return datetime.now(timezone.utc).strftime("run_%Y%m%d_%H%M%S")
 
 
+@lru_cache(maxsize=8192)
 def canonicalize_url(url: str) -> str:
     p = urlparse(url)
     clean = p._replace(query="", fragment="")
@@ -50,6 +100,7 @@ def canonicalize_url(url: str) -> str:
     return u
 
 
+@lru_cache(maxsize=8192)
 def strip_query_fragment(url: str) -> str:
     try:
         p = urlparse(url)
@@ -59,6 +110,7 @@ def strip_query_fragment(url: str) -> str:
         return url
 
 
+@lru_cache(maxsize=8192)
 def parse_group_id(group_url: str) -> str:
     m = GROUP_ID_RE.search(group_url)
     if not m:
@@ -70,6 +122,7 @@ def canonical_group_post_url(group_id: str, post_id: str) -> str:
     return f"https://www.facebook.com/groups/{group_id}/posts/{post_id}/"
 
 
+@lru_cache(maxsize=8192)
 def normalize_target_slug(target_profile_url: str) -> str:
     p = urlparse(target_profile_url)
     path = p.path.strip("/")
@@ -78,6 +131,7 @@ def normalize_target_slug(target_profile_url: str) -> str:
     return path
 
 
+@lru_cache(maxsize=8192)
 def href_to_abs(h: str) -> str:
     if h.startswith("/"):
         return "https://www.facebook.com" + h
@@ -111,24 +165,200 @@ def build_group_user_posts_url(group_id: str, uid: str) -> str:
 
 
 def stable_dedupe_in_order(items: Iterable[str]) -> List[str]:
-    seen: Set[str] = set()
-    out: List[str] = []
-    for x in items:
-        if x in seen:
-            continue
-        seen.add(x)
-        out.append(x)
-    return out
+    # dicts keep insertion order; fromkeys does the seen/append loop in C.
+    return list(dict.fromkeys(items))
+
+
+_ENSURED_DIRS: Set[Path] = set()
+
+
+def _ensure_dir(path: Path) -> None:
+    """mkdir -p once per directory per process; later calls skip the syscall."""
+    if path in _ENSURED_DIRS:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    _ENSURED_DIRS.add(path)
+
+
+class JsonlWriter:
+    """
+    Append-only JSONL writer that keeps one buffered handle open for the run
+    instead of paying open/write/close per row.
+    """
+
+    def __init__(self, path: Path, *, buffer_size: int = 64 * 1024) -> None:
+        _ensure_dir(path.parent)
+        self.path = path
+        self._f = path.open("ab", buffering=buffer_size)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._f.write(json_dumps_bytes(row))
+        self._f.write(b"\n")
+
+    def write_raw(self, data: bytes) -> None:
+        """Pre-encoded, newline-terminated JSONL bytes."""
+        self._f.write(data)
+
+    def flush(self) -> None:
+        if not self._f.closed:
+            self._f.flush()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+
+
+_JSONL_WRITERS: Dict[Path, JsonlWriter] = {}
+
+
+def get_jsonl_writer(path: Path) -> JsonlWriter:
+    w = _JSONL_WRITERS.get(path)
+    if w is None:
+        w = JsonlWriter(path)
+        _JSONL_WRITERS[path] = w
+    return w
+
+
+def close_jsonl_writers() -> None:
+    while _JSONL_WRITERS:
+        _, w = _JSONL_WRITERS.popitem()
+        w.close()
 
 
 def append_jsonl(path: Path, row: Dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    """Encode on the caller's thread; the file write happens on the background writer."""
+    get_write_worker().append(path, json_dumps_bytes(row) + b"\n")
 
 
 def atomic_write_text(path: Path, text: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(path.parent)
     tmp = path.parent / (path.name + ".tmp")
     tmp.write_text(text, encoding="utf-8")
     tmp.replace(path)
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    _ensure_dir(path.parent)
+    tmp = path.parent / (path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+_SENTINEL = object()
+
+
+class WriteWorker:
+    """
+    One background thread that owns all discovery output writes, so the scrolling /
+    verifying thread never stalls on file I/O. Producers enqueue encoded bytes and return.
+
+    Each burst of queued ops is coalesced: consecutive appends to one path become a single
+    write, and only the newest replace per path is written.
+    """
+
+    def __init__(self) -> None:
+        self._q: "queue.Queue" = queue.Queue()
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="discovery-writer", daemon=True)
+        self._thread.start()
+
+    def append(self, path: Path, data: bytes) -> None:
+        self._q.put(("append", path, data))
+
+    def replace(self, path: Path, data: bytes) -> None:
+        self._q.put(("replace", path, data))
+
+    def flush_all(self) -> None:
+        """Block until everything queued so far is on disk."""
+        self._q.join()
+        for w in list(_JSONL_WRITERS.values()):
+            w.flush()
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._q.put(_SENTINEL)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._q.get()]
+            while True:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+
+            ops = []
+            for item in batch:
+                if item is _SENTINEL:
+                    stop = True
+                    continue
+                ops.append(item)
+
+            try:
+                self._apply(ops)
+            except BaseException as e:  # surfaced to the producer on flush/close
+                if self._error is None:
+                    self._error = e
+                print(f"[ERR] discovery writer: {e!r}", file=sys.stderr)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+
+        close_jsonl_writers()
+
+    @staticmethod
+    def _apply(ops) -> None:
+        pending_path: Optional[Path] = None
+        pending: List[bytes] = []
+        replaces: Dict[Path, bytes] = {}
+
+        def flush_pending() -> None:
+            if pending_path is not None and pending:
+                get_jsonl_writer(pending_path).write_raw(b"".join(pending))
+            pending.clear()
+
+        appended: Set[Path] = set()
+        for kind, path, data in ops:
+            if kind == "append":
+                if path != pending_path:
+                    flush_pending()
+                    pending_path = path
+                pending.append(data)
+                appended.add(path)
+            else:
+                replaces[path] = data
+        flush_pending()
+
+        # Rows appended in this batch reach disk before any replace (e.g. stats.json) that
+        # may count them; one flush per batch keeps the buffering win between checkpoints.
+        if replaces:
+            for path in appended:
+                get_jsonl_writer(path).flush()
+
+        for path, data in replaces.items():
+            atomic_write_bytes(path, data)
+
+
+_WRITE_WORKER: Optional[WriteWorker] = None
+
+
+def get_write_worker() -> WriteWorker:
+    global _WRITE_WORKER
+    if _WRITE_WORKER is None:
+        _WRITE_WORKER = WriteWorker()
+    return _WRITE_WORKER
+
+
+def _shutdown_writers() -> None:
+    if _WRITE_WORKER is not None:
+        _WRITE_WORKER.close()
+    close_jsonl_writers()
+
+
+atexit.register(_shutdown_writers)
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-import json
+import re
 from pathlib import Path
 from typing import Any, Dict, Set, Tuple
 
-from .common import atomic_write_text
+from .common import canonical_group_post_url, get_write_worker, json_dumps_bytes, json_loads
+
+
+# Top-level frontier fields as serialized by json_dumps_bytes; the quote before each key
+# means an escaped occurrence inside another string value (\"post_id\") cannot match.
+_CANONICAL_URL_RE = re.compile(rb'"canonical_url":\s*"((?:[^"\\]|\\.)*)"')
+_POST_ID_RE = re.compile(rb'"post_id":\s*"(\d+)"')
 
 
 def load_existing_frontier(frontier_jsonl: Path) -> Tuple[Set[str], Set[str]]:
@@ -16,26 +22,62 @@ def load_existing_frontier(frontier_jsonl: Path) -> Tuple[Set[str], Set[str]]:
 
     urls: Set[str] = set()
     pids: Set[str] = set()
+    urls_add = urls.add
+    pids_add = pids.add
+
+    # Stream raw bytes lines straight into json.loads (no full-file decode + splitlines copy).
+    with frontier_jsonl.open("rb") as f:
+        for raw in f:
+            raw = raw.strip()
+            if not raw:
+                continue
+
+            # Fast path: lift both fields straight out of the bytes. Only for complete-looking
+            # rows -- frontier rows end with the evidence object, so "}}" -- because a
+            # crash-truncated last line must still fail the full parse and be ignored; and only
+            # for escape-free URLs. Anything else takes the json_loads path below.
+            if raw[:1] == b"{" and raw[-2:] == b"}}":
+                m_url = _CANONICAL_URL_RE.search(raw)
+                m_pid = _POST_ID_RE.search(raw)
+                if m_url is not None and m_pid is not None and b"\\" not in m_url.group(1):
+                    u = m_url.group(1).decode("utf-8", errors="replace")
+                    if u:
+                        urls_add(u)
+                    pids_add(m_pid.group(1).decode("ascii"))
+                    continue
 
-    for line in frontier_jsonl.read_text(encoding="utf-8", errors="ignore").splitlines():
-        line = line.strip()
-        if not line:
-            continue
-        try:
-            obj = json.loads(line)
-        except Exception:
-            continue
+            try:
+                obj = json_loads(raw)
+            except Exception:
+                continue
+            if not isinstance(obj, dict):
+                continue
 
-        u = obj.get("canonical_url")
-        if isinstance(u, str) and u:
-            urls.add(u)
+            u = obj.get("canonical_url")
+            if isinstance(u, str) and u:
+                urls_add(u)
 
-        pid = obj.get("post_id")
-        if isinstance(pid, str) and pid.isdigit():
-            pids.add(pid)
+            pid = obj.get("post_id")
+            if isinstance(pid, str) and pid.isdigit():
+                pids_add(pid)
 
     return urls, pids
 
 
+def frontier_url_post_ids(urls: Set[str], group_id: str) -> Set[str]:
+    """
+    Post ids whose canonical group post URL is in urls, so the per-candidate check is
+    `pid in ids` instead of formatting and hashing the full URL for every pid.
+    """
+    head, _, tail = canonical_group_post_url(group_id, "\0").partition("\0")
+    cut = len(tail)
+    return {
+        u[len(head):len(u) - cut]
+        for u in urls
+        if u.startswith(head) and u.endswith(tail) and len(u) > len(head) + cut
+    }
+
+
 def checkpoint_stats(stats_path: Path, stats: Dict[str, Any]) -> None:
-    atomic_write_text(stats_path, json.dumps(stats, indent=2) + "\n")
+    # Snapshot now (stats keeps mutating); the atomic replace runs on the writer thread.
+    get_write_worker().replace(stats_path, json_dumps_bytes(stats, indent=True) + b"\n")
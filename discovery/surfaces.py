@@ -1,38 +1,50 @@
 from __future__ import annotations
 
 import re
-from typing import Iterator, List, Set, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
-from .browser import page_dump, page_has_end_of_results, scroll_page
-from .common import POST_RE, stable_dedupe_in_order
+from .browser import collect_relevant_scripts, page_dump, page_dump_html, page_has_end_of_results, scroll_page
+from .common import next_scroll_pause, record_pause, stable_dedupe_in_order
+
+
+# Match + dedupe in the page so one CDP round trip returns only unique post ids (DOM order).
+_POST_IDS_FROM_ANCHORS_JS = r"""(els, gid) => {
+    const re = /\/groups\/(\d+)\/posts\/(\d+)/i;
+    const seen = new Set();
+    for (const e of els) {
+        const m = (e.getAttribute('href') || '').match(re);
+        if (m && m[1] === gid) seen.add(m[2]);
+    }
+    return Array.from(seen);
+}"""
 
 
 def _extract_post_ids_from_anchors(page, group_id: str) -> List[str]:
     try:
-        hrefs = page.eval_on_selector_all(
+        pids = page.eval_on_selector_all(
             f"a[href*='/groups/{group_id}/posts/']",
-            "els => els.map(e => e.getAttribute('href')).filter(Boolean)",
+            _POST_IDS_FROM_ANCHORS_JS,
+            group_id,
         )
     except Exception:
-        hrefs = []
-
-    pids: List[str] = []
-    for h in hrefs:
-        if not isinstance(h, str):
-            continue
-        m = POST_RE.search(h)
-        if not m:
-            continue
-        gid, pid = m.group(1), m.group(2)
-        if gid == group_id and pid.isdigit():
-            pids.append(pid)
+        pids = []
 
-    return stable_dedupe_in_order(pids)
+    return [pid for pid in pids if isinstance(pid, str)]
 
 
-def surface_group_search(page, *, group_id: str, surface_name: str, dbg_dir, budget) -> Iterator[Tuple[List[str], int, bool]]:
+def surface_group_search(
+    page,
+    *,
+    group_id: str,
+    surface_name: str,
+    dbg_dir,
+    budget,
+    debug_dumps: bool = False,
+    pause_history: Optional[Dict[str, int]] = None,
+) -> Iterator[Tuple[List[str], int, bool]]:
     seen: Set[str] = set()
     no_new_streak = 0
+    pause_s = budget.pause_s
 
     for scroll_index in range(1, budget.max_scrolls + 1):
         pids = _extract_post_ids_from_anchors(page, group_id)
@@ -50,12 +62,8 @@ def surface_group_search(page, *, group_id: str, surface_name: str, dbg_dir, bud
         else:
             no_new_streak += 1
 
-        if scroll_index in (1, 3, 5, 10, 25, 50) or (scroll_index % 25 == 0):
-            page_dump(
-                page,
-                dbg_dir / f"{surface_name}_scroll_{scroll_index:03d}.html",
-                dbg_dir / f"{surface_name}_scroll_{scroll_index:03d}.png",
-            )
+        if debug_dumps and (scroll_index in (1, 3, 5, 10, 25, 50) or (scroll_index % 25 == 0)):
+            page_dump_html(page, dbg_dir / f"{surface_name}_scroll_{scroll_index:03d}.html")
 
         yield (new, scroll_index, end_seen)
 
@@ -64,50 +72,96 @@ def surface_group_search(page, *, group_id: str, surface_name: str, dbg_dir, bud
         if no_new_streak >= budget.stop_after_no_new:
             break
 
-        scroll_page(page, pause_s=budget.pause_s)
-
-
-def surface_profile_group_posts(page, *, group_id: str, surface_name: str, dbg_dir, budget) -> Iterator[Tuple[List[str], int, bool]]:
-    yield from surface_group_search(page, group_id=group_id, surface_name=surface_name, dbg_dir=dbg_dir, budget=budget)
+        pause_s = next_scroll_pause(pause_s, len(new), base_s=budget.pause_s)
+        record_pause(pause_history, pause_s)
+        scroll_page(page, pause_s=pause_s)
+
+
+def surface_profile_group_posts(
+    page,
+    *,
+    group_id: str,
+    surface_name: str,
+    dbg_dir,
+    budget,
+    debug_dumps: bool = False,
+    pause_history: Optional[Dict[str, int]] = None,
+) -> Iterator[Tuple[List[str], int, bool]]:
+    yield from surface_group_search(
+        page,
+        group_id=group_id,
+        surface_name=surface_name,
+        dbg_dir=dbg_dir,
+        budget=budget,
+        debug_dumps=debug_dumps,
+        pause_history=pause_history,
+    )
 
 
 # Optional feed fallback surface (regex over HTML). Used only when you explicitly set --mode feed.
-_GROUP_POST_RE = re.compile(r"/groups/(\d+)/posts/(\d+)", re.IGNORECASE)
-_PERMALINK_RE = re.compile(
-    r"https?://www\.facebook\.com/permalink\.php\?story_fbid=(\d+)&id=(\d+)",
+# One alternation covers group post links, absolute permalink.php links and bare story_fbid
+# params, so the HTML is scanned once and ids come back in document order.
+_POST_ID_FUSED_RE = re.compile(
+    r"/groups/(?P<g1>\d+)/posts/(?P<p1>\d+)"
+    r"|https?://www\.facebook\.com/permalink\.php\?story_fbid=(?P<p2>\d+)&id=(?P<g2>\d+)"
+    r"|story_fbid=(?P<p3>\d+)",
     re.IGNORECASE,
 )
-_STORY_FBID_RE = re.compile(r"story_fbid=(\d+)", re.IGNORECASE)
 
 
-def _extract_post_ids_from_html_regex(html: str, group_id: str) -> List[str]:
+def _extract_post_ids_from_html_regex(html: str, group_id: str, *, story_ok: Optional[bool] = None) -> List[str]:
+    # Bare story_fbid ids are only trusted on pages that are clearly about this group.
+    # Callers scanning a fragment subset pass story_ok judged on the whole page.
+    if story_ok is None:
+        story_ok = f"/groups/{group_id}" in html
+    # Without either needle no branch can accept anything: skip the regex sweep entirely.
+    if not story_ok and f"id={group_id}" not in html:
+        return []
+
     found: List[str] = []
-    for m in _GROUP_POST_RE.finditer(html):
-        gid, pid = m.group(1), m.group(2)
-        if gid == group_id:
-            found.append(pid)
-    for m in _PERMALINK_RE.finditer(html):
-        pid, gid = m.group(1), m.group(2)
-        if gid == group_id:
-            found.append(pid)
-    if f"/groups/{group_id}" in html:
-        for m in _STORY_FBID_RE.finditer(html):
-            found.append(m.group(1))
+    for m in _POST_ID_FUSED_RE.finditer(html):
+        p1 = m.group("p1")
+        if p1 is not None:
+            if m.group("g1") == group_id:
+                found.append(p1)
+            continue
+        p2 = m.group("p2")
+        if p2 is not None:
+            # A permalink for another owner still carries a story_fbid.
+            if m.group("g2") == group_id or story_ok:
+                found.append(p2)
+            continue
+        if story_ok:
+            found.append(m.group("p3"))
     return stable_dedupe_in_order(found)
 
 
-def surface_group_feed(page, *, group_id: str, surface_name: str, dbg_dir, budget) -> Iterator[Tuple[List[str], int, bool]]:
+def surface_group_feed(
+    page,
+    *,
+    group_id: str,
+    surface_name: str,
+    dbg_dir,
+    budget,
+    debug_dumps: bool = False,
+    pause_history: Optional[Dict[str, int]] = None,
+) -> Iterator[Tuple[List[str], int, bool]]:
     seen: Set[str] = set()
     no_new_streak = 0
+    pause_s = budget.pause_s
 
     for scroll_index in range(1, budget.max_scrolls + 1):
         try:
-            html = page.content()
+            # Every branch of the feed regex needs the group id or a story_fbid, so fragments
+            # holding neither cannot contribute; bare story_fbid blobs are kept like content() did.
+            html = "\n".join(collect_relevant_scripts(page, [group_id, "story_fbid="], with_hrefs=True))
         except Exception:
             page_dump(page, dbg_dir / f"{surface_name}_content_error.html", dbg_dir / f"{surface_name}_content_error.png")
             break
 
-        pids = _extract_post_ids_from_html_regex(html, group_id)
+        group_needle = f"/groups/{group_id}"
+        story_ok = group_needle in html or group_needle in page.url
+        pids = _extract_post_ids_from_html_regex(html, group_id, story_ok=story_ok)
         new: List[str] = []
         for pid in pids:
             if pid in seen:
@@ -120,16 +174,14 @@ def surface_group_feed(page, *, group_id: str, surface_name: str, dbg_dir, budge
         else:
             no_new_streak += 1
 
-        if scroll_index in (1, 5, 10, 25, 50) or (scroll_index % 25 == 0):
-            page_dump(
-                page,
-                dbg_dir / f"{surface_name}_scroll_{scroll_index:03d}.html",
-                dbg_dir / f"{surface_name}_scroll_{scroll_index:03d}.png",
-            )
+        if debug_dumps and (scroll_index in (1, 5, 10, 25, 50) or (scroll_index % 25 == 0)):
+            page_dump_html(page, dbg_dir / f"{surface_name}_scroll_{scroll_index:03d}.html")
 
         yield (new, scroll_index, False)
 
         if no_new_streak >= budget.stop_after_no_new:
             break
 
-        scroll_page(page, pause_s=budget.pause_s)
+        pause_s = next_scroll_pause(pause_s, len(new), base_s=budget.pause_s)
+        record_pause(pause_history, pause_s)
+        scroll_page(page, pause_s=pause_s)
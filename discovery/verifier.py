@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional, Set
+from dataclasses import dataclass
+from functools import lru_cache
+from html import unescape as html_unescape
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
+from .browser import collect_relevant_scripts
 from .common import (
     VerificationResult,
     extract_profile_id_from_href,
     href_to_abs,
     normalize_target_slug,
+    stable_dedupe_in_order,
     strip_query_fragment,
 )
 
@@ -16,8 +21,43 @@ from .common import (
 # actorID may appear as:
 #   "actorID":100054771426216
 #   "actorID":"100054771426216"
-_ACTORID_NUM = r'"actorID"\s*:\s*{uid}\b'
-_ACTORID_STR = r'"actorID"\s*:\s*"{uid}"\b'
+_ACTORID = r'"actorID"\s*:\s*(?:"{uid}"|{uid}\b)'
+
+
+@lru_cache(maxsize=256)
+def _actorid_pattern(target_uid: str) -> "re.Pattern[str]":
+    """Both actorID forms fused into one pattern, compiled once per uid."""
+    return re.compile(_ACTORID.format(uid=re.escape(target_uid)))
+
+
+@lru_cache(maxsize=256)
+def _profile_uid_pattern(target_uid: str) -> "re.Pattern[str]":
+    """profile.php?id=<uid> anywhere in a newline-joined href buffer."""
+    return re.compile(r"profile\.php\?id=" + re.escape(target_uid) + r"(?!\d)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class TargetSpec:
+    """
+    Target identity normalized once per run (lowered/stripped forms + compiled patterns),
+    so verify_author does no per-post re-normalization.
+    """
+    uid: str
+    full: str
+    slug: str
+    actorid_re: Optional["re.Pattern[str]"] = None
+    profile_uid_re: Optional["re.Pattern[str]"] = None
+
+    @classmethod
+    def from_url(cls, target_profile_url: str, target_uid: str = "") -> "TargetSpec":
+        uid = (target_uid or "").strip()
+        return cls(
+            uid=uid,
+            full=strip_query_fragment(target_profile_url.replace("http://", "https://").rstrip("/")).lower(),
+            slug=normalize_target_slug(target_profile_url).strip().lower(),
+            actorid_re=_actorid_pattern(uid) if uid else None,
+            profile_uid_re=_profile_uid_pattern(uid) if uid else None,
+        )
 
 
 _AUTHOR_SELECTORS = [
@@ -42,99 +82,167 @@ def _get_first_authorish_href(page) -> Optional[str]:
     return None
 
 
-def _html_actorid_match(page, target_uid: str) -> bool:
+def _html_actorid_match(page, target: TargetSpec) -> bool:
     """
-    Deterministic: match actorID in the HTML content.
+    Deterministic: match actorID in the page's script payloads.
     This is the strongest signal we’ve seen for Comet single-post views.
     """
-    if not target_uid:
+    if not target.uid or target.actorid_re is None:
         return False
     try:
-        html = page.content()
+        # Only script blobs that mention the uid at all cross CDP (doubles as the substring gate).
+        blobs = collect_relevant_scripts(page, target.uid)
     except Exception:
         return False
 
-    uid = re.escape(target_uid)
-    pat_num = re.compile(_ACTORID_NUM.format(uid=uid))
-    if pat_num.search(html):
-        return True
-    pat_str = re.compile(_ACTORID_STR.format(uid=uid))
-    if pat_str.search(html):
-        return True
+    pat = target.actorid_re
+    return any(pat.search(b) is not None for b in blobs)
 
-    return False
 
+def _norm_href(hh_abs: str) -> str:
+    return strip_query_fragment(hh_abs).replace("http://", "https://").rstrip("/").lower()
 
-def verify_author(page, *, target_profile_url: str, target_uid: str = "") -> VerificationResult:
-    """
-    Deterministic matching order:
-      0) actorID in HTML (if target_uid provided)
-      1) Header author href extraction (bounded selectors)
-      2) UID match via href scan
-      3) Canonical profile URL match
-      4) Slug match
-    """
-    t_uid = (target_uid or "").strip()
-    t_full = strip_query_fragment(target_profile_url.replace("http://", "https://").rstrip("/")).lower()
-    t_slug = normalize_target_slug(target_profile_url).strip().lower()
-
-    # 0) actorID in HTML
-    if t_uid and _html_actorid_match(page, t_uid):
-        return VerificationResult(True, "uid", author_uid_found=t_uid)
-
-    # 1) header author href extraction
-    h0 = _get_first_authorish_href(page)
-    if h0:
-        hh_abs = href_to_abs(h0)
-        hh_norm = strip_query_fragment(hh_abs).replace("http://", "https://").rstrip("/").lower()
-
-        uid0 = extract_profile_id_from_href(hh_abs)
-        if uid0 and t_uid and uid0 == t_uid:
-            return VerificationResult(True, "uid", author_uid_found=uid0)
-
-        if t_full and t_full in hh_norm:
-            return VerificationResult(True, "profile_url", author_uid_found=uid0)
-
-        if t_slug:
-            try:
-                if ("/" + t_slug) in urlparse(hh_norm).path:
-                    return VerificationResult(True, "slug", author_uid_found=uid0)
-            except Exception:
-                pass
-
-    # 2+) fallback: scan all hrefs
+
+def _url_path(hh_norm: str) -> str:
     try:
-        hrefs: List[str] = page.eval_on_selector_all(
-            "a[href]",
-            "els => els.map(e => e.getAttribute('href')).filter(Boolean)"
-        )
+        return urlparse(hh_norm).path
     except Exception:
-        hrefs = []
+        return ""
+
+
+def _make_structural_match(target: TargetSpec) -> Callable[[str], Optional[str]]:
+    """Active non-uid match paths (profile_url / slug) for one target, in match order."""
+    structural: List[Tuple[str, Callable[[str], bool]]] = []
+    if target.full:
+        t_full = target.full
+        structural.append(("profile_url", lambda hh_norm: t_full in hh_norm))
+    if target.slug:
+        slug_needle = "/" + target.slug
+        structural.append(("slug", lambda hh_norm: slug_needle in _url_path(hh_norm)))
+
+    def structural_match(hh_norm: str) -> Optional[str]:
+        for method, check in structural:
+            if check(hh_norm):
+                return method
+        return None
+
+    return structural_match
 
-    found_uids: Set[str] = set()
+
+def _scan_hrefs(hrefs: Iterable[Any], t_uid: str, structural_match: Callable[[str], Optional[str]]) -> VerificationResult:
+    """
+    Per-href uid / structural match in DOM order.
+    author_uid_found reports the first uid seen. Without a uid target that is all uid
+    extraction is needed for, so it stops once one is captured.
+    """
+    first_uid: Optional[str] = None
 
     for h in hrefs:
         if not isinstance(h, str):
             continue
 
         hh_abs = href_to_abs(h)
-        hh_norm = strip_query_fragment(hh_abs).replace("http://", "https://").rstrip("/").lower()
-
-        uid = extract_profile_id_from_href(hh_abs)
-        if uid:
-            found_uids.add(uid)
-            if t_uid and uid == t_uid:
-                return VerificationResult(True, "uid", author_uid_found=uid)
-
-        if t_full and t_full in hh_norm:
-            return VerificationResult(True, "profile_url", author_uid_found=(next(iter(found_uids)) if found_uids else None))
-
-        if t_slug:
-            try:
-                path = urlparse(hh_norm).path
-                if ("/" + t_slug) in path:
-                    return VerificationResult(True, "slug", author_uid_found=(next(iter(found_uids)) if found_uids else None))
-            except Exception:
-                pass
-
-    return VerificationResult(False, "none", author_uid_found=(next(iter(found_uids)) if found_uids else None))
+
+        if t_uid or first_uid is None:
+            uid = extract_profile_id_from_href(hh_abs)
+            if uid:
+                if first_uid is None:
+                    first_uid = uid
+                if t_uid and uid == t_uid:
+                    return VerificationResult(True, "uid", author_uid_found=uid)
+
+        method = structural_match(_norm_href(hh_abs))
+        if method:
+            return VerificationResult(True, method, author_uid_found=first_uid)
+
+    return VerificationResult(False, "none", author_uid_found=first_uid)
+
+
+@lru_cache(maxsize=32)
+def make_verifier(target: TargetSpec) -> Callable[[Any], VerificationResult]:
+    """
+    Specialize verification for one target at target-lock time: which match paths are
+    active (uid / profile_url / slug) is decided here once, not re-branched per post.
+
+    Deterministic matching order of the returned verifier:
+      0) actorID in HTML (if target uid provided)
+      1) Header author href extraction (bounded selectors)
+      2) UID match via href scan
+      3) Canonical profile URL match
+      4) Slug match
+    """
+    t_uid = target.uid
+    profile_uid_re = target.profile_uid_re if t_uid else None
+    structural_match = _make_structural_match(target)
+
+    def verify(page) -> VerificationResult:
+        # 0) actorID in HTML
+        if t_uid and _html_actorid_match(page, target):
+            return VerificationResult(True, "uid", author_uid_found=t_uid)
+
+        # 1) header author href extraction
+        h0 = _get_first_authorish_href(page)
+        if h0:
+            hh_abs = href_to_abs(h0)
+            uid0 = extract_profile_id_from_href(hh_abs)
+            if uid0 and t_uid and uid0 == t_uid:
+                return VerificationResult(True, "uid", author_uid_found=uid0)
+
+            method = structural_match(_norm_href(hh_abs))
+            if method:
+                return VerificationResult(True, method, author_uid_found=uid0)
+
+        # 2+) fallback: scan all hrefs
+        try:
+            hrefs: List[str] = page.eval_on_selector_all(
+                "a[href]",
+                "els => Array.from(new Set(els.map(e => e.getAttribute('href')).filter(Boolean)))",
+            )
+        except Exception:
+            hrefs = []
+
+        # Fast path: one C-level sweep over all hrefs for the target uid before per-href parsing.
+        if profile_uid_re is not None and hrefs:
+            joined = "\n".join(h for h in hrefs if isinstance(h, str))
+            if profile_uid_re.search(joined):
+                return VerificationResult(True, "uid", author_uid_found=t_uid)
+
+        return _scan_hrefs(hrefs, t_uid, structural_match)
+
+    return verify
+
+
+_HREF_ATTR_RE = re.compile(r'href="([^"]+)"')
+
+
+@lru_cache(maxsize=32)
+def make_html_verifier(target: TargetSpec) -> Callable[[str], VerificationResult]:
+    """
+    make_verifier for raw post HTML (e.g. from start_fetches/collect_fetches), no rendered DOM needed.
+
+    Matching order: actorID (JSON-escaped slashes undone first), then the href attribute
+    scan in document order. profile.php?id=<uid> only counts inside an href: elsewhere in
+    the payload it may be a commenter, reaction or sidebar entry, not the author.
+    """
+    t_uid = target.uid
+    structural_match = _make_structural_match(target)
+
+    def verify(html: str) -> VerificationResult:
+        text = html.replace("\\/", "/")
+        if t_uid and target.actorid_re is not None and target.actorid_re.search(text):
+            return VerificationResult(True, "uid", author_uid_found=t_uid)
+
+        hrefs = stable_dedupe_in_order(html_unescape(m.group(1)) for m in _HREF_ATTR_RE.finditer(text))
+        return _scan_hrefs(hrefs, t_uid, structural_match)
+
+    return verify
+
+
+def verify_author(page, *, target: TargetSpec) -> VerificationResult:
+    """One-shot form of make_verifier(target)(page); the specialization is cached per target."""
+    return make_verifier(target)(page)
+
+
+def verify_author_legacy(page, *, target_profile_url: str, target_uid: str = "") -> VerificationResult:
+    """Old keyword signature; prefer building one TargetSpec per run."""
+    return verify_author(page, target=TargetSpec.from_url(target_profile_url, target_uid))
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Evidence-first Facebook observation extractor (sync Playwright) — MODAL AWARE.
+Evidence-first Facebook observation extractor (async Playwright) — MODAL AWARE.
 
 Key fix:
 - If a comments modal/dialog exists, expansion is restricted to that dialog
@@ -14,16 +14,17 @@ Output:
 from __future__ import annotations
 
 import argparse
+import asyncio
 import hashlib
 import json
+import mmap
 import re
-import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Tuple, Optional
 
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
+from playwright.async_api import async_playwright, TimeoutError as PWTimeoutError
 
 
 DEFAULT_PROFILE_DIR = "/mnt/c/dev/fb_playwright_profile"
@@ -31,11 +32,15 @@ DEFAULT_THREADS_FILE = "fb_extract_out/discovered_threads.txt"
 DEFAULT_OUT_FILE = "fb_extract_out/observations.jsonl"
 
 # Patterns (tolerant)
-RE_PRI_1 = re.compile(r"(view|see)\s+(previous|earlier)\s+comments", re.I)
-RE_PRI_2 = re.compile(r"(view|see)\s+(\d+\s+)?more\s+comments", re.I)
-RE_PRI_3 = re.compile(r"(view|see)\s+(\d+\s+)?more\s+repl(ies|y)", re.I)
-RE_PRI_4 = re.compile(r"^(view|see)\s+repl(ies|y)$", re.I)
-RE_SEE_MORE = re.compile(r"^see more$", re.I)
+# One alternation; the named group that matched (p1..p4, p9) is the priority.
+RE_ALL = re.compile(
+    r"(?P<p1>(?:view|see)\s+(?:previous|earlier)\s+comments)"
+    r"|(?P<p2>(?:view|see)\s+(?:\d+\s+)?more\s+comments)"
+    r"|(?P<p3>(?:view|see)\s+(?:\d+\s+)?more\s+repl(?:ies|y))"
+    r"|(?P<p4>^(?:view|see)\s+repl(?:ies|y)$)"
+    r"|(?P<p9>^see more$)",
+    re.I,
+)
 
 
 @dataclass
@@ -64,58 +69,129 @@ def load_threads(path: str) -> List[str]:
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Threads file not found: {path}")
-    urls = []
-    for line in p.read_text(encoding="utf-8", errors="ignore").splitlines():
-        u = line.strip()
-        if not u or u.startswith("#"):
-            continue
-        urls.append(u)
-    return urls
+    text = p.read_bytes().decode("utf-8", "ignore")
+    return [u for u in (line.strip() for line in text.splitlines()) if u and u[0] != "#"]
+
+
+async def write_jsonl(fh, lock: asyncio.Lock, obj: dict) -> None:
+    """
+    Append one record to an already-open, line-buffered handle.
+    """
+    line = json.dumps(obj, ensure_ascii=False) + "\n"
+    async with lock:
+        fh.write(line)
 
 
-def write_jsonl(path: Path, obj: dict) -> None:
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+# Hit serializes with "url" as its first key, so resume only needs a line-anchored match.
+# A whole record also carries its trailing "evidence" dict and ends in "}}". A record torn before
+# that (or one a later run appended onto, starting a second {"url": on the line) is not done.
+RE_DONE_URL = re.compile(
+    rb'^\{"url":(?![^\n]*\{"url":)\s*"((?:[^"\\\n]|\\.)*)"[^\n]*, "evidence": \{[^\n]*\}\}\r?$',
+    re.M,
+)
 
 
-def screenshot(page, out_path: Path) -> None:
+def load_done_urls(path: Path) -> set:
+    """
+    URLs already present in observations.jsonl (mmap + regex, no per-line JSON parse).
+    """
+    if not path.exists() or path.stat().st_size == 0:
+        return set()
+    done = set()
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in RE_DONE_URL.finditer(mm):
+            raw = m.group(1)
+            try:
+                url = json.loads(b'"' + raw + b'"') if b"\\" in raw else raw.decode("utf-8")
+            except Exception:
+                continue
+            if url:
+                done.add(url)
+    return done
+
+
+async def screenshot(page, out_path: Path, full_page: bool = False) -> None:
+    """
+    Viewport-only by default; .jpg/.jpeg paths are written at quality 60.
+    """
+    kw = {"type": "jpeg", "quality": 60} if out_path.suffix in (".jpg", ".jpeg") else {}
     try:
-        page.screenshot(path=str(out_path), full_page=True)
+        await page.screenshot(path=str(out_path), full_page=full_page, **kw)
     except Exception:
         pass
 
 
-def dump_html(page, out_path: Path) -> None:
+async def dump_html(page, out_path: Path, root=None) -> None:
+    """
+    Dump the dialog subtree when root is a dialog locator, else the whole document.
+    """
     try:
-        out_path.write_text(page.content(), encoding="utf-8", errors="ignore")
+        if root is None or root is page:
+            html = await page.content()
+        else:
+            html = await root.evaluate("el => el.outerHTML")
+        out_path.write_bytes(html.encode("utf-8", errors="ignore"))
     except Exception:
         pass
 
 
-def text_or_label(el) -> str:
-    try:
-        t = (el.inner_text() or "").strip()
-    except Exception:
-        t = ""
-    if t:
-        return t
-    try:
-        a = (el.get_attribute("aria-label") or "").strip()
-    except Exception:
-        a = ""
-    return a
+DIALOG_SEL = "div[role='dialog']"
+
+# Per-dialog affordance counts + bbox area in one trip. Text counts mirror
+# :text-matches (smallest element whose own text matches), via a text-node walk.
+_DIALOG_STATS_JS = """(dialogs, cap) => {
+    const pats = {
+        most_rel: /Most relevant/i,
+        write: /Write a comment/i,
+        like: /Like/i,
+        reply: /Reply/i,
+    };
+    const out = [];
+    const n = Math.min(dialogs.length, cap);
+    for (let i = 0; i < n; i++) {
+        const d = dialogs[i];
+        const hits = {most_rel: new Set(), write: new Set(), like: new Set(), reply: new Set()};
+        const walker = document.createTreeWalker(d, NodeFilter.SHOW_TEXT);
+        for (let t = walker.nextNode(); t; t = walker.nextNode()) {
+            const v = t.nodeValue;
+            if (!v || !v.trim()) continue;
+            for (const k in pats) {
+                if (pats[k].test(v)) hits[k].add(t.parentElement);
+            }
+        }
+        const r = d.getBoundingClientRect();
+        out.push({
+            n: dialogs.length,
+            idx: i,
+            most_rel: hits.most_rel.size,
+            leave: d.querySelectorAll("[aria-label='Leave a comment']").length,
+            write: hits.write.size,
+            like: hits.like.size,
+            reply: hits.reply.size,
+            area: r.width * r.height,
+        });
+    }
+    return out;
+}"""
 
 
-def pick_expansion_root(page):
+async def pick_expansion_root(page):
     """
     If a comments modal exists, restrict expansion to it.
-    Score dialogs by affordance density using STRICT dialog-scoped locators.
+    Score dialogs by affordance density, computed for all dialogs in one JS call.
     Formula: most_rel*10 + leave*10 + write*10 + like + reply
     Tie-break: if scores match, prefer SMALLEST non-zero bbox area (inner modal).
     Fallback to largest bbox if no scores.
     """
-    dialogs = page.locator("div[role='dialog']")
-    n = dialogs.count()
+    dialogs = page.locator(DIALOG_SEL)
+    try:
+        stats = await page.eval_on_selector_all(DIALOG_SEL, _DIALOG_STATS_JS, 6)  # cap; usually 1-2 dialogs
+    except Exception:
+        stats = None
+    if stats is None:
+        print("[debug] dialogs_found_but_error chosen=None")
+        return page
+    n = stats[0]["n"] if stats else 0
     if n == 0:
         print("[debug] dialogs=0 chosen_dialog=None score=0 fallback=body")
         return page  # fallback: whole page
@@ -123,32 +199,15 @@ def pick_expansion_root(page):
     # Track all candidates: (index, score, area)
     candidates = []
 
-    scan = min(n, 6)  # cap; usually 1-2 dialogs
-    for i in range(scan):
-        try:
-            d = dialogs.nth(i)
-            
-            # Counts (STRICT LOCATORS within d)
-            most_rel = d.locator(":text-matches('Most relevant', 'i')").count()
-            leave = d.locator("[aria-label='Leave a comment']").count()
-            write = d.locator(":text-matches('Write a comment', 'i')").count()
-            like = d.locator(":text-matches('Like', 'i')").count()
-            reply = d.locator(":text-matches('Reply', 'i')").count()
-
-            score = (most_rel * 10) + (leave * 10) + (write * 10) + like + reply
-            
-            # Area
-            box = d.bounding_box()
-            area = (box["width"] * box["height"]) if box else 0
+    for st in stats:
+        i = st["idx"]
+        most_rel, leave, write = st["most_rel"], st["leave"], st["write"]
+        like, reply, area = st["like"], st["reply"], st["area"]
 
-            print(f"[debug] dialog[{i}] area={area} most_rel={most_rel} leave={leave} write={write} like={like} reply={reply} score={score}")
-            candidates.append({'idx': i, 'score': score, 'area': area})
-        except Exception:
-            continue
+        score = (most_rel * 10) + (leave * 10) + (write * 10) + like + reply
 
-    if not candidates:
-        print("[debug] dialogs_found_but_error chosen=None")
-        return page
+        print(f"[debug] dialog[{i}] area={area} most_rel={most_rel} leave={leave} write={write} like={like} reply={reply} score={score}")
+        candidates.append({'idx': i, 'score': score, 'area': area})
 
     # 1. Sort by score DESC
     candidates.sort(key=lambda x: x['score'], reverse=True)
@@ -189,44 +248,225 @@ def pick_expansion_root(page):
     return page
 
 
-def find_expand_controls(root) -> List[Tuple[int, str, object]]:
+CLICKABLE_SEL = "div[role='button'], a[role='button'], span[role='button'], button, a"
+BUTTON_SEL = "button, [role='button']"
+SCAN_SEL = CLICKABLE_SEL + ", [role='button']"
+MAX_CONTROL_SCAN = 600  # higher cap because we are now scoped to modal
+MAX_TEXT_CLICKS = 10
+FALLBACK_CLICK_BATCH = 4  # concurrent locator clicks per page on the fallback path
+
+# Text-based expanders (matched against innerText of buttons only).
+RE_EXPANDER = re.compile(
+    r"(view\s+all\s+\d+\s+repl(?:y|ies)"
+    r"|view\s+\d+\s+repl(?:y|ies)"
+    r"|see\s+more"
+    r"|view\s+more"
+    r"|more\s+replies"
+    r"|more\s+comments"
+    r"|previous\s+items"
+    r"|previous\s+replies"
+    r"|view\s+previous)",
+    re.I,
+)
+
+
+def _root_js(body: str) -> Tuple[str, str]:
+    """
+    Wrap a JS body using `r` (scope) and `a` (arg) for Locator and Page roots.
+    """
+    return "(r, a) => {" + body + "}", "(a) => { const r = document;" + body + "}"
+
+
+async def root_evaluate(root, js: Tuple[str, str], arg=None):
+    if hasattr(root, "goto"):  # Page
+        return await root.evaluate(js[1], arg)
+    return await root.evaluate(js[0], arg)
+
+
+# One in-browser walk: stamp each clickable in scope with a fresh data-fbx-id
+# and return [id, innerText, aria-label, is_button, is_clickable].
+_SCAN_JS = _root_js("""
+    window.__fbxSeq = window.__fbxSeq || 0;
+    const out = [];
+    const els = r.querySelectorAll(a.sel);
+    const n = Math.min(els.length, a.cap);
+    for (let i = 0; i < n; i++) {
+        const e = els[i];
+        const id = String(++window.__fbxSeq);
+        e.setAttribute('data-fbx-id', id);
+        out.push([
+            id,
+            (e.innerText || '').trim(),
+            (e.getAttribute('aria-label') || '').trim(),
+            e.matches(a.btn),
+            e.matches(a.clk),
+        ]);
+    }
+    return out;
+""")
+
+# Document-wide MutationObserver, installed once per page load: __fbxTick counts
+# mutation batches, __fbxLast is the time of the latest one.
+_ENSURE_OBSERVER_JS_BODY = """
+    if (!window.__fbxObs) {
+        window.__fbxTick = 0;
+        window.__fbxLast = performance.now();
+        window.__fbxObs = new MutationObserver(() => {
+            window.__fbxTick++;
+            window.__fbxLast = performance.now();
+        });
+        window.__fbxObs.observe(document.documentElement, {childList: true, subtree: true});
+    }
+"""
+_MUTATION_TICK_JS = "() => {" + _ENSURE_OBSERVER_JS_BODY + "return window.__fbxTick; }"
+
+# Resolves once the DOM has mutated past `since` and then been quiet for
+# `quiet` ms, or after `timeout` ms; the value is whether anything mutated.
+_WAIT_SETTLE_JS = """(a) => new Promise((resolve) => {
+    const start = performance.now();
+    const poll = () => {
+        const now = performance.now();
+        const moved = (window.__fbxTick || 0) > a.since;
+        if (moved && now - window.__fbxLast >= a.quiet) return resolve(true);
+        if (now - start >= a.timeout) return resolve(moved);
+        setTimeout(poll, 50);
+    };
+    poll();
+})"""
+
+# Native-click every stamped id in one trip; returns [clicked, tick_before].
+_CLICK_JS = _root_js(_ENSURE_OBSERVER_JS_BODY + """
+    const before = window.__fbxTick;
+    let clicked = 0;
+    for (const id of a.ids) {
+        const e = r.querySelector('[data-fbx-id="' + id + '"]');
+        if (!e || !e.isConnected) continue;
+        e.scrollIntoView({block: 'center'});
+        e.click();
+        clicked++;
+    }
+    return [clicked, before];
+""")
+
+
+INVENTORY_SEL = "button, [role='button'], a, [aria-label]"
+_INVENTORY_JS = """(els, cap) => [els.length, els.slice(0, cap).map(e => ({
+    tag: e.tagName.toLowerCase(),
+    text: (e.textContent || '').slice(0, 400),
+    role: e.getAttribute('role') || '',
+    aria: e.getAttribute('aria-label') || '',
+}))]"""
+
+
+async def mutation_tick(page) -> Optional[int]:
+    try:
+        return await page.evaluate(_MUTATION_TICK_JS)
+    except Exception:
+        return None
+
+
+async def wait_for_dom_settle(page, since: Optional[int], delay_s: float) -> bool:
+    """
+    Mutation-driven replacement for a fixed delay: return as soon as the DOM
+    changed and went quiet (up to 1.5x delay_s). True if anything changed.
     """
-    Return list of (priority, label, element-locator).
+    if delay_s <= 0:
+        return True
+    timeout_ms = int(delay_s * 1500)
+    if since is None:
+        await page.wait_for_timeout(int(delay_s * 1000))
+        return True
+    try:
+        return bool(await page.evaluate(_WAIT_SETTLE_JS, {
+            "since": since, "quiet": min(250, timeout_ms), "timeout": timeout_ms,
+        }))
+    except Exception:
+        return True
+
+
+_DIALOG_LAYOUT_KEY_JS = """() => {
+    const ds = document.querySelectorAll("div[role='dialog']");
+    const parts = [ds.length];
+    for (const d of ds) parts.push(d.childElementCount + 'x' + d.clientWidth + 'x' + d.clientHeight);
+    return parts.join('|');
+}"""
+
+
+async def dialog_layout_key(page) -> Optional[str]:
+    """
+    Cheap fingerprint of which dialogs exist and their shape; None on error.
+    """
+    try:
+        return await page.evaluate(_DIALOG_LAYOUT_KEY_JS)
+    except Exception:
+        return None
+
+
+async def scan_expanders(root) -> Tuple[List[Tuple[str, str]], List[Tuple[int, str, str]]]:
+    """
+    Return (text_expanders, controls) found in one DOM scan of root.
+    text_expanders: [(fbx_id, label)] buttons whose text matches RE_EXPANDER.
+    controls: [(priority, label, fbx_id)] sorted by priority then label.
     IMPORTANT: root is either the modal dialog locator or the page.
     """
-    # Use a broad clickable set INSIDE ROOT only.
-    loc = root.locator("div[role='button'], a[role='button'], span[role='button'], button, a")
-    n = loc.count()
-    out: List[Tuple[int, str, object]] = []
+    text_hits: List[Tuple[str, str]] = []
+    controls: List[Tuple[int, str, str]] = []
+    try:
+        items = await root_evaluate(root, _SCAN_JS, {
+            "sel": SCAN_SEL, "btn": BUTTON_SEL, "clk": CLICKABLE_SEL, "cap": MAX_CONTROL_SCAN,
+        })
+    except Exception:
+        return text_hits, controls
 
-    scan = min(n, 600)  # higher cap because we are now scoped to modal
-    for i in range(scan):
-        try:
-            el = loc.nth(i)
-            label = text_or_label(el)
-            if not label:
-                continue
-            norm = re.sub(r"\s+", " ", label).strip()
-
-            if RE_PRI_1.search(norm):
-                out.append((1, norm, el))
-            elif RE_PRI_2.search(norm):
-                out.append((2, norm, el))
-            elif RE_PRI_3.search(norm):
-                out.append((3, norm, el))
-            elif RE_PRI_4.search(norm):
-                out.append((4, norm, el))
-            elif RE_SEE_MORE.search(norm):
-                out.append((9, norm, el))
-        except Exception:
+    for fbx_id, text, aria, is_btn, is_clk in items:
+        if is_btn and text and RE_EXPANDER.search(text):
+            text_hits.append((fbx_id, text))
+        label = text or aria
+        if not is_clk or not label:
             continue
+        norm = " ".join(label.split())
 
-    out.sort(key=lambda x: (x[0], x[1]))
-    return out
+        m = RE_ALL.search(norm)
+        if m:
+            controls.append((int(m.lastgroup[1:]), norm, fbx_id))
 
+    controls.sort(key=lambda x: (x[0], x[1]))
+    return text_hits, controls
 
 
-def get_scroll_container(page, root):
+async def batch_click(page, root, fbx_ids: List[str], delay_s: float) -> int:
+    """
+    Native-click all ids in one evaluate, then wait for the DOM to settle.
+    If clicks landed but nothing mutated, retry each via
+    Playwright's click (handles listeners that ignore synthetic clicks).
+    """
+    if not fbx_ids:
+        return 0
+    try:
+        clicked, before = await root_evaluate(root, _CLICK_JS, {"ids": fbx_ids})
+    except Exception as e:
+        print(f"[debug] batch click failed: {e}")
+        clicked, before = 0, None
+
+    changed = await wait_for_dom_settle(page, before, delay_s)
+    if before is not None and (clicked == 0 or changed):
+        return clicked
+
+    print(f"[debug] batch click had no effect; falling back to locator clicks ({len(fbx_ids)})")
+    tick = await mutation_tick(page)
+    clicked = 0
+    for i in range(0, len(fbx_ids), FALLBACK_CLICK_BATCH):
+        batch = fbx_ids[i:i + FALLBACK_CLICK_BATCH]
+        oks = await asyncio.gather(*(
+            click_control(page, root.locator(f'[data-fbx-id="{fbx_id}"]'), 0)
+            for fbx_id in batch
+        ))
+        clicked += sum(1 for ok in oks if ok)
+    await wait_for_dom_settle(page, tick, delay_s)
+    return clicked
+
+
+async def get_scroll_container(page, root):
     """
     Find the best scrollable container within the dialog scope (or fallback to root).
     """
@@ -236,11 +476,11 @@ def get_scroll_container(page, root):
 
     # JS to find scrollable
     try:
-        handle = root.element_handle()
+        handle = await root.element_handle()
         if not handle: return None
 
         # Return JSHandle of scrollable element
-        return root.evaluate_handle("""(root) => {
+        return await root.evaluate_handle("""(root) => {
             const isScrollable = (el) => {
                 const style = window.getComputedStyle(el);
                 return (style.overflowY === 'auto' || style.overflowY === 'scroll') && el.scrollHeight > el.clientHeight;
@@ -260,116 +500,89 @@ def get_scroll_container(page, root):
         return None
 
 
-def scroll_modal(page, container_handle, amount=1200):
+async def scroll_modal(page, container_handle, amount=1200):
     """
     Scroll the container by amount.
-    Returns (scrollTop, scrollHeight, clientHeight) after scroll.
+    Returns (scrollTop, scrollHeight, clientHeight, articleCount) after scroll;
+    articleCount is [role=article] within the enclosing dialog (or document).
     """
     try:
         if container_handle:
-             return container_handle.evaluate("""(el, dy) => { 
+             return await container_handle.evaluate("""(el, dy) => { 
                 el.scrollBy(0, dy); 
-                return [el.scrollTop, el.scrollHeight, el.clientHeight]; 
+                const scope = el.closest("div[role='dialog']") || el;
+                return [el.scrollTop, el.scrollHeight, el.clientHeight,
+                        scope.querySelectorAll("[role='article']").length]; 
              }""", amount)
         else:
              # Page scroll
-             return page.evaluate("""(dy) => {
+             return await page.evaluate("""(dy) => {
                 window.scrollBy(0, dy);
-                return [window.scrollY, document.body.scrollHeight, window.innerHeight];
+                return [window.scrollY, document.body.scrollHeight, window.innerHeight,
+                        document.querySelectorAll("[role='article']").length];
              }""", amount)
     except Exception:
-        return (0, 0, 0)
+        return (0, 0, 0, 0)
 
 
-def click_control(page, el, delay_s: float) -> bool:
+async def click_control(page, el, delay_s: float) -> bool:
     try:
         try:
-            el.scroll_into_view_if_needed(timeout=1500)
+            await el.scroll_into_view_if_needed(timeout=1500)
         except Exception:
             pass
 
         try:
-            el.click(timeout=2500)
+            await el.click(timeout=2500)
         except Exception:
-            el.click(timeout=2500, force=True)
+            await el.click(timeout=2500, force=True)
 
         if delay_s > 0:
-            page.wait_for_timeout(int(delay_s * 1000))
+            await page.wait_for_timeout(int(delay_s * 1000))
         return True
     except Exception:
         return False
 
 
-def expand_until_stable(page, max_rounds: int, stable_rounds: int, delay_s: float, debug_dir: Path) -> dict:
+async def expand_until_stable(page, max_rounds: int, stable_rounds: int, delay_s: float, debug_dir: Path,
+                              debug_screenshots: bool = False) -> Tuple[dict, object]:
     """
     Multi-level expansion loop, scoped to modal when present.
+    Returns (stats, root) where root is the final dialog locator or the page.
     """
     clicks_total = 0
     rounds = 0
     stable = 0
     seen_fp = set()
-    last_scroll_top = -1
+    # (scrollTop, scrollHeight, articleCount): virtualized lists can grow
+    # without scrollTop moving, so any component changing counts as progress.
+    last_scroll_state: Optional[Tuple[int, int, int]] = None
     nudge_done = False
     root = page
+    root_key: Optional[str] = None
 
     for _ in range(max_rounds):
         rounds += 1
 
-        root = pick_expansion_root(page)  # modal if present
+        # Re-score dialogs only when the dialog layout fingerprint moves.
+        dkey = await dialog_layout_key(page)
+        if dkey is None or dkey != root_key:
+            root = await pick_expansion_root(page)  # modal if present
+            root_key = dkey
         
-        # --- NEW: Text-Based Expanders ---
-        # Prioritize regex text matches using filter() as :text-matches was inconsistent
-        expander_pattern = (
-            r"(view\s+all\s+\d+\s+repl(?:y|ies)"
-            r"|view\s+\d+\s+repl(?:y|ies)"
-            r"|see\s+more"
-            r"|view\s+more"
-            r"|more\s+replies"
-            r"|more\s+comments"
-            r"|previous\s+items"
-            r"|previous\s+replies"
-            r"|view\s+previous)"
-        )
-        re_expander = re.compile(expander_pattern, re.I)
-        
-        # Use locator().filter() as requested
-        text_candidates = root.locator("button, [role='button']").filter(has_text=re_expander)
-        
-        tc_count = text_candidates.count()
-        text_clicks = 0
-        # Try to click up to 5 text candidates per round
-        for ti in range(min(tc_count, 10)):
-             try:
-                 el = text_candidates.nth(ti)
-                 # Ensure visibility before clicking (click_control handles this too, but prompt asked for strictness)
-                 try:
-                     el.scroll_into_view_if_needed(timeout=1000)
-                 except: pass
-                 
-                 if click_control(page, el, delay_s):
-                     text_clicks += 1
-             except: pass
-        
-        controls = find_expand_controls(root)
+        text_hits, controls = await scan_expanders(root)
+        tc_count = len(text_hits)
 
         # --- DEBUG: Inventory Dump if Zero Expanders ---
         if rounds == 1 and tc_count == 0 and len(controls) == 0:
              print("[debug] Zero expanders found on round 1. Dumping clickable inventory...")
              try:
-                 # Broad clickable search
-                 inv = root.locator("button, [role='button'], a, [aria-label]")
-                 inv_count = inv.count()
+                 # Broad clickable search; all props read in one trip
+                 inv_count, props_list = await root.locator(INVENTORY_SEL).evaluate_all(_INVENTORY_JS, 80)
                  print(f"[debug] Inventory scan found {inv_count} items (capped at 80).")
-                 for ii in range(min(inv_count, 80)):
-                     try:
-                         el = inv.nth(ii)
-                         # Use evaluate for safety vs inner_text throwing
-                         props = el.evaluate("el => ({tag: el.tagName.toLowerCase(), text: el.textContent || '', role: el.getAttribute('role') || '', aria: el.getAttribute('aria-label') || ''})")
-                         
-                         txt = props['text'].strip().replace("\n", " ")[:120]
-                         print(f"   [inv] tag={props['tag']} role={props['role']} aria={props['aria']} txt={txt}")
-                     except Exception as e_el:
-                         print(f"   [inv] <error reading element {ii}: {e_el}>")
+                 for props in props_list:
+                     txt = props['text'].strip().replace("\n", " ")[:120]
+                     print(f"   [inv] tag={props['tag']} role={props['role']} aria={props['aria']} txt={txt}")
              except Exception as e:
                  print(f"[debug] Inventory dump failed: {e}")
 
@@ -377,22 +590,24 @@ def expand_until_stable(page, max_rounds: int, stable_rounds: int, delay_s: floa
              # MOVED to end of loop to handle ALL rounds, not just round 1
              pass
 
-        fp = "|".join([f"{p}:{lbl}" for (p, lbl, _) in controls][:80])
+        h = hashlib.blake2b(digest_size=16)
+        for (p, lbl, _) in controls[:80]:
+            h.update(f"{p}:{lbl}\n".encode("utf-8"))
+        fp = h.digest()
         if fp in seen_fp:
             stable += 1
         else:
             seen_fp.add(fp)
 
-        clicks_total += text_clicks
-        clicked_this_round = text_clicks  # Start with text clicks
+        # Text expanders first (capped), then prioritized controls; each element once.
+        ids = [fbx_id for (fbx_id, _) in text_hits[:MAX_TEXT_CLICKS]]
+        ids.extend(fbx_id for (_, _, fbx_id) in controls)
+        ids = list(dict.fromkeys(ids))
 
-        for (pri, label, el) in controls:
-            ok = click_control(page, el, delay_s)
-            if ok:
-                clicked_this_round += 1
-                clicks_total += 1
-                if clicks_total <= 10:
-                    screenshot(page, debug_dir / f"expand_click_{clicks_total:03d}.png")
+        clicked_this_round = await batch_click(page, root, ids, delay_s)
+        if debug_screenshots and clicked_this_round and clicks_total < 10:
+            await screenshot(page, debug_dir / f"expand_click_{clicks_total + 1:03d}.jpg")
+        clicks_total += clicked_this_round
 
         print(f"[debug] round={rounds} text_expanders={tc_count} other_expanders={len(controls)} clicks_this_round={clicked_this_round}")
 
@@ -411,20 +626,22 @@ def expand_until_stable(page, max_rounds: int, stable_rounds: int, delay_s: floa
         if should_scroll:
             try:
                 # Resolve container
-                c_handle = get_scroll_container(page, root)
+                c_handle = await get_scroll_container(page, root)
                 
                 # Scroll
-                vals = scroll_modal(page, c_handle, 1200)
-                st, sh, ch = vals if vals else (0,0,0)
+                tick = await mutation_tick(page)
+                vals = await scroll_modal(page, c_handle, 1200)
+                st, sh, ch, arts = vals if vals else (0,0,0,0)
                 
                 progressed = "no"
-                if st != last_scroll_top:
+                state = (st, sh, arts)
+                if state != last_scroll_state:
                     progressed = "yes"
-                    # If we moved, we are NOT stable, we just uncovered new area.
+                    # If we moved or grew, we are NOT stable, we just uncovered new area.
                     stable = 0 
-                    last_scroll_top = st
+                    last_scroll_state = state
                 
-                print(f"[debug] scroll: top={st} height={sh} client={ch} progressed={progressed}")
+                print(f"[debug] scroll: top={st} height={sh} client={ch} articles={arts} progressed={progressed}")
                 
                 # --- NUDGE SCROLL ---
                 # "if text_expanders==0, other_expanders==0, and scroll progressed=no for 2 consecutive rounds"
@@ -433,19 +650,18 @@ def expand_until_stable(page, max_rounds: int, stable_rounds: int, delay_s: floa
                      if tc_count == 0 and len(controls) == 0:
                          print("[debug] Stuck & 0 expanders & no scroll progress. Attempting one-time NUDGE (-400, +1200)...")
                          
-                         scroll_modal(page, c_handle, -400)
-                         page.wait_for_timeout(1000)
+                         await scroll_modal(page, c_handle, -400)
+                         await page.wait_for_timeout(1000)
                          
-                         vals_nudge = scroll_modal(page, c_handle, 1200)
+                         vals_nudge = await scroll_modal(page, c_handle, 1200)
                          if vals_nudge:
-                             last_scroll_top = vals_nudge[0]
+                             last_scroll_state = (vals_nudge[0], vals_nudge[1], vals_nudge[3])
                          
-                         page.wait_for_timeout(1000)
+                         await page.wait_for_timeout(1000)
                          nudge_done = True
                          stable = 0 # Reset stable to allow discovery after nudge
                 
-                if delay_s > 0:
-                    page.wait_for_timeout(int(delay_s * 1000))
+                await wait_for_dom_settle(page, tick, delay_s)
             except Exception as e:
                 print(f"[debug] Scroll logic failed: {e}")
 
@@ -457,22 +673,196 @@ def expand_until_stable(page, max_rounds: int, stable_rounds: int, delay_s: floa
         "expand_clicks_total": clicks_total,
         "expand_stable_rounds_reached": stable,
         "root_scoped_to_dialog": root is not page,
-    }
+    }, root
 
 
-def extract_modal_or_body_text(page) -> str:
+async def extract_modal_or_body_text(page, root=None) -> str:
     """
     Evidence-first: capture innerText of modal if present, else body.
+    Pass the root expand_until_stable settled on to skip re-scoring dialogs.
     """
     try:
-        root = pick_expansion_root(page)
+        if root is None:
+            root = await pick_expansion_root(page)
         if root is page:
-            return (page.locator("body").inner_text() or "").strip()
-        return (root.inner_text() or "").strip()
+            return ((await page.locator("body").inner_text()) or "").strip()
+        return ((await root.inner_text()) or "").strip()
     except Exception:
         return ""
 
 
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+
+
+async def block_heavy_resources(route) -> None:
+    """
+    Context-wide route handler: skip bytes that never affect the comment DOM.
+    Stylesheets stay (scroll heights depend on layout).
+    """
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def checkout_page(ctx, page_pool: asyncio.Queue):
+    """
+    Take a warm tab from the pool; replace it if it was closed/crashed.
+    """
+    page = await page_pool.get()
+    if page.is_closed():
+        page = await ctx.new_page()
+    return page
+
+
+async def checkin_page(ctx, page_pool: asyncio.Queue, page, *, healthy: bool) -> None:
+    """
+    Blank the tab (frees the thread DOM) and return it; discard it if unhealthy.
+    """
+    if healthy and not page.is_closed():
+        try:
+            await page.goto("about:blank")
+            page_pool.put_nowait(page)
+            return
+        except Exception:
+            pass
+    try:
+        await page.close()
+    except Exception:
+        pass
+    page_pool.put_nowait(await ctx.new_page())
+
+
+async def process_thread(ctx, page_pool: asyncio.Queue, out_fh, write_lock: asyncio.Lock, args, *,
+                         idx: int, total: int, url: str, run_id: str,
+                         debug_root: Path) -> None:
+    """
+    One thread URL on a pooled tab; the pool size bounds concurrency.
+    """
+    th = short_hash(url)
+    tdir = debug_root / f"thread_{th}"
+    ensure_dir(tdir)
+
+    page = await checkout_page(ctx, page_pool)
+    healthy = False
+    try:
+        print(f"[{idx}/{total}] goto: {url}")
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+            await page.wait_for_timeout(1500)
+        except PWTimeoutError:
+            print(f"  [!] timeout on goto: {url}")
+        except Exception as e:
+            print(f"  [!] goto error: {url}: {e}")
+
+        await screenshot(page, tdir / "start.png", full_page=True)
+        if args.dump_html:
+            await dump_html(page, tdir / "start.html")
+
+        expansion = expand_until_stable(
+            page,
+            max_rounds=args.max_expand_rounds,
+            stable_rounds=args.stable_rounds,
+            delay_s=args.expand_delay,
+            debug_dir=tdir,
+            debug_screenshots=bool(args.debug_screenshots),
+        )
+        budget = args.per_url_budget_s if args.per_url_budget_s > 0 else None
+        try:
+            exp, root = await asyncio.wait_for(expansion, timeout=budget)
+        except asyncio.TimeoutError:
+            print(f"  [!] expansion budget ({args.per_url_budget_s}s) exhausted: {url}")
+            exp = {
+                "expand_rounds": -1,
+                "expand_clicks_total": -1,
+                "expand_stable_rounds_reached": 0,
+                "root_scoped_to_dialog": False,
+                "timeout": True,
+            }
+            root = None
+
+        await screenshot(page, tdir / "after_expand.png", full_page=True)
+        if args.dump_html:
+            await dump_html(page, tdir / "after_expand.html", root=root)
+
+        raw_text = await extract_modal_or_body_text(page, root)
+
+        hit = Hit(
+            url=url,
+            final_url=page.url,
+            ts_utc=now_utc_iso(),
+            target=args.target,
+            raw_container_text=raw_text,
+            evidence={
+                "run_id": run_id,
+                "thread_hash": th,
+                "debug_dir": str(tdir),
+                "expand": exp,
+            },
+        )
+        healthy = True
+    finally:
+        await checkin_page(ctx, page_pool, page, healthy=healthy)
+
+    await write_jsonl(out_fh, write_lock, hit.__dict__)
+    print(f"  [{idx}/{total}] wrote observation | clicks={exp['expand_clicks_total']} rounds={exp['expand_rounds']}")
+
+
+async def run(args, *, threads: List[str], done: set, run_id: str,
+              debug_root: Path, out_path: Path) -> None:
+    total = len(threads)
+    done = frozenset(done)
+    pending: List[Tuple[int, str]] = []
+    for idx, url in enumerate(threads, start=1):
+        if url in done:
+            print(f"[{idx}/{total}] skip (resume): {url}")
+            continue
+        pending.append((idx, url))
+    if args.only_one:
+        pending = pending[:1]
+
+    write_lock = asyncio.Lock()
+
+    # One line-buffered handle for the whole run (no open/close per record).
+    with out_path.open("a", encoding="utf-8", buffering=1) as out_fh:
+        async with async_playwright() as p:
+            ctx = await p.chromium.launch_persistent_context(
+                user_data_dir=args.profile_dir,
+                headless=bool(args.headless),
+                viewport={"width": 1280, "height": 900},
+                args=["--disable-notifications", "--no-sandbox"],
+            )
+            try:
+                if args.block_media:
+                    await ctx.route("**/*", block_heavy_resources)
+
+                # K warm tabs, reused across URLs (reuse the context's initial tab).
+                k = max(1, min(args.concurrency, len(pending) or 1))
+                page_pool: asyncio.Queue = asyncio.Queue()
+                pages = list(ctx.pages[:1])
+                while len(pages) < k:
+                    pages.append(await ctx.new_page())
+                for pg in pages:
+                    page_pool.put_nowait(pg)
+
+                results = await asyncio.gather(
+                    *(
+                        process_thread(
+                            ctx, page_pool, out_fh, write_lock, args,
+                            idx=idx, total=total, url=url, run_id=run_id,
+                            debug_root=debug_root,
+                        )
+                        for idx, url in pending
+                    ),
+                    return_exceptions=True,
+                )
+                for (idx, url), res in zip(pending, results):
+                    if isinstance(res, BaseException):
+                        print(f"[{idx}/{total}] [!] failed: {url}: {res}")
+            finally:
+                await ctx.close()
+
+
 def main() -> int:
     ap = argparse.ArgumentParser()
     ap.add_argument("--threads-file", default=DEFAULT_THREADS_FILE)
@@ -480,12 +870,20 @@ def main() -> int:
     ap.add_argument("--target", required=True)
     ap.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR)
     ap.add_argument("--headless", type=int, default=0)
+    ap.add_argument("--concurrency", type=int, default=2,
+                    help="Thread URLs processed at once (size of the reusable tab pool).")
 
     ap.add_argument("--max-expand-rounds", type=int, default=160)
     ap.add_argument("--stable-rounds", type=int, default=4)
     ap.add_argument("--expand-delay", type=float, default=1.0)
+    ap.add_argument("--per-url-budget-s", type=float, default=180.0,
+                    help="Wall-clock cap on expansion per URL; 0 disables.")
 
+    ap.add_argument("--block-media", type=int, default=1,
+                    help="Abort image/media/font requests (screenshots will lack images).")
     ap.add_argument("--dump-html", type=int, default=0)
+    ap.add_argument("--debug-screenshots", type=int, default=0,
+                    help="Save viewport JPEGs of the first expansion clicks.")
     ap.add_argument("--resume", type=int, default=1)
     ap.add_argument("--only-one", type=int, default=0)
     args = ap.parse_args()
@@ -503,81 +901,10 @@ def main() -> int:
         print("[!] No threads found.")
         return 2
 
-    done = set()
-    if args.resume and out_path.exists():
-        for line in out_path.read_text(encoding="utf-8", errors="ignore").splitlines():
-            try:
-                obj = json.loads(line)
-                if obj.get("url"):
-                    done.add(obj["url"])
-            except Exception:
-                pass
-
-    with sync_playwright() as p:
-        ctx = p.chromium.launch_persistent_context(
-            user_data_dir=args.profile_dir,
-            headless=bool(args.headless),
-            viewport={"width": 1280, "height": 900},
-            args=["--disable-notifications", "--no-sandbox"],
-        )
-        page = ctx.pages[0] if ctx.pages else ctx.new_page()
-
-        for idx, url in enumerate(threads, start=1):
-            if url in done:
-                print(f"[{idx}/{len(threads)}] skip (resume): {url}")
-                continue
-
-            th = short_hash(url)
-            tdir = debug_root / f"thread_{th}"
-            ensure_dir(tdir)
-
-            print(f"[{idx}/{len(threads)}] goto: {url}")
-            try:
-                page.goto(url, wait_until="domcontentloaded", timeout=60000)
-                page.wait_for_timeout(1500)
-            except PWTimeoutError:
-                print("  [!] timeout on goto")
-            except Exception as e:
-                print(f"  [!] goto error: {e}")
-
-            screenshot(page, tdir / "start.png")
-            if args.dump_html:
-                dump_html(page, tdir / "start.html")
-
-            exp = expand_until_stable(
-                page,
-                max_rounds=args.max_expand_rounds,
-                stable_rounds=args.stable_rounds,
-                delay_s=args.expand_delay,
-                debug_dir=tdir,
-            )
-
-            screenshot(page, tdir / "after_expand.png")
-            if args.dump_html:
-                dump_html(page, tdir / "after_expand.html")
-
-            raw_text = extract_modal_or_body_text(page)
-
-            hit = Hit(
-                url=url,
-                final_url=page.url,
-                ts_utc=now_utc_iso(),
-                target=args.target,
-                raw_container_text=raw_text,
-                evidence={
-                    "run_id": run_id,
-                    "thread_hash": th,
-                    "debug_dir": str(tdir),
-                    "expand": exp,
-                },
-            )
-            write_jsonl(out_path, hit.__dict__)
-            print(f"  wrote observation | clicks={exp['expand_clicks_total']} rounds={exp['expand_rounds']}")
-
-            if args.only_one:
-                break
+    done = load_done_urls(out_path) if args.resume else set()
 
-        ctx.close()
+    asyncio.run(run(args, threads=threads, done=done, run_id=run_id,
+                    debug_root=debug_root, out_path=out_path))
 
     print(f"\nDone. Wrote: {out_path}")
     return 0
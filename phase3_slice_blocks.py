@@ -1,470 +1,878 @@
-#!/usr/bin/env python3
-"""
-Phase 3: Slice Blocks (Offline)
-Parses after_expand.html from Phase 2 debug artifacts and extracts
-semantic blocks (role="article") into individual HTML files.
-
-Deterministic output:
-- Stable thread_id
-- Stable block ordering (DOM order)
-- Verified SHA256 content addressing
-- Deterministic candidate selection when multiple observations map to same thread
-
-Inputs:
-  --observations fb_extract_out/observations.jsonl
-Outputs:
-  --out fb_extract_out/phase3_blocks.jsonl
-  --blocks-dir fb_extract_out/blocks
-
-Governance invariants:
-- Preserve raw provenance paths (debug_dir_raw)
-- Emit only repo-relative operational paths in phase3 outputs (debug_dir, after_expand_path, html_relpath)
-- No re-scraping, no Playwright changes
-"""
-
-import argparse
-import hashlib
-import json
-import re
-import sys
-from pathlib import Path
-from typing import List, Dict, Optional, Any
-
-# Try to import BeautifulSoup
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
-
-# Try to import lxml for faster parsing if bs4 is present
-try:
-    import lxml  # noqa: F401
-    HAS_LXML = True
-except ImportError:
-    HAS_LXML = False
-
-
-REPO_ROOT = Path(__file__).resolve().parent
-
-
-def normalize_to_repo(path_str: str) -> Path:
-    """
-    Convert Windows, WSL, or absolute Linux paths into repo-relative Paths.
-    Deterministic. No IO.
-
-    Strategy:
-    - Normalize slashes
-    - If we can locate '/fb_extract_out/' segment, anchor from there
-    - If already starts with 'fb_extract_out/', accept as relative
-    """
-    if not path_str or not isinstance(path_str, str):
-        raise ValueError("empty path")
-
-    s = path_str.strip().replace("\\", "/")
-
-    if "/fb_extract_out/" in s:
-        rel = s.split("/fb_extract_out/", 1)[1]
-        return Path("fb_extract_out") / rel
-
-    if s.startswith("fb_extract_out/"):
-        return Path(s)
-
-    raise RuntimeError(f"Un-normalizable path: {path_str}")
-
-
-def parse_args():
-    parser = argparse.ArgumentParser(description="Slice HTML into blocks (offline phase 3)")
-    parser.add_argument(
-        "--observations",
-        type=str,
-        default="fb_extract_out/observations.jsonl",
-        help="Input observations JSONL file",
-    )
-    parser.add_argument(
-        "--out",
-        type=str,
-        default="fb_extract_out/phase3_blocks.jsonl",
-        help="Output blocks JSONL index file",
-    )
-    parser.add_argument(
-        "--blocks-dir",
-        type=str,
-        default="fb_extract_out/blocks",
-        help="Directory to save block HTML files",
-    )
-    return parser.parse_args()
-
-
-def calculate_sha256(content: bytes) -> str:
-    return hashlib.sha256(content).hexdigest()
-
-
-def calculate_sha16(content: bytes) -> str:
-    return hashlib.sha256(content).hexdigest()[:16]
-
-
-def resolve_debug_path(recorded_path: str, debug_root_local: Path) -> Optional[Path]:
-    """
-    Resolve the debug directory path by finding the 'run_<timestamp>' segment
-    and anchoring it to the local debug root.
-
-    We expect recorded_path to end with:
-      .../debug/run_.../thread_...
-    or just:
-      run_.../thread_...
-
-    Deterministic resolution:
-    - Find "run_.../thread_..." and join it to debug_root_local
-    - Fallback: if recorded_path exists as-is on this filesystem, use it
-    """
-    p_str = recorded_path.replace("\\", "/")
-
-    match = re.search(r"(run_[^/]+)/thread_[^/]+", p_str)
-    if match:
-        start_idx = match.start()
-        rel_path = p_str[start_idx:]
-        local_path = debug_root_local / rel_path
-        if local_path.exists():
-            return local_path
-
-    p = Path(recorded_path)
-    if p.exists():
-        return p
-
-    return None
-
-
-def extract_blocks_bs4(html_content: bytes) -> List[Dict[str, Any]]:
-    """Extract blocks using BeautifulSoup. Deterministic ordering (document order)."""
-    parser = "lxml" if HAS_LXML else "html.parser"
-    soup = BeautifulSoup(html_content, parser)
-
-    blocks: List[Dict[str, Any]] = []
-    articles = soup.find_all(attrs={"role": "article"})
-
-    for idx, tag in enumerate(articles):
-        outer_html = str(tag).encode("utf-8")
-        aria_label = (tag.get("aria-label", "") or "").strip()
-        text_content = tag.get_text(" ", strip=True)
-
-        blocks.append(
-            {
-                "index": idx,
-                "outer_html_bytes": outer_html,
-                "aria_label": aria_label,
-                "text_content": text_content,
-                "text_len": len(text_content),
-            }
-        )
-
-    return blocks
-
-
-def extract_blocks_regex(html_content: bytes) -> List[Dict[str, Any]]:
-    """
-    Fallback extraction using stack-based parsing when bs4/lxml are missing.
-    Finds <div ... role="article" ...> and extracts the full balanced tag.
-    Deterministic order: scan order in HTML.
-    """
-    if not HAS_BS4:
-        print("[WARN] Using STACK-BASED fallback for block extraction (bs4 is missing)", file=sys.stderr)
-
-    html = html_content.decode("utf-8", errors="replace")
-    blocks: List[Dict[str, Any]] = []
-
-    tag_start_re = re.compile(r"<div\s+[^>]*role=[\"']article[\"'][^>]*>", re.I)
-    div_tag_re = re.compile(r"(<div\b[^>]*>)|(</div>)", re.I)
-
-    block_starts = [m.start() for m in tag_start_re.finditer(html)]
-
-    for idx, start_pos in enumerate(block_starts):
-        depth = 0
-        end_pos = -1
-
-        for m in div_tag_re.finditer(html, pos=start_pos):
-            is_start = m.group(1) is not None
-            depth += 1 if is_start else -1
-            if depth == 0:
-                end_pos = m.end()
-                break
-
-        if end_pos != -1:
-            outer_html = html[start_pos:end_pos]
-            content_bytes = outer_html.encode("utf-8")
-
-            aria_match = re.search(r"aria-label=[\"']([^\"']*)[\"']", outer_html)
-            aria_label = aria_match.group(1) if aria_match else ""
-
-            text_only = re.sub(r"<[^>]+>", " ", outer_html)
-            text_content = re.sub(r"\s+", " ", text_only).strip()
-
-            blocks.append(
-                {
-                    "index": idx,
-                    "outer_html_bytes": content_bytes,
-                    "aria_label": aria_label,
-                    "text_content": text_content,
-                    "text_len": len(text_content),
-                }
-            )
-
-    return blocks
-
-
-def get_debug_dir_raw(rec: Dict[str, Any]) -> Optional[str]:
-    """
-    Robustly find the debug directory path from various schema locations.
-    Can derive from file paths in 'debug' dict.
-    """
-    ev = rec.get("evidence") or {}
-    debug_obj = rec.get("debug") or {}
-    ev_debug = (ev.get("debug") if isinstance(ev, dict) else {}) or {}
-
-    candidates = [
-        ev.get("debug_dir") if isinstance(ev, dict) else None,
-        rec.get("debug_dir"),
-        rec.get("thread_debug_dir"),
-        debug_obj.get("thread_dir") if isinstance(debug_obj, dict) else None,
-        debug_obj.get("debug_dir") if isinstance(debug_obj, dict) else None,
-        ev_debug.get("thread_dir"),
-        ev_debug.get("debug_dir"),
-    ]
-
-    for path in candidates:
-        if isinstance(path, str) and path.strip():
-            return path.strip()
-
-    if isinstance(debug_obj, dict):
-        for key in ["html", "screenshot", "after_expand", "start"]:
-            val = debug_obj.get(key)
-            if isinstance(val, str) and val.strip():
-                if "/" in val or "\\" in val:
-                    return str(Path(val).parent)
-
-    return None
-
-
-def get_thread_url(rec: Dict[str, Any]) -> str:
-    return (rec.get("thread_url") or rec.get("url") or rec.get("final_url") or "")
-
-
-def get_thread_id(rec: Dict[str, Any], thread_url: str) -> str:
-    """
-    Robustly find/derive thread_id.
-    """
-    ev = rec.get("evidence") or {}
-
-    if isinstance(ev, dict) and ev.get("thread_hash"):
-        return ev["thread_hash"]
-    if rec.get("thread_id"):
-        return rec["thread_id"]
-    if rec.get("thread_hash"):
-        return rec["thread_hash"]
-
-    if thread_url:
-        return calculate_sha16(thread_url.encode("utf-8"))
-
-    return "unknown_thread"
-
-
-def pick_best_candidate(cands: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
-    """
-    Deterministically pick the best observation candidate for a thread.
-
-    Preference (highest wins):
-      1) has after_expand.html
-      2) highest count of role="article" occurrences (proxy for completeness)
-      3) largest file size
-      4) tie-breaker: lexicographically greatest debug_dir_local path (newest run)
-    """
-    scored = []
-    for c in cands:
-        debug_dir_local: Path = c["debug_dir_local"]
-        html_path = debug_dir_local / "after_expand.html"
-        if not html_path.exists():
-            # has_after=0 => always loses
-            scored.append((0, 0, 0, str(debug_dir_local), c))
-            continue
-
-        try:
-            b = html_path.read_bytes()
-        except Exception:
-            scored.append((0, 0, 0, str(debug_dir_local), c))
-            continue
-
-        # Cheap deterministic completeness proxies
-        article_count = b.count(b'role="article"') + b.count(b"role='article'")
-        size = len(b)
-
-        scored.append((1, article_count, size, str(debug_dir_local), c))
-
-    # Sort by all keys descending (highest wins)
-    scored.sort(key=lambda t: (t[0], t[1], t[2], t[3]), reverse=True)
-
-    if not scored:
-        return None
-
-    best = scored[0][4]
-    if not (best["debug_dir_local"] / "after_expand.html").exists():
-        return None
-    return best
-
-def thread_id_from_dir(debug_dir_local: Path) -> Optional[str]:
-    name = debug_dir_local.name
-    thread_id = name.split("thread_", 1)[1] if name.startswith("thread_") else get_thread_id(rec, thread_url)
-    if name.startswith("thread_") and len(name) > 7:
-        return name.split("thread_", 1)[1]
-    return None
-
-def main() -> int:
-    args = parse_args()
-
-    obs_path = Path(args.observations).resolve()
-    if not obs_path.exists():
-        print(f"Observations file not found: {obs_path}", file=sys.stderr)
-        return 1
-
-    out_path = Path(args.out)
-    blocks_root = Path(args.blocks_dir)
-    blocks_root.mkdir(parents=True, exist_ok=True)
-
-    # Derived debug root: assume sibling 'debug' folder to observations.jsonl
-    debug_root_local = obs_path.parent / "debug"
-    if not debug_root_local.exists():
-        print(f"[WARN] Local debug root not found at expected: {debug_root_local}", file=sys.stderr)
-
-    stats = {
-        "total_lines": 0,
-        "json_parsed": 0,
-        "skipped_no_debug_dir": 0,
-        "skipped_debug_dir_missing": 0,
-        "skipped_after_expand_missing": 0,
-        "processed_threads": 0,
-        "total_blocks": 0,
-    }
-
-    # Pass 1: group candidates by thread_id
-    grouped: Dict[str, List[Dict[str, Any]]] = {}
-    with obs_path.open("r", encoding="utf-8") as f_in:
-        for line in f_in:
-            stats["total_lines"] += 1
-            line = line.strip()
-            if not line:
-                continue
-
-            try:
-                rec = json.loads(line)
-                stats["json_parsed"] += 1
-            except json.JSONDecodeError:
-                continue
-
-            debug_dir_raw = get_debug_dir_raw(rec)
-            if not debug_dir_raw:
-                stats["skipped_no_debug_dir"] += 1
-                continue
-
-            debug_dir_local = resolve_debug_path(debug_dir_raw, debug_root_local)
-            if not debug_dir_local or not debug_dir_local.exists():
-                stats["skipped_debug_dir_missing"] += 1
-                continue
-            
-            thread_url = get_thread_url(rec)
-            thread_id = thread_id_from_dir(debug_dir_local) or get_thread_id(rec, thread_url)
-
-            grouped.setdefault(thread_id, []).append(
-                {
-                    "rec": rec,
-                    "thread_url": thread_url,
-                    "thread_id": thread_id,
-                    "debug_dir_raw": debug_dir_raw,
-                    "debug_dir_local": debug_dir_local,
-                }
-            )
-
-    # Pass 2: pick best candidate per thread and write output
-    with out_path.open("w", encoding="utf-8") as f_out:
-        for thread_id in sorted(grouped.keys()):
-            best = pick_best_candidate(grouped[thread_id])
-            if best is None:
-                stats["skipped_after_expand_missing"] += 1
-                continue
-
-            thread_url: str = best["thread_url"]
-            debug_dir_raw: str = best["debug_dir_raw"]
-            debug_dir_local: Path = best["debug_dir_local"]
-
-            # Normalize to repo-relative for portable output
-            debug_dir_rel = normalize_to_repo(str(debug_dir_local))
-            html_path_local = debug_dir_local / "after_expand.html"
-            html_path_rel = debug_dir_rel / "after_expand.html"
-
-            # Read HTML
-            try:
-                html_bytes = html_path_local.read_bytes()
-            except Exception as e:
-                print(f"[ERR] Failed to read {html_path_local}: {e}", file=sys.stderr)
-                continue
-
-            html_sha256 = calculate_sha256(html_bytes)
-
-            # Extract blocks
-            if HAS_BS4:
-                blocks_data = extract_blocks_bs4(html_bytes)
-            else:
-                blocks_data = extract_blocks_regex(html_bytes)
-
-            # Save per-thread blocks
-            t_dir = blocks_root / thread_id
-            t_dir.mkdir(exist_ok=True)
-
-            thread_blocks = []
-            for b in blocks_data:
-                idx = b["index"]
-                content = b["outer_html_bytes"]
-
-                file_path = t_dir / f"block_{idx:03d}.html"
-                file_path.write_bytes(content)
-
-                thread_blocks.append(
-                    {
-                        "i": idx,
-                        "sha16": calculate_sha16(content),
-                        "aria_label": b["aria_label"],
-                        "text_len": b["text_len"],
-                        "html_relpath": file_path.resolve().relative_to(REPO_ROOT).as_posix(),
-                    }
-                )
-
-            out_rec = {
-                "thread_url": thread_url,
-                "thread_id": thread_id,
-
-                # RAW FORENSIC (never consumed downstream)
-                "debug_dir_raw": debug_dir_raw,
-
-                # PORTABLE OPERATIONAL (repo-relative)
-                "debug_dir": debug_dir_rel.as_posix(),
-                "after_expand_path": html_path_rel.as_posix(),
-
-                "after_expand_sha256": html_sha256,
-                "block_count": len(thread_blocks),
-                "blocks": thread_blocks,
-            }
-
-            f_out.write(json.dumps(out_rec) + "\n")
-            f_out.flush()
-
-            stats["processed_threads"] += 1
-            stats["total_blocks"] += len(thread_blocks)
-
-    print("--- Phase 3 Slicing Summary ---")
-    for k, v in stats.items():
-        print(f"{k}: {v}")
-    print(f"Index written to: {out_path}")
-
-    return 0
-
-
-if __name__ == "__main__":
+#!/usr/bin/env python3
+"""
+Phase 3: Slice Blocks (Offline)
+Parses after_expand.html from Phase 2 debug artifacts and extracts
+semantic blocks (role="article") into individual HTML files.
+
+Deterministic output:
+- Stable thread_id
+- Stable block ordering (DOM order)
+- Verified SHA256 content addressing
+- Deterministic candidate selection when multiple observations map to same thread
+
+Inputs:
+  --observations fb_extract_out/observations.jsonl
+Outputs:
+  --out fb_extract_out/phase3_blocks.jsonl
+  --blocks-dir fb_extract_out/blocks
+
+Governance invariants:
+- Preserve raw provenance paths (debug_dir_raw)
+- Emit only repo-relative operational paths in phase3 outputs (debug_dir, after_expand_path, html_relpath)
+- No re-scraping, no Playwright changes
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Dict, Optional, Any
+
+# Primary parser: lxml directly (whole extraction stays in C)
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Optional faster JSON (stdlib fallback)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Optional faster content hash (--hash-algo blake3)
+try:
+    import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
+
+# Optional non-cryptographic block ids (--block-id-algo xxh3)
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+# Fallback parser when lxml is unavailable
+try:
+    from bs4 import BeautifulSoup
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+
+if HAS_ORJSON:
+    json_loads = orjson.loads
+
+    def json_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    json_loads = json.loads
+
+    def json_line(obj: Any) -> bytes:
+        return (json.dumps(obj) + "\n").encode("utf-8")
+
+
+def normalize_to_repo(path_str: str) -> Path:
+    """
+    Convert Windows, WSL, or absolute Linux paths into repo-relative Paths.
+    Deterministic. No IO.
+
+    Strategy:
+    - Normalize slashes
+    - If we can locate '/fb_extract_out/' segment, anchor from there
+    - If already starts with 'fb_extract_out/', accept as relative
+    """
+    if not path_str or not isinstance(path_str, str):
+        raise ValueError("empty path")
+
+    s = path_str.strip().replace("\\", "/")
+
+    if "/fb_extract_out/" in s:
+        rel = s.split("/fb_extract_out/", 1)[1]
+        return Path("fb_extract_out") / rel
+
+    if s.startswith("fb_extract_out/"):
+        return Path(s)
+
+    raise RuntimeError(f"Un-normalizable path: {path_str}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Slice HTML into blocks (offline phase 3)")
+    parser.add_argument(
+        "--observations",
+        type=str,
+        default="fb_extract_out/observations.jsonl",
+        help="Input observations JSONL file",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default="fb_extract_out/phase3_blocks.jsonl",
+        help="Output blocks JSONL index file",
+    )
+    parser.add_argument(
+        "--blocks-dir",
+        type=str,
+        default="fb_extract_out/blocks",
+        help="Directory to save block HTML files",
+    )
+    parser.add_argument(
+        "--blocks-layout",
+        choices=["files", "packed"],
+        default="files",
+        help="files: one block_NNN.html per block; packed: one blocks.bin per thread "
+             "with per-block offset/length in the index",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Worker processes for slicing (0 = CPU count, 1 = in-process)",
+    )
+    parser.add_argument(
+        "--hash-algo",
+        choices=["sha256", "blake3"],
+        default="sha256",
+        help="Content hash for after_expand/blocks (blake3 needs the blake3 package; "
+             "sha256 keeps hashes comparable with earlier runs)",
+    )
+    parser.add_argument(
+        "--block-id-algo",
+        choices=["auto", "xxh3"],
+        default="auto",
+        help="Hash behind each block's sha16 id (auto = same as --hash-algo; "
+             "xxh3 = xxh3_64 hex, needs the xxhash package, ids not comparable with sha256 runs)",
+    )
+    return parser.parse_args()
+
+
+HASH_CHUNK = 256 * 1024
+PACKED_BLOCKS_NAME = "blocks.bin"
+
+
+def _new_hasher(algo: str):
+    if algo == "blake3":
+        return blake3.blake3()
+    return hashlib.sha256()
+
+
+def content_hash(content, algo: str = "sha256") -> str:
+    """
+    Hex digest of a bytes-like buffer, fed in 256 KB zero-copy windows
+    (works the same for bytes and mmap).
+    """
+    h = _new_hasher(algo)
+    with memoryview(content) as view:
+        for i in range(0, len(view), HASH_CHUNK):
+            h.update(view[i:i + HASH_CHUNK])
+    return h.hexdigest()
+
+
+def calculate_sha256(content) -> str:
+    return content_hash(content, "sha256")
+
+
+def calculate_sha16(content: bytes, algo: str = "sha256") -> str:
+    if algo == "xxh3":
+        # 64-bit digest is already 16 hex chars
+        return xxhash.xxh3_64_hexdigest(content)
+    return content_hash(content, algo)[:16]
+
+
+_RUN_THREAD_RE = re.compile(r"(run_[^/]+)/thread_[^/]+")
+
+
+@lru_cache(maxsize=8192)
+def _path_exists(path_str: str) -> bool:
+    """Memoized stat: many observations point at the same debug dir."""
+    return os.path.exists(path_str)
+
+
+def resolve_debug_path(recorded_path: str, debug_root_local: Path) -> Optional[Path]:
+    """
+    Resolve the debug directory path by finding the 'run_<timestamp>' segment
+    and anchoring it to the local debug root.
+
+    We expect recorded_path to end with:
+      .../debug/run_.../thread_...
+    or just:
+      run_.../thread_...
+
+    Deterministic resolution:
+    - Find "run_.../thread_..." and join it to debug_root_local
+    - Fallback: if recorded_path exists as-is on this filesystem, use it
+    """
+    p_str = recorded_path.replace("\\", "/")
+
+    match = _RUN_THREAD_RE.search(p_str)
+    if match:
+        start_idx = match.start()
+        rel_path = p_str[start_idx:]
+        local_path = debug_root_local / rel_path
+        if _path_exists(str(local_path)):
+            return local_path
+
+    p = Path(recorded_path)
+    if _path_exists(recorded_path):
+        return p
+
+    return None
+
+
+if HAS_LXML:
+    _TEXT_XPATH = etree.XPath(".//text()", smart_strings=False)
+
+
+def _lxml_text_len(tag) -> int:
+    """len() of bs4 get_text(" ", strip=True) without building the joined string."""
+    n_parts = 0
+    text_len = 0
+    for s in _TEXT_XPATH(tag):
+        t_len = len(s.strip())
+        if t_len:
+            n_parts += 1
+            text_len += t_len
+    if n_parts > 1:
+        text_len += n_parts - 1
+    return text_len
+
+
+def extract_blocks_lxml(html_content) -> List[Dict[str, Any]]:
+    """
+    Extract blocks with lxml's pull parser. Deterministic ordering (document order).
+    Input (bytes or an mmap) is fed in HASH_CHUNK windows; finished subtrees outside
+    any article are cleared as we go, so peak memory tracks the largest article
+    rather than the whole document.
+    """
+    # Dumps may be bare dialog subtrees without a <meta charset>; don't let libxml2 guess latin-1.
+    parser = etree.HTMLPullParser(events=("start", "end"), encoding="utf-8")
+    # idx assigned at start so nested articles keep document order; filled at end
+    slots: List[Optional[Dict[str, Any]]] = []
+    open_idx: List[int] = []
+
+    def drain() -> None:
+        for event, el in parser.read_events():
+            is_article = el.get("role") == "article"
+            if event == "start":
+                if is_article:
+                    open_idx.append(len(slots))
+                    slots.append(None)
+                continue
+            if is_article:
+                slots[open_idx.pop()] = {
+                    "outer_html_bytes": etree.tostring(el, encoding="utf-8", method="html", with_tail=False),
+                    "aria_label": (el.get("aria-label", "") or "").strip(),
+                    "text_len": _lxml_text_len(el),
+                }
+            if not open_idx:
+                # Nothing inside an open article: drop this subtree and its finished siblings
+                el.clear(keep_tail=True)
+                parent = el.getparent()
+                if parent is not None:
+                    while el.getprevious() is not None:
+                        del parent[0]
+
+    try:
+        for i in range(0, len(html_content), HASH_CHUNK):
+            parser.feed(html_content[i:i + HASH_CHUNK])
+            drain()
+        parser.close()
+        drain()
+    except (etree.ParserError, etree.XMLSyntaxError, ValueError):
+        pass
+
+    return [{"index": idx, **b} for idx, b in enumerate(b for b in slots if b is not None)]
+
+
+def extract_blocks_bs4(html_content: bytes) -> List[Dict[str, Any]]:
+    """Extract blocks using BeautifulSoup (fallback when lxml is missing)."""
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    blocks: List[Dict[str, Any]] = []
+    articles = soup.find_all(attrs={"role": "article"})
+
+    for idx, tag in enumerate(articles):
+        outer_html = str(tag).encode("utf-8")
+        aria_label = (tag.get("aria-label", "") or "").strip()
+        text_len = len(tag.get_text(" ", strip=True))
+
+        blocks.append(
+            {
+                "index": idx,
+                "outer_html_bytes": outer_html,
+                "aria_label": aria_label,
+                "text_len": text_len,
+            }
+        )
+
+    return blocks
+
+
+_ROLE_ARTICLE_NEEDLES = (b'role="article"', b"role='article'")
+_DIV_TAG_RE = re.compile(rb"(<div\b[^>]*>)|(</div>)", re.I)
+_ARIA_LABEL_RE = re.compile(r"aria-label=[\"']([^\"']*)[\"']")
+# Tags -> space then whitespace-collapse, fused: any run of tags/whitespace -> one space
+_TAG_OR_WS_RUN_RE = re.compile(r"(?:<[^>]+>|\s)+")
+
+
+def extract_blocks_regex(html_content: bytes) -> List[Dict[str, Any]]:
+    """
+    Fallback extraction using stack-based parsing when bs4/lxml are missing.
+    Finds <div ... role="article" ...> and extracts the full balanced tag.
+    Deterministic order: scan order in HTML.
+    """
+    if not (HAS_LXML or HAS_BS4):
+        print("[WARN] Using STACK-BASED fallback for block extraction (lxml and bs4 are missing)", file=sys.stderr)
+
+    blocks: List[Dict[str, Any]] = []
+
+    # Article opens: find role="article" in a lowercased copy, then step back to
+    # the enclosing <div (no '>' in between means we are still inside that tag).
+    lowered = html_content.lower()
+    article_open_pos = set()
+    for needle in _ROLE_ARTICLE_NEEDLES:
+        pos = 0
+        while (i := lowered.find(needle, pos)) != -1:
+            j = lowered.rfind(b"<div", 0, i)
+            if j != -1 and lowered.find(b">", j, i) == -1:
+                article_open_pos.add(j)
+            pos = i + len(needle)
+    if not article_open_pos:
+        return blocks
+
+    # Single pass over all <div>/</div> tokens (bytes, no whole-document decode)
+    # with a stack of open divs: each article's end is found when its own open
+    # tag is popped (O(n) total).
+    article_ends: Dict[int, int] = {}
+    article_starts: List[int] = []
+    stack: List[Any] = []  # (start_pos, is_article)
+    for m in _DIV_TAG_RE.finditer(html_content):
+        if m.group(1) is not None:
+            is_article = m.start() in article_open_pos
+            if is_article:
+                article_starts.append(m.start())
+            stack.append((m.start(), is_article))
+        elif stack:
+            start_pos, is_article = stack.pop()
+            if is_article:
+                article_ends[start_pos] = m.end()
+
+    for idx, start_pos in enumerate(article_starts):
+        end_pos = article_ends.get(start_pos, -1)
+
+        if end_pos != -1:
+            content_bytes = html_content[start_pos:end_pos]
+            outer_html = content_bytes.decode("utf-8", errors="replace")
+
+            aria_match = _ARIA_LABEL_RE.search(outer_html)
+            aria_label = aria_match.group(1) if aria_match else ""
+
+            text_len = len(_TAG_OR_WS_RUN_RE.sub(" ", outer_html).strip())
+
+            blocks.append(
+                {
+                    "index": idx,
+                    "outer_html_bytes": content_bytes,
+                    "aria_label": aria_label,
+                    "text_len": text_len,
+                }
+            )
+
+    return blocks
+
+
+def get_debug_dir_raw(rec: Dict[str, Any]) -> Optional[str]:
+    """
+    Robustly find the debug directory path from various schema locations.
+    Can derive from file paths in 'debug' dict.
+    """
+    ev = rec.get("evidence") or {}
+    debug_obj = rec.get("debug") or {}
+    ev_debug = (ev.get("debug") if isinstance(ev, dict) else {}) or {}
+
+    candidates = [
+        ev.get("debug_dir") if isinstance(ev, dict) else None,
+        rec.get("debug_dir"),
+        rec.get("thread_debug_dir"),
+        debug_obj.get("thread_dir") if isinstance(debug_obj, dict) else None,
+        debug_obj.get("debug_dir") if isinstance(debug_obj, dict) else None,
+        ev_debug.get("thread_dir"),
+        ev_debug.get("debug_dir"),
+    ]
+
+    for path in candidates:
+        if isinstance(path, str) and path.strip():
+            return path.strip()
+
+    if isinstance(debug_obj, dict):
+        for key in ["html", "screenshot", "after_expand", "start"]:
+            val = debug_obj.get(key)
+            if isinstance(val, str) and val.strip():
+                if "/" in val or "\\" in val:
+                    return str(Path(val).parent)
+
+    return None
+
+
+def get_thread_url(rec: Dict[str, Any]) -> str:
+    return (rec.get("thread_url") or rec.get("url") or rec.get("final_url") or "")
+
+
+def get_thread_id(rec: Dict[str, Any], thread_url: str) -> str:
+    """
+    Robustly find/derive thread_id.
+    """
+    ev = rec.get("evidence") or {}
+
+    if isinstance(ev, dict) and ev.get("thread_hash"):
+        return ev["thread_hash"]
+    if rec.get("thread_id"):
+        return rec["thread_id"]
+    if rec.get("thread_hash"):
+        return rec["thread_hash"]
+
+    if thread_url:
+        return calculate_sha16(thread_url.encode("utf-8"))
+
+    return "unknown_thread"
+
+
+def count_article_roles(buf: bytes) -> int:
+    """
+    Occurrences of role="article" / role='article'. Two bytes.count passes beat
+    a single-pass regex or automaton here: each is a C fast-search with no
+    per-match Python work.
+    """
+    return sum(buf.count(n) for n in _ROLE_ARTICLE_NEEDLES)
+
+
+def pick_best_candidate(cands: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Deterministically pick the best observation candidate for a thread.
+
+    Preference (highest wins):
+      1) has after_expand.html
+      2) highest count of role="article" occurrences (proxy for completeness)
+      3) largest file size
+      4) tie-breaker: lexicographically greatest debug_dir_local path (newest run)
+    """
+    if len(cands) == 1:
+        # Nothing to rank: skip reading the file here (the worker reads it once).
+        only = cands[0]
+        return only if (only["debug_dir_local"] / "after_expand.html").exists() else None
+
+    scored = []
+    for c in cands:
+        debug_dir_local: Path = c["debug_dir_local"]
+        html_path = debug_dir_local / "after_expand.html"
+        if not html_path.exists():
+            # has_after=0 => always loses
+            scored.append((0, 0, 0, str(debug_dir_local), c))
+            continue
+
+        try:
+            b = html_path.read_bytes()
+        except Exception:
+            scored.append((0, 0, 0, str(debug_dir_local), c))
+            continue
+
+        # Cheap deterministic completeness proxies
+        article_count = count_article_roles(b)
+        size = len(b)
+
+        scored.append((1, article_count, size, str(debug_dir_local), c))
+
+    # Sort by all keys descending (highest wins)
+    scored.sort(key=lambda t: (t[0], t[1], t[2], t[3]), reverse=True)
+
+    if not scored:
+        return None
+
+    best = scored[0][4]
+    if not (best["debug_dir_local"] / "after_expand.html").exists():
+        return None
+    return best
+
+def thread_id_from_dir(debug_dir_local: Path) -> Optional[str]:
+    name = debug_dir_local.name
+    thread_id = name.split("thread_", 1)[1] if name.startswith("thread_") else get_thread_id(rec, thread_url)
+    if name.startswith("thread_") and len(name) > 7:
+        return name.split("thread_", 1)[1]
+    return None
+
+PARALLEL_SCAN_MIN_BYTES = 8 * 1024 * 1024
+
+
+def scan_observation_range(job) -> Any:
+    """
+    Parse observation lines that *start* in [start, end) and resolve their debug dirs.
+    Returns (stats_delta, candidates) in file order; safe to run in a worker process.
+    """
+    obs_path, start, end, debug_root_str = job
+    debug_root_local = Path(debug_root_str)
+    stats = {
+        "total_lines": 0,
+        "json_parsed": 0,
+        "skipped_no_debug_dir": 0,
+        "skipped_debug_dir_missing": 0,
+    }
+    cands: List[Dict[str, Any]] = []
+
+    with open(obs_path, "rb") as f_in:
+        if start > 0:
+            # A line straddling `start` belongs to the previous range
+            f_in.seek(start - 1)
+            if f_in.read(1) != b"\n":
+                f_in.readline()
+        pos = f_in.tell()
+        while pos < end:
+            line = f_in.readline()
+            if not line:
+                break
+            pos += len(line)
+
+            stats["total_lines"] += 1
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                rec = json_loads(line)
+                stats["json_parsed"] += 1
+            except json.JSONDecodeError:
+                continue
+
+            debug_dir_raw = get_debug_dir_raw(rec)
+            if not debug_dir_raw:
+                stats["skipped_no_debug_dir"] += 1
+                continue
+
+            debug_dir_local = resolve_debug_path(debug_dir_raw, debug_root_local)
+            if not debug_dir_local or not _path_exists(str(debug_dir_local)):
+                stats["skipped_debug_dir_missing"] += 1
+                continue
+
+            thread_url = get_thread_url(rec)
+            thread_id = thread_id_from_dir(debug_dir_local) or get_thread_id(rec, thread_url)
+
+            cands.append(
+                {
+                    "rec": rec,
+                    "thread_url": thread_url,
+                    "thread_id": thread_id,
+                    "debug_dir_raw": debug_dir_raw,
+                    "debug_dir_local": debug_dir_local,
+                }
+            )
+
+    return stats, cands
+
+
+def extract_blocks(html_content) -> List[Dict[str, Any]]:
+    """Dispatch to the best available extractor; accepts bytes or an mmap."""
+    if HAS_LXML:
+        return extract_blocks_lxml(html_content)
+    if not isinstance(html_content, bytes):
+        html_content = html_content[:]
+    if HAS_BS4:
+        return extract_blocks_bs4(html_content)
+    return extract_blocks_regex(html_content)
+
+
+# Per-worker cache of already-sliced HTML: (hash, algo, packed) -> (blocks dir, block records).
+# Retries and repeated runs often capture byte-identical after_expand.html.
+PARSE_CACHE_MAX = 256
+_PARSE_CACHE: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+
+def _parse_cache_get(key: tuple) -> Optional[tuple]:
+    hit = _PARSE_CACHE.get(key)
+    if hit is not None:
+        _PARSE_CACHE.move_to_end(key)
+    return hit
+
+
+def _parse_cache_put(key: tuple, t_dir: Path, thread_blocks: List[Dict[str, Any]]) -> None:
+    _PARSE_CACHE[key] = (t_dir, [{k: v for k, v in b.items() if k != "html_relpath"} for b in thread_blocks])
+    if len(_PARSE_CACHE) > PARSE_CACHE_MAX:
+        _PARSE_CACHE.popitem(last=False)
+
+
+def link_or_copy(src: Path, dst: Path) -> None:
+    """Hardlink src to dst (replacing dst); copy bytes where links are unsupported."""
+    if dst.exists() or dst.is_symlink():
+        if dst.samefile(src):
+            return
+        dst.unlink()
+    try:
+        os.link(src, dst)
+    except OSError:
+        dst.write_bytes(src.read_bytes())
+
+
+def process_thread(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Slice one thread's after_expand.html and write its block files.
+    Self-contained (plain-str job in, out_rec out) so it can run in a worker process.
+    """
+    thread_id: str = job["thread_id"]
+    hash_algo: str = job["hash_algo"]
+    block_id_algo: str = job["block_id_algo"]
+    debug_dir_local = Path(job["debug_dir_local"])
+
+    # Normalize to repo-relative for portable output
+    debug_dir_rel = normalize_to_repo(str(debug_dir_local))
+    html_path_local = debug_dir_local / "after_expand.html"
+    html_path_rel = debug_dir_rel / "after_expand.html"
+
+    packed = job.get("blocks_layout") == "packed"
+
+    # Map HTML read-only: hash and lxml parse both walk the mapping in windows
+    cached = None
+    try:
+        with html_path_local.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                html_hash = content_hash(b"", hash_algo)
+                blocks_data = extract_blocks(b"")
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    html_hash = content_hash(mm, hash_algo)
+                    cached = _parse_cache_get((html_hash, hash_algo, packed))
+                    blocks_data = extract_blocks(mm) if cached is None else []
+    except Exception as e:
+        print(f"[ERR] Failed to read {html_path_local}: {e}", file=sys.stderr)
+        return None
+
+    # Save per-thread blocks
+    t_dir = Path(job["blocks_root"]) / thread_id
+    t_dir.mkdir(exist_ok=True)
+    rel_dir = f"{job['blocks_rel']}/{thread_id}"
+
+    container_path = t_dir / PACKED_BLOCKS_NAME
+    container_relpath = f"{rel_dir}/{PACKED_BLOCKS_NAME}" if packed else None
+
+    if cached is not None:
+        # Identical HTML already sliced in this worker: link its block files
+        src_dir, cached_blocks = cached
+        thread_blocks = []
+        try:
+            if packed:
+                link_or_copy(src_dir / PACKED_BLOCKS_NAME, container_path)
+            for c in cached_blocks:
+                rec = dict(c)
+                if packed:
+                    rec["html_relpath"] = container_relpath
+                else:
+                    name = f"block_{c['i']:03d}.html"
+                    link_or_copy(src_dir / name, t_dir / name)
+                    rec["html_relpath"] = f"{rel_dir}/{name}"
+                thread_blocks.append(rec)
+        except OSError:
+            # Source blocks gone (e.g. removed mid-run): fall back to a fresh parse
+            cached = None
+            blocks_data = extract_blocks(html_path_local.read_bytes())
+
+    if cached is None:
+        thread_blocks = _write_blocks(blocks_data, t_dir, rel_dir, container_path, container_relpath, packed, block_id_algo)
+        _parse_cache_put((html_hash, hash_algo, packed), t_dir, thread_blocks)
+
+    return {
+        "thread_url": job["thread_url"],
+        "thread_id": thread_id,
+
+        # RAW FORENSIC (never consumed downstream)
+        "debug_dir_raw": job["debug_dir_raw"],
+
+        # PORTABLE OPERATIONAL (repo-relative)
+        "debug_dir": debug_dir_rel.as_posix(),
+        "after_expand_path": html_path_rel.as_posix(),
+
+        # after_expand_sha256 kept for downstream readers; None under blake3
+        "after_expand_sha256": html_hash if hash_algo == "sha256" else None,
+        "after_expand_hash": html_hash,
+        "hash_algo": hash_algo,
+        # sha16 of each block below is the first 16 hex of this hash (xxh3: the full xxh3_64)
+        "block_id_algo": block_id_algo,
+        "block_count": len(thread_blocks),
+        "blocks_container": container_relpath,
+        "blocks": thread_blocks,
+    }
+
+
+def _write_blocks(
+    blocks_data: List[Dict[str, Any]],
+    t_dir: Path,
+    rel_dir: str,
+    container_path: Path,
+    container_relpath: Optional[str],
+    packed: bool,
+    block_id_algo: str,
+) -> List[Dict[str, Any]]:
+    """Write one thread's blocks (per-block files or one packed container) and return their records."""
+    thread_blocks = []
+    chunks: List[bytes] = []
+    offset = 0
+    for b in blocks_data:
+        idx = b["index"]
+        content = b["outer_html_bytes"]
+
+        rec = {
+            "i": idx,
+            "sha16": calculate_sha16(content, block_id_algo),
+            "aria_label": b["aria_label"],
+            "text_len": b["text_len"],
+        }
+        if packed:
+            # One container per thread; block = bytes [offset, offset+length)
+            chunks.append(content)
+            rec["html_relpath"] = container_relpath
+            rec["offset"] = offset
+            rec["length"] = len(content)
+            offset += len(content)
+        else:
+            name = f"block_{idx:03d}.html"
+            file_path = t_dir / name
+            file_path.unlink(missing_ok=True)  # may be a hardlink shared with another thread
+            file_path.write_bytes(content)
+            rec["html_relpath"] = f"{rel_dir}/{name}"
+
+        thread_blocks.append(rec)
+
+    if packed:
+        container_path.unlink(missing_ok=True)
+        with container_path.open("wb") as g:
+            g.writelines(chunks)
+
+    return thread_blocks
+
+
+def main() -> int:
+    args = parse_args()
+
+    obs_path = Path(args.observations).resolve()
+    if not obs_path.exists():
+        print(f"Observations file not found: {obs_path}", file=sys.stderr)
+        return 1
+
+    hash_algo = args.hash_algo
+    if hash_algo == "blake3" and not HAS_BLAKE3:
+        print("--hash-algo blake3 requires the blake3 package (pip install blake3)", file=sys.stderr)
+        return 1
+    block_id_algo = hash_algo if args.block_id_algo == "auto" else args.block_id_algo
+    if block_id_algo == "xxh3" and not HAS_XXHASH:
+        print("--block-id-algo xxh3 requires the xxhash package (pip install xxhash)", file=sys.stderr)
+        return 1
+
+    out_path = Path(args.out)
+    blocks_root = Path(args.blocks_dir)
+    blocks_root.mkdir(parents=True, exist_ok=True)
+    # html_relpath is built by string formatting below; resolve the repo-relative root once
+    try:
+        blocks_rel = blocks_root.resolve().relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        print(f"[ERR] --blocks-dir must be inside the repo ({REPO_ROOT}): {blocks_root}", file=sys.stderr)
+        return 1
+
+    # Derived debug root: assume sibling 'debug' folder to observations.jsonl
+    debug_root_local = obs_path.parent / "debug"
+    if not debug_root_local.exists():
+        print(f"[WARN] Local debug root not found at expected: {debug_root_local}", file=sys.stderr)
+
+    stats = {
+        "total_lines": 0,
+        "json_parsed": 0,
+        "skipped_no_debug_dir": 0,
+        "skipped_debug_dir_missing": 0,
+        "skipped_after_expand_missing": 0,
+        "processed_threads": 0,
+        "total_blocks": 0,
+    }
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+
+    # Pass 1: group candidates by thread_id (byte-range chunks in parallel for big inputs)
+    size = obs_path.stat().st_size
+    n_chunks = workers if (workers > 1 and size >= PARALLEL_SCAN_MIN_BYTES) else 1
+    bounds = [size * i // n_chunks for i in range(n_chunks + 1)]
+    scan_jobs = [(str(obs_path), bounds[i], bounds[i + 1], str(debug_root_local)) for i in range(n_chunks)]
+    if n_chunks == 1:
+        scanned = map(scan_observation_range, scan_jobs)
+    else:
+        with ProcessPoolExecutor(max_workers=n_chunks) as pool:
+            scanned = list(pool.map(scan_observation_range, scan_jobs))
+
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    # Chunks come back in file order, so candidate order matches a serial scan
+    for chunk_stats, cands in scanned:
+        for k, v in chunk_stats.items():
+            stats[k] += v
+        for cand in cands:
+            grouped.setdefault(cand["thread_id"], []).append(cand)
+
+    # Pass 2: pick best candidate per thread, then slice threads in parallel
+    jobs: List[Dict[str, Any]] = []
+    for thread_id in sorted(grouped.keys()):
+        best = pick_best_candidate(grouped[thread_id])
+        if best is None:
+            stats["skipped_after_expand_missing"] += 1
+            continue
+        jobs.append(
+            {
+                "thread_id": thread_id,
+                "thread_url": best["thread_url"],
+                "debug_dir_raw": best["debug_dir_raw"],
+                "debug_dir_local": str(best["debug_dir_local"]),
+                "blocks_root": str(blocks_root),
+                "blocks_rel": blocks_rel,
+                "hash_algo": hash_algo,
+                "block_id_algo": block_id_algo,
+                "blocks_layout": args.blocks_layout,
+            }
+        )
+
+    # Index is regenerated whole each run: large buffer, no per-record flush
+    with out_path.open("wb", buffering=1 << 20) as f_out:
+        if workers <= 1 or len(jobs) <= 1:
+            results = map(process_thread, jobs)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(process_thread, jobs, chunksize=8)
+        try:
+            # map() preserves job order, so output stays sorted by thread_id
+            for out_rec in results:
+                if out_rec is None:
+                    continue
+                f_out.write(json_line(out_rec))
+
+                stats["processed_threads"] += 1
+                stats["total_blocks"] += out_rec["block_count"]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    print("--- Phase 3 Slicing Summary ---")
+    for k, v in stats.items():
+        print(f"{k}: {v}")
+    print(f"Index written to: {out_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
     raise SystemExit(main())
\ No newline at end of file
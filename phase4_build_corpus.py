@@ -5,9 +5,103 @@
 
 import argparse
 import json
+import os
+import re
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from bs4 import BeautifulSoup
+
+# Primary parser: lxml directly with precompiled XPath (whole selection stays in C)
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# Fallback parser when lxml is unavailable
+try:
+    import soupsieve as sv
+    from bs4 import BeautifulSoup, SoupStrainer
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+# Optional faster JSON (stdlib fallback)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    json_loads = orjson.loads
+
+    def json_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    json_loads = json.loads
+
+    def json_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+LOADING_MARKER = b'aria-label="Loading..."'
+ROLE_ARTICLE_NEEDLES = (b'role="article"', b"role='article'")
+
+# Every query run on a parsed block: name -> (XPath for lxml, CSS for bs4)
+_QUERIES = {
+    "article": ('.//*[@role="article"]', '[role="article"]'),
+    "article_labeled": ('.//div[@role="article" and @aria-label]', 'div[role="article"][aria-label]'),
+    "dir_auto": ('.//div[@dir="auto"]', 'div[dir="auto"]'),
+    "text_start": ('.//div[@dir="auto" and contains(@style, "text-align:start")]', 'div[dir="auto"][style*="text-align:start"]'),
+    "status": ('.//*[@role="status"]', '[role="status"]'),
+    "loading": ('.//*[@aria-label="Loading..."]', '[aria-label="Loading..."]'),
+}
+
+# Compiled once per process
+if HAS_LXML:
+    _SELECT = {name: etree.XPath(xp) for name, (xp, _css) in _QUERIES.items()}
+    # Blocks are bare fragments without a <meta charset>; don't let libxml2 guess latin-1.
+    _LXML_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+    # Outermost dir=auto divs under a node: no other dir=auto div between them and the node
+    _XP_DIR_AUTO_DEPTH = etree.XPath('count(ancestor-or-self::div[@dir="auto"])')
+    _XP_OUTER_DIR_AUTO = etree.XPath('.//div[@dir="auto"][count(ancestor::div[@dir="auto"]) = $depth]')
+elif HAS_BS4:
+    _SELECT = {name: sv.compile(css).select for name, (_xp, css) in _QUERIES.items()}
+    _SEL_OUTER_DIR_AUTO = sv.compile(':scope div[dir="auto"]:not(:scope div[dir="auto"] div[dir="auto"])')
+    # Only role=article subtrees are ever queried (loading skeletons are caught textually
+    # before parsing), so skip building the rest of the tree.
+    ARTICLE_STRAINER = SoupStrainer(attrs={"role": "article"})
+
+
+def select(node, name: str) -> list:
+    return _SELECT[name](node)
+
+
+def select_outer_dir_auto(node) -> list:
+    if HAS_LXML:
+        return _XP_OUTER_DIR_AUTO(node, depth=_XP_DIR_AUTO_DEPTH(node))
+    return _SEL_OUTER_DIR_AUTO.select(node)
+
+
+def node_text(el) -> str:
+    return el.text_content() if HAS_LXML else el.get_text()
+
+
+def parse_block(html: bytes, *, strained: bool = True):
+    """
+    Parse block HTML bytes into an lxml root (libxml2 decodes UTF-8 natively),
+    or a bs4 soup; None for an empty document.
+    """
+    if HAS_LXML:
+        try:
+            return lxml_html.document_fromstring(html, parser=_LXML_PARSER)
+        except (etree.ParserError, ValueError):
+            return None
+    # bs4 decodes to str anyway; decode here so bad bytes become U+FFFD, not a cp1252 guess
+    text = html.decode("utf-8", errors="replace")
+    return BeautifulSoup(text, "html.parser", parse_only=ARTICLE_STRAINER if strained else None)
 
 
 def die(msg: str):
@@ -15,12 +109,14 @@ def die(msg: str):
     sys.exit(1)
 
 
+# Unicode \s already covers \xa0 (same set as str.split()), so one pass replaces both steps
+_WS_RUN_RE = re.compile(r"\s+")
+
+
 def normalize_text(s: str | None) -> str | None:
     if not s:
         return None
-    s = s.replace("\xa0", " ")
-    s = " ".join(s.split())
-    return s if s else None
+    return _WS_RUN_RE.sub(" ", s).strip() or None
 
 
 def require_any(d: dict, keys: list[str], *, label: str, line_no: int) -> object:
@@ -40,15 +136,15 @@ def as_int(x, *, label: str, line_no: int) -> int:
         die(f"Field '{label}' must be int-like on line {line_no}, got: {x!r}")
 
 
-def write_debug(debug_dir: Path, thread_id: str, block_index: int, html_path: Path, soup: BeautifulSoup):
+def write_debug(debug_dir: Path, thread_id: str, block_index: int, html_path: Path, doc):
     debug_dir.mkdir(parents=True, exist_ok=True)
     out = debug_dir / f"{thread_id}_block_{block_index:03d}.txt"
 
-    articles = soup.select('[role="article"]')
-    dir_auto = soup.select('div[dir="auto"]')
-    statuses = soup.select('[role="status"]')
-    loading = soup.select('[aria-label="Loading..."]')
-    commentish = soup.select('div[role="article"][aria-label]')
+    articles = select(doc, "article")
+    dir_auto = select(doc, "dir_auto")
+    statuses = select(doc, "status")
+    loading = select(doc, "loading")
+    commentish = select(doc, "article_labeled")
 
     def snip(text: str, n: int = 220) -> str:
         t = normalize_text(text) or ""
@@ -71,11 +167,14 @@ def write_debug(debug_dir: Path, thread_id: str, block_index: int, html_path: Pa
 
     lines.append("sample div[dir=auto] texts:")
     for i, el in enumerate(dir_auto[:5], start=1):
-        lines.append(f"  [{i}] {snip(el.get_text())}")
+        lines.append(f"  [{i}] {snip(node_text(el))}")
 
     out.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
+THREAD_ID_KEYS = ["thread_id", "thread", "post_thread_id", "threadId"]
+
+
 def choose_best_thread_record_per_id(blocks_jsonl: Path) -> dict[str, dict]:
     """
     Phase3 may contain multiple records for the same thread_id (e.g., repeated runs).
@@ -86,18 +185,22 @@ def choose_best_thread_record_per_id(blocks_jsonl: Path) -> dict[str, dict]:
     threads_by_id: dict[str, tuple[int, int, dict]] = {}
     records_in = 0
 
-    with blocks_jsonl.open("r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
+    with blocks_jsonl.open("rb") as f:
+        # One bulk read split on b"\n" instead of per-line text-mode reads
+        for line_no, line in enumerate(f.read().split(b"\n"), start=1):
             line = line.strip()
             if not line:
                 continue
             records_in += 1
             try:
-                thread = json.loads(line)
+                thread = json_loads(line)
             except json.JSONDecodeError as e:
                 die(f"Invalid JSON on line {line_no}: {e}")
 
-            tid = require_any(thread, ["thread_id", "thread", "post_thread_id", "threadId"], label="thread_id", line_no=line_no)
+            # Phase 3 always writes thread_id; only fall back to the alias scan without it
+            tid = thread.get("thread_id")
+            if tid is None:
+                tid = require_any(thread, THREAD_ID_KEYS, label="thread_id", line_no=line_no)
             tid = str(tid)
 
             bc = thread.get("block_count")
@@ -114,49 +217,47 @@ def choose_best_thread_record_per_id(blocks_jsonl: Path) -> dict[str, dict]:
                 if (bc_i > prev_bc) or (bc_i == prev_bc and line_no > prev_line):
                     threads_by_id[tid] = (bc_i, line_no, thread)
 
-    # Return only thread dicts (stable ordering handled by caller)
-    result = {tid: t for tid, (_bc, _ln, t) in threads_by_id.items()}
+    # Return only thread dicts, already in processing order (sorted once here)
+    result = {tid: threads_by_id[tid][2] for tid in sorted(threads_by_id)}
     result["_meta_records_in"] = {"records_in": records_in}  # type: ignore
     return result  # type: ignore
 
 
-def extract_author_from_aria(aria_label: str) -> str | None:
-    aria_label = aria_label or ""
-    if aria_label.startswith("Comment by "):
-        # "Comment by NAME 2 weeks ago"
-        rest = aria_label[len("Comment by "):]
-        # strip common suffix fragments
-        for suf in (" weeks ago", " week ago", " days ago", " day ago", " hours ago", " hour ago", " minutes ago", " minute ago"):
-            if suf in rest:
-                rest = rest.split(suf, 1)[0]
-        return normalize_text(rest.strip())
+# "Comment by NAME 2 weeks ago" / "Reply by NAME to X's comment 2 weeks ago"
+_ARIA_RE = re.compile(
+    r"^(Comment|Reply) by (.+?)(?: to .+?)?"
+    r"(?: (?:\d+|an?) (?:minute|hour|day|week|month|year)s? ago)?$",
+    re.S,
+)
 
-    if aria_label.startswith("Reply by "):
-        # "Reply by NAME to X's comment 2 weeks ago"
-        rest = aria_label[len("Reply by "):]
-        if " to " in rest:
-            rest = rest.split(" to ", 1)[0]
-        return normalize_text(rest.strip())
 
-    return None
+def extract_author_from_aria(aria_label: str) -> tuple[str | None, bool]:
+    """(author, is_reply) from one match of the comment/reply aria-label."""
+    aria_label = aria_label or ""
+    m = _ARIA_RE.match(aria_label)
+    if m is None:
+        return None, aria_label.startswith("Reply by ")
+    return normalize_text(m.group(2).strip()), m.group(1) == "Reply"
 
 
 def extract_text_from_node(node) -> str | None:
     # Tier 1: known good selector (paragraph chunks)
     parts: list[str] = []
-    for el in node.select('div[dir="auto"][style*="text-align:start"]'):
-        t = normalize_text(el.get_text())
+    for el in select(node, "text_start"):
+        t = normalize_text(node_text(el))
         if t:
             parts.append(t)
 
     if parts:
         return "\n".join(parts)
 
-    # Tier 2: fallback to largest dir=auto within node (still bounded and deterministic)
+    # Tier 2: fallback to largest dir=auto within node (still bounded and deterministic).
+    # A nested dir=auto's text is a substring of its dir=auto ancestor's, so it can never be
+    # strictly longer (and ties go to the earlier ancestor): only outermost ones are read.
     best = None
     best_len = -1
-    for el in node.select('div[dir="auto"]'):
-        t = normalize_text(el.get_text())
+    for el in select_outer_dir_auto(node):
+        t = normalize_text(node_text(el))
         if t and len(t) > best_len:
             best = t
             best_len = len(t)
@@ -164,6 +265,109 @@ def extract_text_from_node(node) -> str | None:
     return best
 
 
+def read_block_html(task: dict) -> bytes:
+    """Block bytes: a whole block_NNN.html, or one [offset, offset+length) slice of a packed container."""
+    if task["offset"] is None:
+        return Path(task["html_path"]).read_bytes()
+    with open(task["html_path"], "rb") as f:
+        f.seek(task["offset"])
+        return f.read(task["length"])
+
+
+def process_block(task: dict) -> tuple[str, list[tuple]]:
+    """
+    Parse one block into its comment units (aria_label, author, is_reply, text).
+    Self-contained (plain dict in, plain data out) so it can run in a worker process.
+    Units depend only on the block bytes, so blocks with the same sha16 can share them.
+    Returns (status, units); status is "loading", "no_articles", "no_comments" or "ok".
+    """
+    html = read_block_html(task)
+
+    # Skip loading skeletons (textual check; no parse needed)
+    if LOADING_MARKER in html:
+        return "loading", []
+
+    # No role=article attribute text at all: nothing to parse for
+    if not any(n in html for n in ROLE_ARTICLE_NEEDLES):
+        return "no_articles", []
+
+    doc = parse_block(html)
+    if doc is None or not select(doc, "article"):
+        return "no_articles", []
+
+    # Extract comment/reply units by aria-label prefixes
+    PREFIXES = ("Comment by ", "Reply by ")
+    comment_nodes = []
+    for n in select(doc, "article_labeled"):
+        al = n.get("aria-label", "")
+        if al.startswith(PREFIXES):
+            comment_nodes.append(n)
+    # Deterministic ordering: aria-label + text length
+
+    if not comment_nodes:
+        return "no_comments", []
+
+    units = []
+    for node in comment_nodes:
+        aria_label = node.get("aria-label", "")
+        author, is_reply = extract_author_from_aria(aria_label)
+        units.append((aria_label, author, is_reply, extract_text_from_node(node)))
+    return "ok", units
+
+
+def serialize_block(task: dict, units: list[tuple]) -> tuple[dict, bytes]:
+    """
+    Build one block's corpus records from its units.
+    Returns (counts, payload); payload is the block's JSONL lines in one buffer, written with a single write().
+    """
+    thread_id = task["thread_id"]
+    block_index = task["block_index"]
+    meta = task["thread_meta"]
+
+    # Packed layout: html_relpath is the shared container, so the slice is what locates the block.
+    span = {} if task["offset"] is None else {"block_offset": task["offset"], "block_length": task["length"]}
+
+    counts = {"total_comment_nodes": len(units), "author_missing": 0, "text_missing": 0, "target_hits": 0}
+    lines: list[bytes] = []
+    for comment_index, (aria_label, author, is_reply, text) in enumerate(units, start=1):
+        target_hit = (author is not None and author.lower() == task["target_lower"])
+        if not author:
+            counts["author_missing"] += 1
+        if not text:
+            counts["text_missing"] += 1
+        if target_hit:
+            counts["target_hits"] += 1
+
+        # Invariant: author and text are normalize_text() output (or None) and thread_id is
+        # the phase 3 id; phase 5 counts these fields as-is without re-normalizing.
+        lines.append(json_line(
+            {
+                "corpus_id": f"t:{thread_id}:b:{block_index}:c:{comment_index}",
+                "thread_id": thread_id,
+                "block_index": block_index,
+                "comment_index": comment_index,
+                "author": author,
+                "text": text,
+                "is_reply": is_reply,
+                "target_hit": target_hit,
+                "provenance": {
+                    "block_sha16": task["sha16"],
+                    "html_relpath": task["html_path"],
+                    **span,
+                    "phase": 4,
+                    "thread_url": meta["thread_url"],
+                    "debug_dir": meta["debug_dir"],
+                    "after_expand_sha256": meta["after_expand_sha256"],
+                    "after_expand_path_raw": meta["after_expand_path"],
+                    "block_count_declared": meta["block_count"],
+                    "aria_label": aria_label,
+                },
+            }
+        ))
+
+    return counts, b"".join(lines)
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Phase 4: Build comment corpus from Phase 3 block HTML (offline, deterministic, WSL-safe)"
@@ -174,6 +378,7 @@ def main():
     parser.add_argument("--target-name", default="Sean Roy")
     parser.add_argument("--debug-one", type=int, default=0, help="Write debug for first N processed blocks")
     parser.add_argument("--debug-dir", default="fb_extract_out/phase4_debug")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes for block parsing (0 = CPU count, 1 = in-process)")
 
     args = parser.parse_args()
 
@@ -182,6 +387,8 @@ def main():
     out_path = Path(args.out)
     debug_dir = Path(args.debug_dir)
 
+    if not (HAS_LXML or HAS_BS4):
+        die("Phase 4 needs lxml or beautifulsoup4 (pip install lxml)")
     if not blocks_jsonl.exists():
         die(f"Missing Phase 3 blocks file: {blocks_jsonl}")
     if not blocks_dir.exists():
@@ -214,117 +421,130 @@ def main():
     stats["thread_records_in"] = int(meta.get("records_in", 0))
     stats["threads_deduped"] = len(threads_map)
 
-    debug_written = 0
-
-    with out_path.open("w", encoding="utf-8") as f_out:
-        for thread_id in sorted(threads_map.keys()):
-            thread = threads_map[thread_id]
-
-            blocks_list = thread.get("blocks")
-            if not isinstance(blocks_list, list):
-                die(
-                    f"Missing or invalid 'blocks' list in thread record (thread_id={thread_id}). "
-                    f"Keys present: {sorted(thread.keys())}"
-                )
-
-            stats["threads_seen"].add(thread_id)
-
-            thread_url = thread.get("thread_url")
-            debug_dir_raw = thread.get("debug_dir")
-            after_expand_sha256 = thread.get("after_expand_sha256")
-            after_expand_path_raw = thread.get("after_expand_path")
-            block_count_declared = thread.get("block_count")
-
-            for block_pos, block in enumerate(blocks_list, start=1):
-                stats["blocks_seen"] += 1
-
-                block_index = block.get("block_index", block.get("block_i", block.get("idx", block_pos - 1)))
-                block_index = as_int(block_index, label="block_index", line_no=1)
-
-                sha16 = block.get("sha16") or block.get("block_sha16") or block.get("hash16")
-
+    # Build one task per block; missing HTML is counted here so workers only see readable blocks
+    tasks: list[dict] = []
+    for thread_id, thread in threads_map.items():
+
+        blocks_list = thread.get("blocks")
+        if not isinstance(blocks_list, list):
+            die(
+                f"Missing or invalid 'blocks' list in thread record (thread_id={thread_id}). "
+                f"Keys present: {sorted(thread.keys())}"
+            )
+
+        stats["threads_seen"].add(thread_id)
+
+        thread_meta = {
+            "thread_url": thread.get("thread_url"),
+            "debug_dir": thread.get("debug_dir"),
+            "after_expand_sha256": thread.get("after_expand_sha256"),
+            "after_expand_path": thread.get("after_expand_path"),
+            "block_count": thread.get("block_count"),
+        }
+
+        # Packed layout (phase3 --blocks-layout packed): one container per thread
+        container_path = None
+        container_ok = False
+        if thread.get("blocks_container"):
+            container_path = blocks_dir / thread_id / Path(thread["blocks_container"]).name
+            container_ok = container_path.exists()
+
+        for block_pos, block in enumerate(blocks_list, start=1):
+            stats["blocks_seen"] += 1
+
+            block_index = block.get("block_index", block.get("block_i", block.get("idx", block_pos - 1)))
+            block_index = as_int(block_index, label="block_index", line_no=1)
+
+            task = {
+                "thread_id": thread_id,
+                "block_index": block_index,
+                "sha16": block.get("sha16") or block.get("block_sha16") or block.get("hash16"),
+                "thread_meta": thread_meta,
+                "target_lower": target_lower,
+                "offset": None,
+                "length": None,
+            }
+            if container_path is not None and "offset" in block and "length" in block:
+                if not container_ok:
+                    stats["blocks_missing_html"] += 1
+                    continue
+                task["html_path"] = str(container_path)
+                task["offset"] = as_int(block["offset"], label="offset", line_no=1)
+                task["length"] = as_int(block["length"], label="length", line_no=1)
+            else:
                 html_path = blocks_dir / thread_id / f"block_{block_index:03d}.html"
                 if not html_path.exists():
                     stats["blocks_missing_html"] += 1
                     continue
+                task["html_path"] = str(html_path)
+            tasks.append(task)
+
+    # Identical block bytes (same sha16, e.g. repeated runs or overlapping pages) are parsed
+    # once. Only first occurrences go to the pool; a result is held just until its last copy.
+    sha16_left = Counter(t["sha16"] for t in tasks if t["sha16"])
+    parse_tasks = []
+    queued: set[str] = set()
+    for t in tasks:
+        k = t["sha16"]
+        if not k or k not in queued:
+            parse_tasks.append(t)
+            if k:
+                queued.add(k)
+    stats["blocks_parse_reused"] = len(tasks) - len(parse_tasks)
+    held: dict[str, tuple] = {}
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    debug_written = 0
 
-                html = html_path.read_text(encoding="utf-8", errors="replace")
-                soup = BeautifulSoup(html, "html.parser")
-
-                # Skip loading skeletons
-                if soup.select_one('[aria-label="Loading..."], [role="status"][aria-label="Loading..."]'):
-                    stats["blocks_skipped_loading"] += 1
-                    continue
-
-                if not soup.select_one('[role="article"]'):
-                    stats["blocks_skipped_no_articles"] += 1
+    with out_path.open("wb") as f_out:
+        if workers <= 1 or len(parse_tasks) <= 1:
+            results = map(process_block, parse_tasks)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = pool.map(process_block, parse_tasks, chunksize=32)
+        try:
+            # map() preserves task order, so output stays sorted by (thread_id, block);
+            # a repeated sha16 always comes after the first occurrence that was parsed.
+            for task in tasks:
+                k = task["sha16"]
+                if k and k in held:
+                    status, units = held[k]
+                else:
+                    status, units = next(results)
+                if k:
+                    sha16_left[k] -= 1
+                    if sha16_left[k]:
+                        held[k] = (status, units)
+                    else:
+                        held.pop(k, None)
+
+                if status != "ok" and status != "no_comments":
+                    stats[f"blocks_skipped_{status}"] += 1
                     continue
 
                 stats["blocks_processed"] += 1
 
                 if args.debug_one and debug_written < args.debug_one:
-                    write_debug(debug_dir, thread_id, block_index, html_path, soup)
+                    # Debug counts cover the whole block, so the bs4 tree is re-parsed unstrained
+                    doc = parse_block(read_block_html(task), strained=False)
+                    write_debug(debug_dir, task["thread_id"], task["block_index"], Path(task["html_path"]), doc)
                     debug_written += 1
 
-                # Extract comment/reply units by aria-label prefixes
-                PREFIXES = ("Comment by ", "Reply by ")
-                comment_nodes = []
-                for n in soup.select('div[role="article"][aria-label]'):
-                    al = n.get("aria-label", "")
-                    if al.startswith(PREFIXES):
-                        comment_nodes.append(n)
-                # Deterministic ordering: aria-label + text length
-
-                if not comment_nodes:
+                if not units:
                     stats["blocks_skipped_no_comments"] += 1
                     continue
 
+                counts, payload = serialize_block(task, units)
                 stats["blocks_with_comments"] += 1
-                stats["total_comment_nodes"] += len(comment_nodes)
-
-                comment_index = 0
-                for node in comment_nodes:
-                    comment_index += 1
-
-                    aria_label = node.get("aria-label", "")
-                    is_reply = aria_label.startswith("Reply by ")
-
-                    author = extract_author_from_aria(aria_label)
-                    if not author:
-                        stats["author_missing"] += 1
-
-                    text = extract_text_from_node(node)
-                    if not text:
-                        stats["text_missing"] += 1
-
-                    target_hit = (author is not None and author.lower() == target_lower)
-                    if target_hit:
-                        stats["target_hits"] += 1
-
-                    record = {
-                        "corpus_id": f"t:{thread_id}:b:{block_index}:c:{comment_index}",
-                        "thread_id": thread_id,
-                        "block_index": block_index,
-                        "comment_index": comment_index,
-                        "author": author,
-                        "text": text,
-                        "is_reply": is_reply,
-                        "target_hit": target_hit,
-                        "provenance": {
-                            "block_sha16": sha16,
-                            "html_relpath": str(html_path),
-                            "phase": 4,
-                            "thread_url": thread_url,
-                            "debug_dir": debug_dir_raw,
-                            "after_expand_sha256": after_expand_sha256,
-                            "after_expand_path_raw": after_expand_path_raw,
-                            "block_count_declared": block_count_declared,
-                            "aria_label": aria_label,
-                        },
-                    }
-
-                    f_out.write(json.dumps(record, ensure_ascii=False) + "\n")
-                    stats["records_written"] += 1
+                for k, v in counts.items():
+                    stats[k] += v
+                stats["records_written"] += counts["total_comment_nodes"]
+
+                f_out.write(payload)
+        finally:
+            if pool is not None:
+                pool.shutdown()
 
     print("\nPhase 4 Corpus Build Complete")
     print(f"Thread records in: {stats['thread_records_in']}")
@@ -332,6 +552,7 @@ def main():
     print(f"Threads seen: {len(stats['threads_seen'])}")
     print(f"Blocks seen: {stats['blocks_seen']}")
     print(f"Blocks processed: {stats['blocks_processed']}")
+    print(f"Blocks reusing a parse (same sha16): {stats['blocks_parse_reused']}")
     print(f"Blocks missing HTML: {stats['blocks_missing_html']}")
     print(f"Blocks skipped (loading): {stats['blocks_skipped_loading']}")
     print(f"Blocks skipped (no_articles): {stats['blocks_skipped_no_articles']}")
@@ -6,34 +6,57 @@
 
 
 import argparse
+import io
 import json
+import re
 import sys
 from collections import Counter, defaultdict
 from pathlib import Path
 
+# Optional faster JSON (stdlib fallback)
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    json_loads = orjson.loads
+
+    def json_line(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    json_loads = json.loads
+
+    def json_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
 
 def die(msg: str):
     print(f"[FATAL] {msg}", file=sys.stderr)
     sys.exit(1)
 
 
+# Unicode \s already covers \xa0 (same set as str.split()), so one pass replaces both steps
+_WS_RUN_RE = re.compile(r"\s+")
+
+
 def normalize_ws(s: str | None) -> str | None:
     if not s:
         return None
-    s = s.replace("\xa0", " ")
-    s = " ".join(s.split())
-    return s if s else None
+    return _WS_RUN_RE.sub(" ", s).strip() or None
 
 
 def read_jsonl(path: Path) -> list[dict]:
     rows: list[dict] = []
-    with path.open("r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
+    with path.open("rb") as f:
+        # One bulk read split on b"\n" instead of per-line text-mode reads
+        for line_no, line in enumerate(f.read().split(b"\n"), start=1):
             line = line.strip()
             if not line:
                 continue
             try:
-                obj = json.loads(line)
+                obj = json_loads(line)
             except json.JSONDecodeError as e:
                 die(f"Invalid JSON on line {line_no}: {e}")
             if not isinstance(obj, dict):
@@ -78,38 +101,53 @@ def main():
     required = ["corpus_id", "thread_id", "block_index", "comment_index", "author", "text", "is_reply", "target_hit"]
     missing_required = 0
 
-    authors = Counter()
-    threads = Counter()
-    reply_counts = Counter()
+    # Plain dicts in the row loop; wrapped in Counter only for most_common() at report time
+    authors: dict[str, int] = {}
+    threads: dict[str, int] = {}
+    n_reply = 0
     target_rows: list[dict] = []
 
-    text_len = []
+    # Text length stats folded into scalars (no per-row list)
+    tl_min: int | None = None
+    tl_max = 0
+    tl_sum = 0
+    tl_count = 0
     for r in rows:
         for k in required:
             if k not in r:
                 missing_required += 1
                 break
 
-        author = normalize_ws(r.get("author"))
+        # Phase 4 writes author/thread_id/text already normalized; no re-normalizing per row
+        author = r.get("author")
         if author:
-            authors[author] += 1
+            authors[author] = authors.get(author, 0) + 1
 
-        tid = normalize_ws(r.get("thread_id"))
+        tid = r.get("thread_id")
         if tid:
-            threads[tid] += 1
+            threads[tid] = threads.get(tid, 0) + 1
 
-        is_reply = bool(r.get("is_reply"))
-        reply_counts["reply" if is_reply else "comment"] += 1
+        if r.get("is_reply"):
+            n_reply += 1
 
-        txt = normalize_ws(r.get("text"))
+        txt = r.get("text")
         if txt:
-            text_len.append(len(txt))
+            n = len(txt)
+            tl_sum += n
+            tl_count += 1
+            if tl_min is None or n < tl_min:
+                tl_min = n
+            if n > tl_max:
+                tl_max = n
 
         if bool(r.get("target_hit")):
             target_rows.append(r)
 
     target_hits = len(target_rows)
+    tl_avg = (tl_sum / tl_count) if tl_count else None
     total = len(rows)
+    n_comment = total - n_reply
+    top_authors = Counter(authors).most_common(25)
 
     # Fail-loud gate
     if args.target_required == 1 and target_hits == 0:
@@ -123,17 +161,17 @@ def main():
         "counts": {
             "records_total": total,
             "records_target_hit": target_hits,
-            "records_reply": int(reply_counts["reply"]),
-            "records_comment": int(reply_counts["comment"]),
+            "records_reply": n_reply,
+            "records_comment": n_comment,
             "threads": len(threads),
             "missing_required_records": missing_required,
         },
-        "top_authors": [{"author": a, "count": c} for a, c in authors.most_common(25)],
-        "threads_breakdown": [{"thread_id": t, "count": c} for t, c in threads.most_common(50)],
+        "top_authors": [{"author": a, "count": c} for a, c in top_authors],
+        "threads_breakdown": [{"thread_id": t, "count": c} for t, c in Counter(threads).most_common(50)],
         "text_length": {
-            "min": min(text_len) if text_len else None,
-            "max": max(text_len) if text_len else None,
-            "avg": (sum(text_len) / len(text_len)) if text_len else None,
+            "min": tl_min,
+            "max": tl_max if tl_count else None,
+            "avg": tl_avg,
         },
     }
 
@@ -146,9 +184,9 @@ def main():
     write_json(stats_json, stats)
 
     # Target-only jsonl (deterministic order already)
-    with target_jsonl.open("w", encoding="utf-8") as f:
+    with target_jsonl.open("wb") as f:
         for r in target_rows:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+            f.write(json_line(r))
 
     # Human report
     lines = []
@@ -160,41 +198,34 @@ def main():
     lines.append("## Counts")
     lines.append(f"- Total records: **{total}**")
     lines.append(f"- Target hits: **{target_hits}**")
-    lines.append(f"- Replies: **{reply_counts['reply']}**")
-    lines.append(f"- Comments: **{reply_counts['comment']}**")
+    lines.append(f"- Replies: **{n_reply}**")
+    lines.append(f"- Comments: **{n_comment}**")
     lines.append(f"- Threads: **{len(threads)}**")
     lines.append(f"- Records missing required fields: **{missing_required}**")
     lines.append("")
     lines.append("## Top authors")
-    for a, c in authors.most_common(15):
+    for a, c in top_authors[:15]:
         lines.append(f"- {a}: {c}")
     lines.append("")
     lines.append("## Text length")
-    if text_len:
-        lines.append(f"- min: {min(text_len)}")
-        lines.append(f"- max: {max(text_len)}")
-        lines.append(f"- avg: {sum(text_len)/len(text_len):.2f}")
+    if tl_count:
+        lines.append(f"- min: {tl_min}")
+        lines.append(f"- max: {tl_max}")
+        lines.append(f"- avg: {tl_avg:.2f}")
     else:
         lines.append("- no text lengths available")
     lines.append("")
     write_text(stats_md, "\n".join(lines) + "\n")
 
-    # Target excerpt report
-    tlines = []
-    tlines.append("# Phase 5 Target-only Excerpts")
-    tlines.append("")
-    tlines.append(f"- Target: `{args.target_name}`")
-    tlines.append(f"- Hits: **{target_hits}**")
-    tlines.append("")
+    # Target excerpt report (streamed into one buffer, written once)
+    buf = io.StringIO()
+    buf.write(f"# Phase 5 Target-only Excerpts\n\n- Target: `{args.target_name}`\n- Hits: **{target_hits}**\n\n")
     for i, r in enumerate(target_rows[: max(0, args.max_excerpts)], start=1):
         cid = r.get("corpus_id")
         txt = normalize_ws(r.get("text")) or ""
         is_reply = "reply" if bool(r.get("is_reply")) else "comment"
-        tlines.append(f"## {i}. {cid} ({is_reply})")
-        tlines.append("")
-        tlines.append(txt)
-        tlines.append("")
-    write_text(target_md, "\n".join(tlines) + "\n")
+        buf.write(f"## {i}. {cid} ({is_reply})\n\n{txt}\n\n")
+    write_text(target_md, buf.getvalue())
 
     print("\nPhase 5 QA Complete")
     print(f"Input records: {total}")
@@ -27,6 +27,11 @@ from playwright.sync_api import sync_playwright
 DEFAULT_PROFILE_DIR = "/mnt/c/dev/fb_playwright_profile"
 DEFAULT_SCROLL_ROUNDS = 30
 SCROLL_DELAY_S = 1.2
+MAX_ANCHORS_PER_ROUND = 350
+
+_ANCHOR_PAIRS_JS = """(els, max) => els.slice(0, max).map(
+  a => [a.getAttribute('href') || '', a.getAttribute('aria-label') || '']
+)"""
 
 
 def ensure_dir(p: Path) -> None:
@@ -44,21 +49,14 @@ def normalize_href(href: str) -> str:
     return href
 
 
-def looks_threadish(href: str, aria_label: str) -> bool:
-    # Accept common post/thread shapes seen on FB group surfaces
-    if "/posts/" in href or "/permalink/" in href:
-        return True
-    if "story.php" in href or "permalink.php" in href:
-        return True
-    if "multi_permalinks" in href:
-        return True
+# Accept common post/thread shapes seen on FB group surfaces
+_THREAD_MARKERS = ("/posts/", "/permalink/", "story.php", "permalink.php", "multi_permalinks")
+# Timestamp-like aria-labels often correspond to permalinks on FB search surfaces
+_TIMEISH_RE = re.compile(r"\b(?:AM|PM|at|\d{1,2}:\d{2})\b")
 
-    # Timestamp-like aria-labels often correspond to permalinks on FB search surfaces
-    if aria_label and re.search(r"\b(AM|PM|at|\d{1,2}:\d{2})\b", aria_label):
-        return True
 
-    # Relative time variants sometimes appear as text; aria-label might be empty though.
-    return False
+def looks_threadish(href: str, aria_label: str) -> bool:
+    return any(m in href for m in _THREAD_MARKERS) or bool(aria_label and _TIMEISH_RE.search(aria_label))
 
 
 def try_click_posts_filter(page) -> None:
@@ -140,43 +138,44 @@ def main() -> int:
         for r in range(args.scroll_rounds):
             print(f"\n--- Scroll {r + 1}/{args.scroll_rounds} ---")
 
-            # Collect a broad set of group-related anchors
-            anchors = page.locator(f"a[href*='/groups/{gid}/'], a[href*='story.php'], a[href*='permalink.php']")
-            a_count = anchors.count()
-            scanned = min(a_count, 350)
+            # Collect a broad set of group-related anchors: one in-page walk returns
+            # [href, aria-label] pairs instead of two get_attribute round-trips per anchor
+            try:
+                pairs = page.eval_on_selector_all(
+                    f"a[href*='/groups/{gid}/'], a[href*='story.php'], a[href*='permalink.php']",
+                    _ANCHOR_PAIRS_JS,
+                    MAX_ANCHORS_PER_ROUND,
+                )
+            except Exception as e:
+                print(f"   [!] Anchor scan failed: {e}")
+                pairs = []
+            scanned = len(pairs)
             added = 0
 
-            for i in range(scanned):
-                try:
-                    a = anchors.nth(i)
-                    href = a.get_attribute("href") or ""
-                    aria = a.get_attribute("aria-label") or ""
-                    if not href:
-                        continue
-
-                    href = normalize_href(href)
-
-                    # Ignore People results
-                    if f"/groups/{gid}/user/" in href:
-                        continue
+            for href, aria in pairs:
+                if not href:
+                    continue
 
-                    # De-dupe by href without fragment (keep query intact)
-                    raw_key = href.split("#")[0]
-                    if raw_key in seen_raw:
-                        continue
-                    seen_raw.add(raw_key)
+                href = normalize_href(href)
 
-                    if not looks_threadish(raw_key, aria):
-                        continue
+                # Ignore People results
+                if f"/groups/{gid}/user/" in href:
+                    continue
 
-                    if raw_key not in discovered:
-                        discovered.add(raw_key)
-                        added += 1
-                        print(f"   [Candidate] {raw_key} ({aria})")
+                # De-dupe by href without fragment (keep query intact)
+                raw_key = href.split("#")[0]
+                if raw_key in seen_raw:
+                    continue
+                seen_raw.add(raw_key)
 
-                except Exception:
+                if not looks_threadish(raw_key, aria):
                     continue
 
+                if raw_key not in discovered:
+                    discovered.add(raw_key)
+                    added += 1
+                    print(f"   [Candidate] {raw_key} ({aria})")
+
             print(f"   Scanned {scanned} anchors | Added {added} | Total {len(discovered)}")
 
             # Scroll more results
@@ -4,20 +4,29 @@ from __future__ import annotations
 import argparse
 import sys
 import time
+import zlib
+from collections import deque
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Any, Dict, Optional, Set
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 
-from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
+from playwright.sync_api import sync_playwright
 
 from discovery.browser import (
+    block_heavy_resources,
+    collect_fetches,
+    goto_many,
     goto_with_retries,
-    looks_fb_error,
+    html_looks_logged_out,
     looks_logged_out,
     page_dump,
-    safe_goto,
+    probe_page_state,
+    start_fetches,
+    wait_for_author_dom,
 )
 from discovery.common import (
     Budget,
+    VerificationResult,
     DEBUG_BASE,
     append_jsonl,
     build_group_search_url,
@@ -29,9 +38,23 @@ from discovery.common import (
     parse_group_id,
     run_id,
 )
-from discovery.io import checkpoint_stats, load_existing_frontier
+from discovery.browser_pool import PagePool
+from discovery.io import checkpoint_stats, frontier_url_post_ids, load_existing_frontier
 from discovery.surfaces import surface_group_feed, surface_group_search, surface_profile_group_posts
-from discovery.verifier import verify_author
+from discovery.verifier import TargetSpec, make_html_verifier, make_verifier
+
+
+# Upper bound on waiting for author anchors across one fallback verify batch.
+AUTHOR_DOM_WAIT_S = 1.5
+
+
+# Result recorded for pids accepted on the trusted profile_group_posts surface without a verify.
+SURFACE_TRUST = VerificationResult(True, "surface_trust", author_uid_found=None)
+
+# Surface trust is revoked once this many spot checks have a verdict and more than
+# SPOT_CHECK_MAX_FAIL_RATE of them rejected the author.
+SPOT_CHECK_MIN_VERDICTS = 20
+SPOT_CHECK_MAX_FAIL_RATE = 0.10
 
 
 def choose_mode(args, *, have_group: bool) -> str:
@@ -62,6 +85,14 @@ def main() -> int:
     ap.add_argument("--max-minutes", type=int, default=20)
     ap.add_argument("--pause-s", type=float, default=1.2)
     ap.add_argument("--verify-timeout-ms", type=int, default=45000)
+    ap.add_argument("--verify-workers", type=int, default=4, help="verify pages loaded concurrently per batch")
+    ap.add_argument(
+        "--trust-surface",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="emit surface pids without verifying them (default: on for profile_group_posts only)",
+    )
+    ap.add_argument("--verify-sample-rate", type=float, default=0.05, help="with --trust-surface: share of pids still verified as a spot check")
 
     ap.add_argument("--resume", action="store_true")
     ap.add_argument("--overwrite", action="store_true")
@@ -69,11 +100,15 @@ def main() -> int:
 
     ap.add_argument("--user-data-dir", required=True)
     ap.add_argument("--headless", action="store_true")
+    ap.add_argument("--debug-dumps", action="store_true", help="write scroll checkpoint / verified-post / final page dumps")
     args = ap.parse_args()
 
     target_profile = args.target_profile.replace("http://", "https://").rstrip("/")
     target_uid = (args.target_uid or "").strip()
     target_slug = normalize_target_slug(target_profile)
+    target_spec = TargetSpec.from_url(target_profile, target_uid)
+    verify_target = make_verifier(target_spec)
+    verify_html = make_html_verifier(target_spec)
     subject_label = args.subject_label
 
     have_group = bool(args.group_url.strip())
@@ -82,6 +117,14 @@ def main() -> int:
 
     mode = choose_mode(args, have_group=have_group)
 
+    # profile_group_posts is FB's own "posts by <uid> in <group>" filter: authorship holds by construction.
+    trust_surface = args.trust_surface if args.trust_surface is not None else mode == "profile_group_posts"
+    sample_cutoff = int(max(0.0, min(1.0, args.verify_sample_rate)) * 0x100000000)
+
+    def spot_check(pid: str) -> bool:
+        # crc32 keeps the sample deterministic per pid across runs and resumes.
+        return zlib.crc32(pid.encode("ascii")) < sample_cutoff
+
     budget = Budget(
         max_posts=args.max_posts,
         max_scrolls=args.max_scrolls,
@@ -95,6 +138,7 @@ def main() -> int:
         out_path.unlink()
 
     existing_urls, existing_post_ids = load_existing_frontier(out_path) if args.resume else (set(), set())
+    existing_url_pids = frontier_url_post_ids(existing_urls, group_id) if have_group else set()
 
     run = run_id()
     dbg_dir = DEBUG_BASE / run
@@ -114,9 +158,17 @@ def main() -> int:
         "candidates_seen": 0,
         "verify_attempts": 0,
         "verified_target_posts": 0,
+        "trust_surface": trust_surface,
+        "surface_trusted_posts": 0,
+        "spot_checks": 0,
+        "spot_check_failed": 0,
+        "spot_check_unreachable": 0,
+        "surface_trust_revoked": False,
         "skipped_existing": 0,
         "skipped_existing_post_id": 0,
         "stopped_reason": None,
+        # Scroll pauses actually used, bucketed to 0.1s.
+        "pause_history": {},
     }
     stats_path = dbg_dir / "stats.json"
     checkpoint_stats(stats_path, stats)
@@ -139,7 +191,6 @@ def main() -> int:
             viewport={"width": 1280, "height": 900},
         )
         page = ctx.new_page()
-        verify_page = ctx.new_page()
 
         if mode == "group_search":
             if not have_group or not args.query:
@@ -163,6 +214,169 @@ def main() -> int:
             print("[ERR] Unknown mode", file=sys.stderr)
             return 2
 
+        # Row / evidence templates with every key in output order; per-post fields are
+        # assigned into a copy (existing keys keep their position in the dict).
+        base_row: Dict[str, Any] = {
+            "platform": "facebook",
+            "subject_label": subject_label,
+            "source_locator": entry,
+            "canonical_url": None,
+            "post_id": None,
+            "group_id": group_id,
+            "author_label": subject_label,
+            "author_url": target_profile,
+            "author_uid": target_uid or None,
+            "target_uid": target_uid or None,
+            "target_profile": target_profile,
+            "discovered_at": None,
+            "evidence": None,
+        }
+        base_evidence: Dict[str, Any] = {
+            "method": mode,
+            "surface": mode,
+            "scrolls": None,
+            "discovered_order": None,
+            "verify_attempt": None,
+            "verification_method": None,
+            "author_uid_found": None,
+            "run_id": run,
+        }
+
+        def record_verified(
+            pid: str,
+            post_url: str,
+            order: int,
+            scroll_index: int,
+            attempt: Optional[int],
+            vr: VerificationResult,
+            source: Any,
+        ) -> None:
+            """Write the frontier row for one accepted post (source: HTML or page for debug dumps)."""
+            verified_post_ids.add(pid)
+            stats["verified_target_posts"] = len(verified_post_ids)
+
+            evidence = base_evidence.copy()
+            evidence["scrolls"] = scroll_index
+            evidence["discovered_order"] = order
+            evidence["verify_attempt"] = attempt
+            evidence["verification_method"] = vr.method
+            evidence["author_uid_found"] = vr.author_uid_found
+
+            row = base_row.copy()
+            row["canonical_url"] = post_url
+            row["post_id"] = pid
+            row["discovered_at"] = now_iso()
+            row["evidence"] = evidence
+            append_jsonl(out_path, row)
+            checkpoint_stats(stats_path, stats)
+
+            if args.debug_dumps and source is not None and len(verified_post_ids) <= 3:
+                dump_html = dbg_dir / f"verified_{len(verified_post_ids):03d}.html"
+                if isinstance(source, str):
+                    dump_html.write_text(source, encoding="utf-8", errors="ignore")
+                else:
+                    page_dump(source, dump_html, dbg_dir / f"verified_{len(verified_post_ids):03d}.png")
+
+        # Candidates awaiting verification: (pid, post_url, discovered_order, scroll_index).
+        verify_queue: Deque[Tuple[str, str, int, int]] = deque()
+        # Queued pids that are spot checks of a trusted surface rather than plain verifies.
+        sampled_pids: Set[str] = set()
+
+        def note_spot_check(verified: bool) -> None:
+            """Count one spot-check verdict; stop trusting the surface if too many disagree."""
+            nonlocal trust_surface
+            stats["spot_checks"] += 1
+            if not verified:
+                stats["spot_check_failed"] += 1
+            if (
+                trust_surface
+                and stats["spot_checks"] >= SPOT_CHECK_MIN_VERDICTS
+                and stats["spot_check_failed"] > SPOT_CHECK_MAX_FAIL_RATE * stats["spot_checks"]
+            ):
+                trust_surface = False
+                stats["surface_trust_revoked"] = True
+                print(
+                    f"[WARN] {stats['spot_check_failed']}/{stats['spot_checks']} spot checks rejected the author; "
+                    "verifying every remaining candidate.",
+                    file=sys.stderr,
+                )
+
+        def start_batch() -> Tuple[list, List[int], bool]:
+            """
+            Start fetching the next batch's post HTML from the logged-in surface tab;
+            the requests run in the browser while this thread scrolls the surface.
+            """
+            batch = [verify_queue.popleft() for _ in range(min(len(verify_queue), verify_pool.size))]
+            attempts = []
+            for _ in batch:
+                stats["verify_attempts"] += 1
+                attempts.append(stats["verify_attempts"])
+
+            started = start_fetches(page, [item[1] for item in batch], timeout_ms=args.verify_timeout_ms)
+            return batch, attempts, started
+
+        def finish_batch(inflight: Tuple[list, List[int], bool]) -> None:
+            """
+            Verify a started batch from its fetched HTML. A positive HTML verdict is final;
+            a failed fetch, a login wall or a negative verdict (Comet HTML often carries the
+            author only in escaped JSON, not in an <a href>) falls back to navigating verify
+            pages. Rows are written in candidate order.
+            """
+            batch, attempts, started = inflight
+            htmls = collect_fetches(page, len(batch)) if started else [None] * len(batch)
+
+            results: List[Optional[VerificationResult]] = [None] * len(batch)
+            sources: List[Any] = [None] * len(batch)  # fetched HTML or the verify page, for dumps
+            fallback: List[int] = []
+            for i, html in enumerate(htmls):
+                if html is None or html_looks_logged_out(html):
+                    fallback.append(i)
+                    continue
+                vr = verify_html(html)
+                if vr.verified:
+                    results[i] = vr
+                    sources[i] = html
+                else:
+                    fallback.append(i)
+
+            with ExitStack() as stack:
+                if fallback:
+                    verify_pages = stack.enter_context(verify_pool.acquire_many(len(fallback)))
+                    loaded = goto_many(verify_pages, [batch[i][1] for i in fallback], timeout_ms=args.verify_timeout_ms)
+                    # The pages loaded together, so one author-DOM wait budget covers the batch.
+                    dom_deadline = time.monotonic() + AUTHOR_DOM_WAIT_S
+                    for i, verify_page, ok in zip(fallback, verify_pages, loaded):
+                        if not ok:
+                            continue
+                        wait_for_author_dom(verify_page, timeout_ms=max(1, int((dom_deadline - time.monotonic()) * 1000)))
+                        state = probe_page_state(verify_page)
+                        if state.logged_out or state.fb_error:
+                            continue
+                        results[i] = verify_target(verify_page)
+                        sources[i] = verify_page
+
+                for (pid, post_url, order, scroll_index), attempt, vr, source in zip(batch, attempts, results, sources):
+                    if pid in sampled_pids:
+                        sampled_pids.discard(pid)
+                        if vr is None:
+                            # Unreachable sample: emit it as trusted, exactly as if it had not
+                            # been sampled, so the sample rate never changes the output.
+                            stats["spot_check_unreachable"] += 1
+                            if len(verified_post_ids) < budget.max_posts and pid not in verified_post_ids:
+                                stats["surface_trusted_posts"] += 1
+                                record_verified(pid, post_url, order, scroll_index, attempt, SURFACE_TRUST, None)
+                            continue
+                        note_spot_check(vr.verified)
+                    if vr is None or not vr.verified:
+                        continue
+                    if len(verified_post_ids) >= budget.max_posts:
+                        break
+
+                    if pid in verified_post_ids:
+                        continue
+
+                    record_verified(pid, post_url, order, scroll_index, attempt, vr, source)
+
         ok = goto_with_retries(page, entry, dbg_dir, "entry", tries=4)
         if not ok:
             print("[ERR] Could not load entry surface.", file=sys.stderr)
@@ -172,25 +386,59 @@ def main() -> int:
             return 3
 
         if looks_logged_out(page):
-            page_dump(page, dbg_dir / "login_wall.html", dbg_dir / "login_wall.png")
+            page_dump(page, dbg_dir / "login_wall.html", dbg_dir / "login_wall.png", full_page=True)
             print("[ERR] Logged out / login wall detected. Profile not authenticated.", file=sys.stderr)
             print(f"[i] Debug: {dbg_dir}", file=sys.stderr)
             checkpoint_stats(stats_path, stats)
             ctx.close()
             return 3
 
+        # Verify pages are opened only now: the entry load has validated the session cookies
+        # and warmed FB's edge, so the first verifies don't pay that cold start.
+        verify_pool = PagePool(ctx, size=args.verify_workers, on_new_page=block_heavy_resources)
+
         start_ts = time.time()
 
         if mode == "group_search":
-            surf_iter = surface_group_search(page, group_id=group_id, surface_name="group_search", dbg_dir=dbg_dir, budget=budget)
+            surf_iter = surface_group_search(
+                page,
+                group_id=group_id,
+                surface_name="group_search",
+                dbg_dir=dbg_dir,
+                budget=budget,
+                debug_dumps=args.debug_dumps,
+                pause_history=stats["pause_history"],
+            )
         elif mode == "profile_group_posts":
-            surf_iter = surface_profile_group_posts(page, group_id=group_id, surface_name="profile_group_posts", dbg_dir=dbg_dir, budget=budget)
+            surf_iter = surface_profile_group_posts(
+                page,
+                group_id=group_id,
+                surface_name="profile_group_posts",
+                dbg_dir=dbg_dir,
+                budget=budget,
+                debug_dumps=args.debug_dumps,
+                pause_history=stats["pause_history"],
+            )
         else:
-            surf_iter = surface_group_feed(page, group_id=group_id, surface_name="feed", dbg_dir=dbg_dir, budget=budget)
-
+            surf_iter = surface_group_feed(
+                page,
+                group_id=group_id,
+                surface_name="feed",
+                dbg_dir=dbg_dir,
+                budget=budget,
+                debug_dumps=args.debug_dumps,
+                pause_history=stats["pause_history"],
+            )
+
+        inflight = None
         for new_pids, scroll_index, end_seen in surf_iter:
             stats["scrolls"] = scroll_index
 
+            # The batch started before this scroll has been fetching during it.
+            if inflight is not None:
+                finish_batch(inflight)
+                inflight = None
+
             reason = stop_if_budget_or_time(start_ts)
             if reason:
                 stats["stopped_reason"] = reason
@@ -200,81 +448,37 @@ def main() -> int:
             if end_seen:
                 stats["stopped_reason"] = "end_of_results"
 
-            for pid in new_pids:
-                if pid in seen_post_ids:
-                    continue
-                seen_post_ids.add(pid)
+            # Known pids (and repeats within this step) never reach the per-pid work below.
+            fresh = [pid for pid in dict.fromkeys(new_pids) if pid not in seen_post_ids]
+            seen_post_ids.update(fresh)
+            stats["candidates_seen"] = len(seen_post_ids)
+
+            for pid in fresh:
                 discovered_order += 1
-                stats["candidates_seen"] = len(seen_post_ids)
 
-                post_url = canonical_group_post_url(group_id, pid)
                 if pid in existing_post_ids:
                     stats["skipped_existing_post_id"] += 1
                     continue
 
-                if post_url in existing_urls:
+                if pid in existing_url_pids:
                     stats["skipped_existing"] += 1
                     continue
 
-                stats["verify_attempts"] += 1
-                try:
-                    safe_goto(verify_page, post_url, timeout_ms=args.verify_timeout_ms)
-                    time.sleep(0.8)
-                except PWTimeoutError:
-                    continue
-                except Exception:
-                    continue
-
-                if looks_logged_out(verify_page) or looks_fb_error(verify_page):
-                    continue
-
-                vr = verify_author(
-                    verify_page,
-                    target_profile_url=target_profile,
-                    target_uid=target_uid,
-                )
-                if not vr.verified:
-                    continue
-
-                if pid in verified_post_ids:
-                    continue
-
-                verified_post_ids.add(pid)
-                stats["verified_target_posts"] = len(verified_post_ids)
-
-                row = {
-                    "platform": "facebook",
-                    "subject_label": subject_label,
-                    "source_locator": entry,
-                    "canonical_url": post_url,
-                    "post_id": pid,
-                    "group_id": group_id,
-                    "author_label": subject_label,
-                    "author_url": target_profile,
-                    "author_uid": target_uid or None,
-                    "target_uid": target_uid or None,
-                    "target_profile": target_profile,
-                    "discovered_at": now_iso(),
-                    "evidence": {
-                        "method": mode,
-                        "surface": mode,
-                        "scrolls": scroll_index,
-                        "discovered_order": discovered_order,
-                        "verify_attempt": stats["verify_attempts"],
-                        "verification_method": vr.method,
-                        "author_uid_found": vr.author_uid_found,
-                        "run_id": run,
-                    },
-                }
-                append_jsonl(out_path, row)
-                checkpoint_stats(stats_path, stats)
-
-                if len(verified_post_ids) <= 3:
-                    page_dump(
-                        verify_page,
-                        dbg_dir / f"verified_{len(verified_post_ids):03d}.html",
-                        dbg_dir / f"verified_{len(verified_post_ids):03d}.png",
-                    )
+                post_url = canonical_group_post_url(group_id, pid)
+                if trust_surface:
+                    if not spot_check(pid):
+                        if len(verified_post_ids) < budget.max_posts:
+                            stats["surface_trusted_posts"] += 1
+                            record_verified(pid, post_url, discovered_order, scroll_index, None, SURFACE_TRUST, None)
+                        continue
+                    sampled_pids.add(pid)
+                verify_queue.append((pid, post_url, discovered_order, scroll_index))
+
+            # Verify all but the last batch now; the last one fetches while the surface scrolls.
+            while len(verify_queue) > verify_pool.size and len(verified_post_ids) < budget.max_posts:
+                finish_batch(start_batch())
+            if verify_queue and len(verified_post_ids) < budget.max_posts:
+                inflight = start_batch()
 
             checkpoint_stats(stats_path, stats)
 
@@ -282,13 +486,25 @@ def main() -> int:
                 checkpoint_stats(stats_path, stats)
                 break
 
-        page_dump(page, dbg_dir / "surface_final.html", dbg_dir / "surface_final.png")
+        if inflight is not None:
+            finish_batch(inflight)
+            checkpoint_stats(stats_path, stats)
+
+        if args.debug_dumps:
+            page_dump(page, dbg_dir / "surface_final.html", dbg_dir / "surface_final.png")
         ctx.close()
 
     print("Discovery v2 complete.")
     print("Mode:", mode)
     print("Frontier:", out_path)
     print("Verified target posts:", len(verified_post_ids))
+    if stats["trust_surface"]:
+        print(
+            "Surface-trusted:", stats["surface_trusted_posts"],
+            "Spot-check failures:", f"{stats['spot_check_failed']}/{stats['spot_checks']}",
+            "Unreachable:", stats["spot_check_unreachable"],
+            "(trust revoked)" if stats["surface_trust_revoked"] else "",
+        )
     print("Scrolls:", stats["scrolls"], "Candidates:", stats["candidates_seen"], "Verify attempts:", stats["verify_attempts"])
     print("Debug dir:", dbg_dir)
     return 0
@@ -19,34 +19,53 @@ Output:
 from __future__ import annotations
 
 import argparse
+import bisect
 import json
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import lru_cache
+from html import unescape as html_unescape
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set
 from urllib.parse import parse_qs, urlparse, urlunparse
 
 from playwright.sync_api import sync_playwright, TimeoutError as PWTimeoutError
 
+# sortedcontainers is optional; without it a bisect-maintained list keeps the same order.
+try:
+    from sortedcontainers import SortedList
+    HAS_SORTEDCONTAINERS = True
+except ImportError:
+    HAS_SORTEDCONTAINERS = False
+
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 OUT_DIR = REPO_ROOT / "fb_extract_out"
 DEBUG_BASE = OUT_DIR / "discovery_debug"
 
 GROUP_ID_RE = re.compile(r"/groups/(\d+)", re.IGNORECASE)
-POST_RE = re.compile(r"/groups/(\d+)/posts/(\d+)", re.IGNORECASE)
-PERMALINK_RE = re.compile(
-    r"https?://www\.facebook\.com/permalink\.php\?story_fbid=(\d+)&id=(\d+)",
-    re.IGNORECASE,
-)
-STORY_FBID_RE = re.compile(r"story_fbid=(\d+)", re.IGNORECASE)
 
 # author link forms we care about
 PROFILE_ID_RE = re.compile(r"profile\.php\?id=(\d+)", re.IGNORECASE)
 
+# Minimum seconds between stats.json rewrites during the scroll/verify loop.
+STATS_CHECKPOINT_S = 2.0
+
+# Resource types aborted on the verify tab.
+HEAVY_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+
+# page.content() shorter than this is not trusted for href scanning (DOM fallback instead).
+MIN_CONTENT_CHARS = 2048
+
+# Adaptive scroll pause: shorter after a productive scroll (>= PAUSE_FAST_NEW new pids), longer otherwise.
+PAUSE_FLOOR_S = 0.4
+PAUSE_CEIL_S = 2.5
+PAUSE_FAST_NEW = 5
+
 
 @dataclass(frozen=True)
 class Budget:
@@ -67,6 +86,7 @@ def run_id() -> str:
     return datetime.now(timezone.utc).strftime("run_%Y%m%d_%H%M%S")
 
 
+@lru_cache(maxsize=8192)
 def canonicalize_url(url: str) -> str:
     p = urlparse(url)
     clean = p._replace(query="", fragment="")
@@ -76,6 +96,7 @@ def canonicalize_url(url: str) -> str:
     return u
 
 
+@lru_cache(maxsize=8192)
 def strip_query_fragment(url: str) -> str:
     """Normalize FB hrefs by removing query + fragment (FB appends __cft__, __tn__, etc)."""
     try:
@@ -117,38 +138,60 @@ def safe_goto(page, url: str, *, timeout_ms: int = 60000) -> None:
     page.goto(url, wait_until="domcontentloaded", timeout=timeout_ms)
 
 
+def wait_for_author_dom(page, *, timeout_ms: int = 1500) -> bool:
+    """Proceed as soon as an author-ish anchor is attached; on timeout still attempt the match."""
+    try:
+        page.wait_for_selector(
+            "a[href*='profile.php?id='], a[href*='/user/'], h2 a",
+            state="attached",
+            timeout=timeout_ms,
+        )
+        return True
+    except PWTimeoutError:
+        return False
+
+
+LOGIN_CHECKS_CSS = "input[name='email'], input[name='pass'], form[action*='login']"
+LOGIN_CHECKS_TEXT = ["Log in", "Create new account"]
+# very light heuristics; FB varies, but these show up in many hard-fail pages
+ERROR_CHECKS_TEXT = [
+    "This content isn't available right now",
+    "Something went wrong",
+    "Sorry, something went wrong",
+    "Page isn't available",
+]
+
+# Login CSS union + case-insensitive visible-text snippets (like Playwright's text= engine),
+# all answered from one querySelector and one innerText read.
+_PAGE_HEALTH_JS = """([css, loginTexts, errorTexts]) => {
+    let cssHit = false;
+    try { cssHit = !!document.querySelector(css); } catch (e) {}
+    const body = document.body ? (document.body.innerText || '').toLowerCase() : '';
+    return {
+        logged_out: cssHit || loginTexts.some(t => body.includes(t)),
+        fb_error: errorTexts.some(t => body.includes(t)),
+    };
+}"""
+
+
+def page_health(page) -> Dict[str, bool]:
+    """{"logged_out": ..., "fb_error": ...} in one CDP round trip (was up to 9 locator counts)."""
+    try:
+        h = page.evaluate(
+            _PAGE_HEALTH_JS,
+            [LOGIN_CHECKS_CSS, [t.lower() for t in LOGIN_CHECKS_TEXT], [t.lower() for t in ERROR_CHECKS_TEXT]],
+        )
+        return {"logged_out": bool(h["logged_out"]), "fb_error": bool(h["fb_error"])}
+    except Exception:
+        return {"logged_out": False, "fb_error": False}
+
+
 def looks_logged_out(page) -> bool:
-    checks = [
-        "input[name='email']",
-        "input[name='pass']",
-        "form[action*='login']",
-        "text=Log in",
-        "text=Create new account",
-    ]
-    for sel in checks:
-        try:
-            if page.locator(sel).first.count() > 0:
-                return True
-        except Exception:
-            pass
-    return False
+    return page_health(page)["logged_out"]
 
 
 def looks_fb_error(page) -> bool:
-    # very light heuristics; FB varies, but these show up in many hard-fail pages
-    checks = [
-        "text=This content isn't available right now",
-        "text=Something went wrong",
-        "text=Sorry, something went wrong",
-        "text=Page isn't available",
-    ]
-    for sel in checks:
-        try:
-            if page.locator(sel).first.count() > 0:
-                return True
-        except Exception:
-            pass
-    return False
+    return page_health(page)["fb_error"]
 
 
 def goto_with_retries(page, url: str, dbg_dir: Path, prefix: str, *, tries: int = 3) -> bool:
@@ -172,39 +215,54 @@ def scroll_page(page, *, pause_s: float) -> None:
     time.sleep(pause_s)
 
 
-def extract_candidate_post_ids_from_html(html: str, group_id: str) -> List[str]:
-    found: List[str] = []
+@lru_cache(maxsize=32)
+def _candidate_pattern(group_id: str) -> "re.Pattern[str]":
+    """
+    Group post links, this group's permalink.php links and bare story_fbid params in one
+    alternation, with group_id baked in so no per-match gid comparison is needed.
+    """
+    gid = re.escape(group_id)
+    return re.compile(
+        rf"/groups/{gid}/posts/(?P<gp>\d+)"
+        rf"|https?://www\.facebook\.com/permalink\.php\?story_fbid=(?P<pf>\d+)&id={gid}(?!\d)"
+        r"|story_fbid=(?P<sf>\d+)",
+        re.IGNORECASE,
+    )
 
-    for m in POST_RE.finditer(html):
-        gid, pid = m.group(1), m.group(2)
-        if gid == group_id:
-            found.append(pid)
 
-    for m in PERMALINK_RE.finditer(html):
-        pid, gid = m.group(1), m.group(2)
-        if gid == group_id:
-            found.append(pid)
+# Candidate post ids in document order, from one scan of the serialized DOM inside the page so
+# only the pid list crosses CDP. The regex source is _candidate_pattern's, in JS named-group
+# syntax. Group post links (gp) and this group's permalink.php links (pf) always count; bare
+# story_fbid ids (sf) only count when the page is clearly about this group (storyOk), and then
+# include story_fbid of permalinks owned by other ids, as the old third pass did.
+_CANDIDATE_PIDS_JS = r"""([src, gid]) => {
+    const html = document.documentElement.outerHTML;
+    const storyOk = html.includes('/groups/' + gid);
+    const seen = new Set();
+    for (const m of html.matchAll(new RegExp(src, 'gi'))) {
+        const g = m.groups;
+        const pid = g.gp || g.pf || (storyOk ? g.sf : undefined);
+        if (pid) seen.add(pid);
+    }
+    return Array.from(seen);
+}"""
 
-    if f"/groups/{group_id}" in html:
-        for m in STORY_FBID_RE.finditer(html):
-            found.append(m.group(1))
 
-    seen: Set[str] = set()
-    uniq: List[str] = []
-    for pid in found:
-        if pid in seen:
-            continue
-        seen.add(pid)
-        uniq.append(pid)
-    return uniq
+def extract_candidate_post_ids_in_page(page, group_id: str) -> List[str]:
+    """Candidate post ids in document order, matched in the browser. Raises on page errors."""
+    src = _candidate_pattern(group_id).pattern.replace("(?P<", "(?<")
+    pids = page.evaluate(_CANDIDATE_PIDS_JS, [src, group_id])
+    return list(dict.fromkeys(p for p in pids if isinstance(p, str)))
 
 
+@lru_cache(maxsize=8192)
 def _href_to_abs(h: str) -> str:
     if h.startswith("/"):
         return "https://www.facebook.com" + h
     return h
 
 
+@lru_cache(maxsize=8192)
 def _extract_profile_id_from_href(h: str) -> Optional[str]:
     """
     Extract profile.php?id=<uid> from href (query may contain tons of junk).
@@ -227,71 +285,153 @@ def _extract_profile_id_from_href(h: str) -> Optional[str]:
     return None
 
 
-def author_matches_target(page, target_profile_url: str, target_slug: str, target_uid: str = "") -> bool:
+@lru_cache(maxsize=32)
+def _build_author_pattern(target_uid: str, target_full: str, target_slug: str) -> Optional["re.Pattern[str]"]:
     """
-    Return True if the candidate post page appears to be authored by target.
-    Matching order:
-      1) if target_uid provided: match profile.php?id=<uid> in ANY author-ish href
-      2) match target_profile_url (query stripped) as substring of href normalized
-      3) match target slug in href path (query stripped)
+    One alternation for every author-match path, searched over newline-joined absolute
+    hrefs (re.M: ^ is the start of one href). None when there is nothing to match.
+      - profile.php?id=<uid>, as the parse_qs / PROFILE_ID_RE checks read it
+      - target_full as a substring of the href before its query/fragment
+      - "/" + slug inside the href path
+    """
+    alts: List[str] = []
+    if target_uid:
+        uid = re.escape(target_uid)
+        # First id= query param of a /profile.php link (what parse_qs returned) ...
+        alts.append(r"/profile\.php\?(?:(?!id=)[^&#\s]*&)*id=" + uid + r"(?=[&#\s]|$)")
+        # ... or the first profile.php?id=<digits> anywhere in the href (the PROFILE_ID_RE fallback).
+        alts.append(r"^(?:(?!profile\.php\?id=\d)[^\n])*profile\.php\?id=" + uid + r"(?!\d)")
+    if target_full:
+        if target_full.startswith("https://"):
+            core = r"https?://" + re.escape(target_full[len("https://"):])
+        else:
+            core = re.escape(target_full)
+        alts.append(r"^[^?#\s]*?" + core)
+    if target_slug:
+        alts.append(r"^(?:[^/?#\s]*://[^/?#\s]*)?[^?#\s]*?/" + re.escape(target_slug))
+    if not alts:
+        return None
+    return re.compile("|".join(alts), re.IGNORECASE | re.MULTILINE)
+
+
+# href of each <a> in serialized HTML (Chromium always double-quotes attribute values).
+_ANCHOR_HREF_RE = re.compile(r'<a\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*?\shref="([^"]*)"', re.IGNORECASE)
+
+
+def _page_anchor_hrefs(page) -> List[str]:
+    """
+    a[href] values read from one page.content() string (no per-element DOM walk over CDP).
+    Suspiciously short HTML (interstitial / half-built page) falls back to the DOM query.
     """
     try:
-        hrefs: List[str] = page.eval_on_selector_all(
+        html = page.content()
+    except Exception:
+        html = ""
+    if len(html) >= MIN_CONTENT_CHARS:
+        return [html_unescape(h) if "&" in h else h for h in _ANCHOR_HREF_RE.findall(html) if h]
+
+    try:
+        return page.eval_on_selector_all(
             "a[href]",
             "els => els.map(e => e.getAttribute('href')).filter(Boolean)"
         )
     except Exception:
-        hrefs = []
+        return []
+
 
+def author_matches_target(page, target_profile_url: str, target_slug: str, target_uid: str = "") -> bool:
+    """
+    Return True if the candidate post page appears to be authored by target.
+    Matches any href against (uid | profile URL | slug) in one regex search:
+      1) if target_uid provided: match profile.php?id=<uid> in ANY author-ish href
+      2) match target_profile_url (query stripped) as substring of href normalized
+      3) match target slug in href path (query stripped)
+    """
     t_full = strip_query_fragment(target_profile_url.replace("http://", "https://").rstrip("/")).lower()
-    t_slug = target_slug.strip().lower()
-    t_uid = (target_uid or "").strip()
+    pattern = _build_author_pattern((target_uid or "").strip(), t_full, target_slug.strip().lower())
+    if pattern is None:
+        return False
 
-    for h in hrefs:
-        if not isinstance(h, str):
-            continue
+    joined = "\n".join(_href_to_abs(h) for h in _page_anchor_hrefs(page) if isinstance(h, str))
+    return pattern.search(joined) is not None
 
-        hh_abs = _href_to_abs(h)
-        hh_norm = strip_query_fragment(hh_abs).replace("http://", "https://").rstrip("/").lower()
 
-        # 1) UID match (most stable when provided explicitly)
-        if t_uid:
-            uid = _extract_profile_id_from_href(hh_abs)
-            if uid and uid == t_uid:
-                return True
+class JsonlWriter:
+    """
+    Append-only JSONL sink that keeps one buffered handle open for the run.
+    Rows reach the file every flush_every rows or flush_s seconds (and on close),
+    so a crash loses at most that window instead of paying open/close per row.
+    Long loops call flush_if_due() so the time bound holds between writes too.
+    """
 
-        # 2) Full URL match (vanity URL, etc.)
-        if t_full and t_full in hh_norm:
-            return True
+    def __init__(self, path: Path, *, flush_every: int = 8, flush_s: float = 2.0) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = path.open("a", encoding="utf-8", buffering=1 << 16)
+        self.flush_every = flush_every
+        self.flush_s = flush_s
+        self._pending = 0
+        self._last_flush = time.monotonic()
 
-        # 3) Slug in path
-        if t_slug:
-            try:
-                if ("/" + t_slug) in urlparse(hh_norm).path:
-                    return True
-            except Exception:
-                pass
+    def write(self, row: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+        else:
+            self.flush_if_due()
 
-    return False
+    def flush_if_due(self) -> None:
+        if self._pending and time.monotonic() - self._last_flush >= self.flush_s:
+            self.flush()
 
+    def flush(self) -> None:
+        self._f.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
 
-def append_jsonl(path: Path, row: Dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    def close(self) -> None:
+        if not self._f.closed:
+            self._f.close()
 
+    def __enter__(self) -> "JsonlWriter":
+        return self
 
-def emit_discovered_threads_txt(group_id: str, verified_post_ids: Set[str]) -> None:
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class NumericPidOrder:
+    """
+    Verified post ids kept in numeric order as they arrive, as (int(pid), pid) pairs:
+    O(log N) per insert, each int() done once, and emit just walks the sequence.
+    """
+
+    def __init__(self) -> None:
+        self._items = SortedList() if HAS_SORTEDCONTAINERS else []
+
+    def add(self, pid: str) -> None:
+        if HAS_SORTEDCONTAINERS:
+            self._items.add((int(pid), pid))
+        else:
+            bisect.insort(self._items, (int(pid), pid))
+
+    def __iter__(self):
+        return (pid for _, pid in self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def emit_discovered_threads_txt(group_id: str, sorted_pids: Iterable[str]) -> None:
     """
     Writes fb_extract_out/discovered_threads.txt deterministically:
-    canonical group post URLs sorted numerically by post_id.
+    canonical group post URLs sorted numerically by post_id (sorted_pids is already in that order).
     """
     discovered_path = OUT_DIR / "discovered_threads.txt"
     discovered_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # stable ordering
-    sorted_pids = sorted(verified_post_ids, key=lambda s: int(s))
-    lines = [canonical_group_post_url(group_id, pid) for pid in sorted_pids]
+    prefix = canonical_group_post_url(group_id, "")[:-1]  # ".../posts/"; each pid adds "<pid>/"
+    lines = [prefix + pid + "/" for pid in sorted_pids]
     payload = "\n".join(lines) + ("\n" if lines else "")
 
     tmp_path = discovered_path.parent / (discovered_path.name + ".tmp")
@@ -358,6 +498,8 @@ def main() -> int:
         "candidates_seen": 0,
         "verify_attempts": 0,
         "verified_target_posts": 0,
+        # Scroll pauses actually used, bucketed to 0.1s.
+        "pause_history": {},
     }
 
     start_ts = time.time()
@@ -365,12 +507,22 @@ def main() -> int:
     candidates: List[str] = []
     candidates_set: Set[str] = set()
     verified_post_ids: Set[str] = set()
+    verified_in_order = NumericPidOrder()
     verify_cursor = 0
+    current_pause = budget.pause_s
 
-    def checkpoint_stats() -> None:
+    last_ckpt = 0.0
+
+    def checkpoint_stats(*, force: bool = False) -> None:
+        # Throttled to one rewrite per STATS_CHECKPOINT_S; exits and the final write force it.
+        nonlocal last_ckpt
+        now = time.monotonic()
+        if not force and now - last_ckpt < STATS_CHECKPOINT_S:
+            return
+        last_ckpt = now
         (dbg_dir / "stats.json").write_text(json.dumps(stats, indent=2), encoding="utf-8")
 
-    with sync_playwright() as p:
+    with sync_playwright() as p, JsonlWriter(out_path) as writer:
         ctx = p.chromium.launch_persistent_context(
             user_data_dir=args.user_data_dir,
             headless=args.headless,
@@ -379,12 +531,17 @@ def main() -> int:
 
         page = ctx.new_page()
         verify_page = ctx.new_page()  # create early to avoid ctx.new_page late failures
+        # Verification only needs HTML + scripts; the scroll page is left alone (feed layout may need CSS).
+        verify_page.route(
+            "**/*",
+            lambda r: r.abort() if r.request.resource_type in HEAVY_RESOURCE_TYPES else r.continue_(),
+        )
 
         ok = goto_with_retries(page, group_url, dbg_dir, "group_start", tries=4)
         if not ok:
             print("[ERR] Could not load group page (login wall or FB error persisted).", file=sys.stderr)
             print(f"[i] Debug: {dbg_dir}", file=sys.stderr)
-            checkpoint_stats()
+            checkpoint_stats(force=True)
             ctx.close()
             return 3
 
@@ -392,10 +549,25 @@ def main() -> int:
             page_dump(page, dbg_dir / "login_wall.html", dbg_dir / "login_wall.png")
             print("[ERR] Logged out / login wall detected. Use a Playwright profile that is logged in.", file=sys.stderr)
             print(f"[i] Debug: {dbg_dir}", file=sys.stderr)
-            checkpoint_stats()
+            checkpoint_stats(force=True)
             ctx.close()
             return 3
 
+        # Row template with every key in output order; per-post keys are filled into a copy.
+        base_row: Dict[str, Any] = {
+            "platform": "facebook",
+            "subject_label": subject_label,
+            "source_locator": group_url,
+            "canonical_url": None,
+            "post_id": None,
+            "group_id": group_id,
+            "author_label": subject_label,
+            "author_url": target_profile,
+            "author_uid": target_uid or None,
+            "discovered_at": None,
+            "evidence": None,
+        }
+
         def run_verify_batch() -> None:
             nonlocal verify_cursor
             if len(verified_post_ids) >= budget.max_posts:
@@ -409,45 +581,40 @@ def main() -> int:
                 if pid in verified_post_ids:
                     continue
 
+                writer.flush_if_due()
                 post_url = canonical_group_post_url(group_id, pid)
                 stats["verify_attempts"] += 1
 
                 try:
                     safe_goto(verify_page, post_url, timeout_ms=args.verify_timeout_ms)
-                    time.sleep(0.8)
+                    wait_for_author_dom(verify_page, timeout_ms=1500)
                 except PWTimeoutError:
                     continue
                 except Exception:
                     continue
 
-                if looks_logged_out(verify_page) or looks_fb_error(verify_page):
+                h = page_health(verify_page)
+                if h["logged_out"] or h["fb_error"]:
                     continue
 
                 if not author_matches_target(verify_page, target_profile, target_slug, target_uid=target_uid):
                     continue
 
                 verified_post_ids.add(pid)
+                verified_in_order.add(pid)
                 stats["verified_target_posts"] = len(verified_post_ids)
 
-                row = {
-                    "platform": "facebook",
-                    "subject_label": subject_label,
-                    "source_locator": group_url,
-                    "canonical_url": post_url,
-                    "post_id": pid,
-                    "group_id": group_id,
-                    "author_label": subject_label,
-                    "author_url": target_profile,
-                    "author_uid": target_uid or None,
-                    "discovered_at": now_iso(),
-                    "evidence": {
-                        "method": "feed_scroll_incremental_verify",
-                        "scrolls": stats["scrolls"],
-                        "verify_attempt": stats["verify_attempts"],
-                        "run_id": run,
-                    },
+                row = base_row.copy()
+                row["canonical_url"] = post_url
+                row["post_id"] = pid
+                row["discovered_at"] = now_iso()
+                row["evidence"] = {
+                    "method": "feed_scroll_incremental_verify",
+                    "scrolls": stats["scrolls"],
+                    "verify_attempt": stats["verify_attempts"],
+                    "run_id": run,
                 }
-                append_jsonl(out_path, row)
+                writer.write(row)
 
                 # dump first 3 verified posts for proof
                 if len(verified_post_ids) <= 3:
@@ -470,23 +637,21 @@ def main() -> int:
                 break
 
             stats["scrolls"] += 1
+            writer.flush_if_due()
 
             try:
-                html = page.content()
+                pids = extract_candidate_post_ids_in_page(page, group_id)
             except Exception:
                 page_dump(page, dbg_dir / "page_content_error.html", dbg_dir / "page_content_error.png")
-                checkpoint_stats()
+                checkpoint_stats(force=True)
                 ctx.close()
                 return 4
 
-            pids = extract_candidate_post_ids_from_html(html, group_id)
-            new = 0
-            for pid in pids:
-                if pid in candidates_set:
-                    continue
-                candidates_set.add(pid)
-                candidates.append(pid)
-                new += 1
+            # pids is already unique, so one filter pass plus bulk update/extend is enough.
+            local_new = [pid for pid in pids if pid not in candidates_set]
+            candidates_set.update(local_new)
+            candidates.extend(local_new)
+            new = len(local_new)
 
             stats["candidates_seen"] = len(candidates)
 
@@ -509,25 +674,35 @@ def main() -> int:
                 run_verify_batch()
                 checkpoint_stats()
 
+            # adapt the pause to the yield; bounds widen to include an explicit --pause-s
+            if new >= PAUSE_FAST_NEW:
+                current_pause = max(min(PAUSE_FLOOR_S, budget.pause_s), current_pause * 0.75)
+            else:
+                current_pause = min(max(PAUSE_CEIL_S, budget.pause_s), current_pause * 1.4)
+            bucket = f"{current_pause:.1f}"
+            stats["pause_history"][bucket] = stats["pause_history"].get(bucket, 0) + 1
+
             # scroll (crash-safe)
             try:
-                scroll_page(page, pause_s=budget.pause_s)
+                scroll_page(page, pause_s=current_pause)
             except Exception:
                 # FB sometimes kills the tab; dump what we have and exit cleanly
                 page_dump(page, dbg_dir / "scroll_crash.html", dbg_dir / "scroll_crash.png")
-                checkpoint_stats()
+                checkpoint_stats(force=True)
                 ctx.close()
                 return 4
 
         # final verify pass for remaining candidates discovered
         run_verify_batch()
-        checkpoint_stats()
+        checkpoint_stats(force=True)
 
-        page_dump(page, dbg_dir / "group_after_scroll.html", dbg_dir / "group_after_scroll.png")
-        ctx.close()
-
-    # Emit canonical frontier for extractor (deterministic)
-    emit_discovered_threads_txt(group_id, verified_post_ids)
+        # Emit canonical frontier for extractor (deterministic) on a worker thread while the
+        # browser is dumped and torn down; Playwright calls stay on this thread.
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            emit_fut = ex.submit(emit_discovered_threads_txt, group_id, verified_in_order)
+            page_dump(page, dbg_dir / "group_after_scroll.html", dbg_dir / "group_after_scroll.png")
+            ctx.close()
+            emit_fut.result()
 
     print("Discovery complete.")
     print("Wrote frontier:", out_path)
@@ -3,84 +3,147 @@ from pathlib import Path
 TARGET_UID = "100054771426216"
 
 p = Path("tools/discover_frontier.py")
-lines = p.read_text(encoding="utf-8").splitlines(True)
+# The file stays one buffer; every edit is a find() plus a slice splice.
+buf = bytearray(p.read_bytes())
 
-def find_line(pred):
-    for i, ln in enumerate(lines):
-        if pred(ln):
+def find_line_start(needle, pos=0):
+    """Offset of the first line at or after pos that starts with needle, or -1."""
+    while True:
+        i = buf.find(needle, pos)
+        if i <= 0 or buf[i - 1] == 0x0A:
             return i
-    return -1
+        pos = i + 1
 
-# --- Replace author_matches_target(...) function block ---
-start = find_line(lambda s: s.startswith("def author_matches_target("))
+def line_bounds(i):
+    """(start, end) offsets of the line holding offset i; end includes its newline."""
+    e = buf.find(b"\n", i)
+    return buf.rfind(b"\n", 0, i) + 1, len(buf) if e < 0 else e + 1
+
+def find_line_outside_block(needle, pred):
+    """First line containing needle, outside the old function block, for which pred(line) holds."""
+    pos = 0
+    while True:
+        i = buf.find(needle, pos)
+        if i < 0:
+            return -1, -1
+        s, e = line_bounds(i)
+        if start <= s < end:
+            pos = end
+            continue
+        if pred(bytes(buf[s:e])):
+            return s, e
+        pos = e
+
+# --- Locate the author_matches_target(...) function block ---
+start = find_line_start(b"def author_matches_target(")
 if start < 0:
     raise SystemExit("ERR: could not find def author_matches_target")
 
-# Find end of function by locating the next top-level "def " after start
-end = -1
-for i in range(start + 1, len(lines)):
-    if lines[i].startswith("def ") and not lines[i].startswith("def author_matches_target"):
-        end = i
+# End of function is the next top-level "def " after start
+end = start
+while True:
+    end = find_line_start(b"def ", end + 1)
+    if end < 0 or not buf.startswith(b"def author_matches_target", end):
         break
 if end < 0:
     raise SystemExit("ERR: could not find end of author_matches_target block")
 
-replacement = [
-    "def author_matches_target(page, target_profile_url: str, target_slug: str, target_uid: str = \"\") -> bool:\n",
-    "    try:\n",
-    "        hrefs: List[str] = page.eval_on_selector_all(\n",
-    "            \"a[href]\",\n",
-    "            \"els => els.map(e => e.getAttribute('href')).filter(Boolean)\",\n",
-    "        )\n",
-    "    except Exception:\n",
-    "        hrefs = []\n",
-    "\n",
-    "    t_full = target_profile_url.replace(\"http://\", \"https://\").rstrip(\"/\").lower()\n",
-    "    t_slug = target_slug.strip().lower()\n",
-    "    t_uid = (target_uid or \"\").strip()\n",
-    "\n",
-    "    for h in hrefs:\n",
-    "        if not isinstance(h, str):\n",
-    "            continue\n",
-    "        hh = h\n",
-    "        if hh.startswith(\"/\"):\n",
-    "            hh = \"https://www.facebook.com\" + hh\n",
-    "        hh_norm = hh.replace(\"http://\", \"https://\").rstrip(\"/\").lower()\n",
-    "        path = urlparse(hh_norm).path\n",
-    "\n",
-    "        if t_full and t_full in hh_norm:\n",
-    "            return True\n",
-    "        if t_slug and (\"/\" + t_slug) in path:\n",
-    "            return True\n",
-    "        if t_uid:\n",
-    "            if f\"/user/{t_uid}\" in path:\n",
-    "                return True\n",
-    "            if f\"profile.php?id={t_uid}\" in hh_norm:\n",
-    "                return True\n",
-    "\n",
-    "    return False\n",
-    "\n",
-]
-
-lines[start:end] = replacement
+# --- Locate the slug assignment in main() and the call site ---
+SLUG_LINE = b"target_slug = normalize_target_slug(target_profile)"
+slug_s, slug_e = find_line_outside_block(SLUG_LINE, lambda ln: ln.strip() == SLUG_LINE)
+if slug_s < 0:
+    raise SystemExit("ERR: could not find target_slug assignment")
+
+call_s, call_e = find_line_outside_block(
+    b"author_matches_target(",
+    lambda ln: b"verify_page" in ln and b"target_profile" in ln and b"target_slug" in ln,
+)
+
+replacement = b"".join([
+    b"def author_matches_target(page, target_profile_url: str, target_slug: str, target_uid: str = \"\") -> bool:\n",
+    b"    t_full = target_profile_url.replace(\"http://\", \"https://\").rstrip(\"/\").lower()\n",
+    b"    t_slug = target_slug.strip().lower()\n",
+    b"    t_uid = (target_uid or \"\").strip()\n",
+    b"    # Needles are built once here, not per href; empty strings disable a check.\n",
+    b"    needles = {\n",
+    b"        \"full\": t_full,\n",
+    b"        \"slug\": (\"/\" + t_slug) if t_slug else \"\",\n",
+    b"        \"uidUser\": f\"/user/{t_uid}\" if t_uid else \"\",\n",
+    b"        \"uidPhp\": f\"profile.php?id={t_uid}\" if t_uid else \"\",\n",
+    b"    }\n",
+    b"\n",
+    b"    # Normalize and match every href in the page; only the boolean comes back over CDP.\n",
+    b"    js = \"\"\"\n",
+    b"    (els, n) => {\n",
+    b"        const needPath = !!(n.slug || n.uidUser);\n",
+    b"        const pathOf = (u) => {\n",
+    b"            u = u.split('#')[0].split('?')[0].replace(/^[a-z][a-z0-9+.-]*:/, '');\n",
+    b"            if (u.startsWith('//')) {\n",
+    b"                const i = u.slice(2).search(/[/]/);\n",
+    b"                u = i < 0 ? '' : u.slice(2 + i);\n",
+    b"            }\n",
+    b"            const k = u.indexOf(';', Math.max(u.lastIndexOf('/'), 0));\n",
+    b"            return k < 0 ? u : u.slice(0, k);\n",
+    b"        };\n",
+    b"        return els.some(e => {\n",
+    b"            let h = e.getAttribute('href');\n",
+    b"            if (!h) return false;\n",
+    b"            if (h[0] === '/') h = 'https://www.facebook.com' + h;\n",
+    b"            h = h.replaceAll('http://', 'https://').replace(/\\\\/+$/, '').toLowerCase();\n",
+    b"            if (n.full && h.includes(n.full)) return true;\n",
+    b"            if (needPath) {\n",
+    b"                const path = pathOf(h);\n",
+    b"                if (n.slug && path.includes(n.slug)) return true;\n",
+    b"                if (n.uidUser && path.includes(n.uidUser)) return true;\n",
+    b"            }\n",
+    b"            return !!n.uidPhp && h.includes(n.uidPhp);\n",
+    b"        });\n",
+    b"    }\n",
+    b"    \"\"\"\n",
+    b"    try:\n",
+    b"        return bool(page.eval_on_selector_all(\"a[href]\", js, needles))\n",
+    b"    except Exception:\n",
+    b"        return False\n",
+    b"\n",
+])
+
+def lines_from(pos, n):
+    """Bytes of the n lines starting at offset pos (fewer at end of file)."""
+    e = pos
+    for _ in range(n):
+        nl = buf.find(b"\n", e)
+        if nl < 0:
+            return bytes(buf[pos:])
+        e = nl + 1
+    return bytes(buf[pos:e])
+
+# All edits are (start, end, new_bytes) against the original buffer, applied once at the end.
+# --- Replace author_matches_target(...) function block ---
+edits = [(start, end, replacement)]
 
 # --- Ensure target_uid exists in main() near target_slug ---
-slug_idx = find_line(lambda s: s.strip() == "target_slug = normalize_target_slug(target_profile)")
-if slug_idx < 0:
-    raise SystemExit("ERR: could not find target_slug assignment")
+# The 6-line window is read as it looks after the block replacement.
+if slug_s < start:
+    window = bytes(buf[slug_s:start]) + replacement + lines_from(end, 6)
+else:
+    window = lines_from(slug_s, 6)
+has_uid = any(b"target_uid" in ln and b"=" in ln for ln in window.split(b"\n")[:6])
 
 # If not already present, insert target_uid assignment on next line
-has_uid = any("target_uid" in ln and "=" in ln for ln in lines[slug_idx:slug_idx+6])
 if not has_uid:
-    indent = lines[slug_idx].split("target_slug")[0]
-    lines.insert(slug_idx + 1, f"{indent}target_uid = \"{TARGET_UID}\"\n")
+    indent = bytes(buf[slug_s:slug_e]).split(b"target_slug")[0]
+    edits.append((slug_e, slug_e, indent + f"target_uid = \"{TARGET_UID}\"\n".encode()))
 
 # --- Patch call site ---
-for i, ln in enumerate(lines):
-    if "author_matches_target(" in ln and "verify_page" in ln and "target_profile" in ln and "target_slug" in ln:
-        if "target_uid" not in ln:
-            lines[i] = ln.replace("target_slug)", "target_slug, target_uid)")
-        break
+if call_s >= 0:
+    line = bytes(buf[call_s:call_e])
+    if b"target_uid" not in line:
+        edits.append((call_s, call_e, line.replace(b"target_slug)", b"target_slug, target_uid)")))
+
+# Back to front, so earlier offsets stay valid; at a shared offset the wider edit goes first
+# and an insert lands ahead of it.
+for at, to, new in sorted(edits, key=lambda ed: (ed[0], ed[1]), reverse=True):
+    buf[at:to] = new
 
-p.write_text("".join(lines), encoding="utf-8")
+p.write_bytes(buf)
 print("[OK] Patched discover_frontier.py: UID-aware author match + call site wired.")
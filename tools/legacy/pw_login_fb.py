@@ -7,6 +7,12 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--user-data-dir", required=True)
     ap.add_argument("--url", default="https://www.facebook.com/")
+    ap.add_argument(
+        "--remote-debugging-port",
+        type=int,
+        default=0,
+        help="expose this session over CDP so other scripts can attach (PW_CDP_URL) instead of relaunching",
+    )
     args = ap.parse_args()
 
     Path(args.user_data_dir).mkdir(parents=True, exist_ok=True)
@@ -16,9 +22,12 @@ def main():
             user_data_dir=args.user_data_dir,
             headless=False,
             viewport={"width": 1280, "height": 900},
+            args=[f"--remote-debugging-port={args.remote_debugging_port}"] if args.remote_debugging_port else None,
         )
         page = ctx.new_page()
         page.goto(args.url, wait_until="domcontentloaded")
+        if args.remote_debugging_port:
+            print(f"[i] CDP endpoint: http://127.0.0.1:{args.remote_debugging_port} (export PW_CDP_URL to reuse this browser)")
         print("[i] Browser opened. Log in manually, then return here and press Enter to close.")
         input()
         ctx.close()
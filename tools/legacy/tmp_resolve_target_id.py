@@ -1,76 +1,166 @@
+import mmap
+import os
 import re
-import time
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
 TARGET = "https://www.facebook.com/sean.roy.9465"
 
+# Attach to an already-running browser (see pw_login_fb.py --remote-debugging-port) when set.
+CDP_URL = os.environ.get("PW_CDP_URL", "")
+
+# In-page readiness check: an id-bearing URL, or a script blob carrying "userID".
+# Only script text is probed (no full DOM serialization per poll).
+ID_READY_JS = r"""() => /profile\.php\?id=\d+/.test(location.href)
+    || Array.from(document.scripts).some(el => el.textContent.includes('"userID"'))"""
+ID_WAIT_MS = 3000  # cap stays at the old fixed sleep
+
 OUTDIR = Path("fb_extract_out/discovery_debug/resolve_target_id")
 OUTDIR.mkdir(parents=True, exist_ok=True)
 
+# Numeric-ID patterns, tried in order: URL first, then HTML.
+PATTERNS_URL = tuple(
+    re.compile(p)
+    for p in (
+        r"[?&]id=(\d+)",
+        r"/groups/\d+/user/(\d+)",
+        r"/people/[^/]+/(\d+)",
+    )
+)
+
+# HTML patterns are bytes: they scan the saved page.html through an mmap.
+PATTERNS_HTML = tuple(
+    re.compile(p)
+    for p in (
+        rb'"userID"\s*:\s*"(\d+)"',
+        rb'"user_id"\s*:\s*"(\d+)"',
+        rb'"profile_id"\s*:\s*"(\d+)"',
+        rb"profile\.php\?id=(\d+)",
+        rb"/groups/\d+/user/(\d+)",
+        rb"/people/[^/]+/(\d+)",
+    )
+)
+
+# All HTML patterns in one zero-width alternation: each position reports the highest-priority
+# pattern matching there, so one pass over a multi-MB page finds what the ordered loop would.
+HTML_FUSED_RE = re.compile(b"(?=" + b"|".join(p.pattern for p in PATTERNS_HTML) + b")")
+
+def pick_first_fused(fused, text):
+    best = None
+    for m in fused.finditer(text):
+        k = m.lastindex
+        if best is None or k < best.lastindex:
+            best = m
+            if k == 1:
+                break
+    return best.group(best.lastindex) if best else None
+
+# Same ordered HTML patterns, run by V8 over the live DOM; only the matched digits come back.
+HTML_ID_JS = """(sources) => {
+    const s = document.documentElement.outerHTML;
+    for (const src of sources) {
+        const m = new RegExp(src).exec(s);
+        if (m) return m[1];
+    }
+    return null;
+}"""
+HTML_ID_SOURCES = [p.pattern.decode("ascii") for p in PATTERNS_HTML]
+
+def atomic_write_bytes(path, data):
+    # One large buffered write to a temp file, then rename: no torn page dumps.
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb", buffering=1 << 20) as f:
+        f.write(data)
+    os.replace(tmp, path)
+
 def pick_first(patterns, text):
     for pat in patterns:
-        m = re.search(pat, text)
+        m = pat.search(text)
         if m:
             return m.group(1)
     return None
 
 with sync_playwright() as p:
-    ctx = p.chromium.launch_persistent_context(
-        user_data_dir="fb_extract_out/playwright_profile",
-        headless=False,
-    )
+    browser = None
+    if CDP_URL:
+        browser = p.chromium.connect_over_cdp(CDP_URL)
+        ctx = browser.contexts[0] if browser.contexts else browser.new_context()
+    else:
+        ctx = p.chromium.launch_persistent_context(
+            user_data_dir="fb_extract_out/playwright_profile",
+            headless=False,
+        )
     page = ctx.new_page()
 
+    goto_error = None
     try:
         page.goto(TARGET, wait_until="domcontentloaded", timeout=90000)
-        time.sleep(3.0)  # FB keeps network activity; don't use networkidle.
     except Exception as e:
-        # Dump whatever we can for diagnosis
+        goto_error = e
+    else:
+        # FB keeps network activity, so networkidle never settles; wait for an id to show up instead.
         try:
-            (OUTDIR / "goto_error.txt").write_text(str(e) + "\n", encoding="utf-8")
+            page.wait_for_function(ID_READY_JS, timeout=ID_WAIT_MS, polling=250)
         except Exception:
-            pass
+            pass  # no id signal in time: scan whatever has rendered
+
+    # One DOM serialization, shared by the error dump and the id scan.
+    try:
+        html = page.content()
+    except Exception:
+        if goto_error is None:
+            raise
+        html = None
+
+    if goto_error is not None:
+        # Dump whatever we can for diagnosis
         try:
-            page.screenshot(path=str(OUTDIR / "goto_error.png"), full_page=True)
+            (OUTDIR / "goto_error.txt").write_text(str(goto_error) + "\n", encoding="utf-8")
         except Exception:
             pass
         try:
-            (OUTDIR / "goto_error.html").write_text(page.content(), encoding="utf-8", errors="ignore")
+            page.screenshot(path=str(OUTDIR / "goto_error.png"), full_page=True)
         except Exception:
             pass
-        raise
+        if html is not None:
+            try:
+                atomic_write_bytes(OUTDIR / "goto_error.html", html.encode("utf-8", "ignore"))
+            except Exception:
+                pass
+        raise goto_error
 
     url = page.url
-    html = page.content()
 
     (OUTDIR / "page_url.txt").write_text(url + "\n", encoding="utf-8")
-    (OUTDIR / "page.html").write_text(html, encoding="utf-8", errors="ignore")
+    page_path = OUTDIR / "page.html"
+    atomic_write_bytes(page_path, html.encode("utf-8", "ignore"))
     try:
         page.screenshot(path=str(OUTDIR / "page.png"), full_page=True)
     except Exception:
         pass
 
     # Try extracting numeric ID from URL first, then HTML
-    patterns_url = [
-        r"[?&]id=(\d+)",
-        r"/groups/\d+/user/(\d+)",
-        r"/people/[^/]+/(\d+)",
-    ]
-
-    patterns_html = [
-        r'"userID"\s*:\s*"(\d+)"',
-        r'"user_id"\s*:\s*"(\d+)"',
-        r'"profile_id"\s*:\s*"(\d+)"',
-        r"profile\.php\?id=(\d+)",
-        r"/groups/\d+/user/(\d+)",
-        r"/people/[^/]+/(\d+)",
-    ]
-
-    uid = pick_first(patterns_url, url) or pick_first(patterns_html, html)
+    uid = pick_first(PATTERNS_URL, url)
+    html_scanned = False
+    if not uid:
+        try:
+            uid = page.evaluate(HTML_ID_JS, HTML_ID_SOURCES)
+            html_scanned = True
+        except Exception:
+            pass
+    if not uid and not html_scanned and page_path.stat().st_size:
+        # Page is gone: scan the page-cache-backed dump instead; only the captured id is decoded.
+        with page_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            found = pick_first_fused(HTML_FUSED_RE, mm)
+        uid = found.decode("ascii") if found else None
 
     print("final_url =", url)
     print("uid =", uid if uid else "NONE")
     print("wrote =", str(OUTDIR))
 
-    ctx.close()
+    if browser is not None:
+        # Leave the shared browser running; just drop our tab and disconnect.
+        page.close()
+        browser.close()
+    else:
+        ctx.close()
@@ -1,34 +1,71 @@
-import hashlib
-from pathlib import Path
-import sys
-
-# Find latest thread directory by mtime
-try:
-    debug_dir = Path("fb_extract_out/debug")
-    if not debug_dir.exists():
-        print(f"Directory not found: {debug_dir.absolute()}")
-        sys.exit(1)
-
-    thread_dirs = sorted(
-        debug_dir.glob("run_*/thread_*"),
-        key=lambda p: p.stat().st_mtime,
-        reverse=True
-    )
-
-    if not thread_dirs:
-        print("No thread dirs found")
-        sys.exit(1)
-
-    d = thread_dirs[0]
-    print("Latest thread dir:", d)
-
-    for name in ["start.html","after_expand.html","start.png","after_expand.png"]:
-        p = d / name
-        if not p.exists():
-            print(name, "MISSING")
-            continue
-        h = hashlib.sha256(p.read_bytes()).hexdigest()[:16]
-        print(f"{name:15s} hash={h} size={p.stat().st_size}")
-
-except Exception as e:
-    print(f"Error: {e}")
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+
+# Below this size a plain read is cheaper than setting up a mapping.
+MMAP_MIN_BYTES = 64 * 1024
+
+
+def short_sha256(p, size):
+    """
+    First 16 hex chars of the file's sha256. Large files are streamed through
+    hashlib.file_digest (3.11+), or hashed from an mmap on older Pythons.
+    """
+    if size < MMAP_MIN_BYTES:
+        return hashlib.sha256(p.read_bytes()).digest()[:8].hex()
+    with open(p, "rb") as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").digest()[:8].hex()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).digest()[:8].hex()
+
+
+# Find latest thread directory by mtime
+try:
+    debug_dir = Path("fb_extract_out/debug")
+    if not debug_dir.exists():
+        print(f"Directory not found: {debug_dir.absolute()}")
+        sys.exit(1)
+
+    # Two-level scandir over run_*/thread_*; DirEntry caches the type from readdir.
+    d = None
+    best_mt = -1
+    with os.scandir(debug_dir) as runs:
+        for run in runs:
+            if not run.name.startswith("run_") or not run.is_dir():
+                continue
+            with os.scandir(run.path) as threads:
+                for th in threads:
+                    if not th.name.startswith("thread_") or not th.is_dir():
+                        continue
+                    mt = th.stat(follow_symlinks=False).st_mtime_ns
+                    if mt > best_mt:
+                        best_mt, d = mt, Path(th.path)
+
+    if d is None:
+        print("No thread dirs found")
+        sys.exit(1)
+
+    print("Latest thread dir:", d)
+
+    def hash_one(name):
+        p = d / name
+        if not p.exists():
+            return f"{name} MISSING"
+        size = p.stat().st_size
+        h = short_sha256(p, size)
+        return f"{name:15s} hash={h} size={size}"
+
+    # sha256 releases the GIL on large buffers, so the four files hash concurrently.
+    names = ["start.html","after_expand.html","start.png","after_expand.png"]
+    with ThreadPoolExecutor(max_workers=len(names)) as ex:
+        for line in ex.map(hash_one, names):
+            print(line)
+
+except Exception as e:
+    print(f"Error: {e}")